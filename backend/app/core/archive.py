@@ -0,0 +1,121 @@
+import asyncio
+import heapq
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.cache import TTLCache
+
+# Archive collections mirror their hot counterparts
+ARCHIVE_COLLECTIONS = {
+    "transactions": "transactions_archive",
+    "activities": "activities_archive",
+}
+
+_cutoff_cache = TTLCache(ttl=60, maxsize=16)
+
+
+async def get_archive_cutoff(
+    database: AsyncIOMotorDatabase, collection_name: str
+) -> Optional[datetime]:
+    """Return the watermark below which documents may live in the archive"""
+    cached = _cutoff_cache.get(collection_name)
+    if cached is not None:
+        return cached or None
+
+    state = await database.archive_state.find_one({"_id": collection_name})
+    cutoff = state["cutoff"] if state else None
+    # Cache misses as False so an empty archive isn't looked up every request
+    _cutoff_cache.set(collection_name, cutoff or False)
+    return cutoff
+
+
+async def set_archive_cutoff(
+    database: AsyncIOMotorDatabase, collection_name: str, cutoff: datetime
+) -> None:
+    """Advance the archive watermark for a collection"""
+    await database.archive_state.update_one(
+        {"_id": collection_name},
+        {"$max": {"cutoff": cutoff}, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True,
+    )
+    _cutoff_cache.delete(collection_name)
+
+
+async def find_with_archive(
+    database: AsyncIOMotorDatabase,
+    collection_name: str,
+    filter_dict: Dict[str, Any],
+    sort_field: str,
+    skip: int,
+    limit: int,
+    since_date: Optional[datetime] = None,
+    projection: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """Page newest first through the hot collection and the archive together
+
+    Archived documents all sort below the archive watermark, so a page of hot
+    documents ending above it is final. Otherwise the hot documents below the
+    watermark (ones not yet archived) are merged with the archive by
+    ``sort_field``, so pages follow one global order. The archive is skipped
+    when the requested date range stays above the watermark.
+    """
+    hot = database[collection_name]
+    if projection is not None:
+        projection = {**projection, sort_field: 1}
+    docs = (
+        await hot.find(filter_dict, projection)
+        .sort(sort_field, -1)
+        .skip(skip)
+        .limit(limit)
+        .to_list(length=limit)
+    )
+
+    cutoff = await get_archive_cutoff(database, collection_name)
+    if cutoff is None or (since_date is not None and since_date >= cutoff):
+        return docs
+    if len(docs) >= limit and docs[-1][sort_field] >= cutoff:
+        return docs
+
+    # Hot documents above the watermark come first, the merge after them
+    head = [doc for doc in docs if doc[sort_field] >= cutoff]
+    if head:
+        above = skip + len(head)
+    else:
+        above = await hot.count_documents(
+            {"$and": [filter_dict, {sort_field: {"$gte": cutoff}}]}
+        )
+    start = max(0, skip - above)
+    window = start + limit - len(head)
+
+    below = (
+        hot.find({"$and": [filter_dict, {sort_field: {"$lt": cutoff}}]}, projection)
+        .sort(sort_field, -1)
+        .limit(window)
+        .to_list(length=window)
+    )
+    archived = (
+        database[ARCHIVE_COLLECTIONS[collection_name]]
+        .find(filter_dict, projection)
+        .sort(sort_field, -1)
+        .limit(window)
+        .to_list(length=window)
+    )
+    merged = heapq.merge(
+        *await asyncio.gather(below, archived),
+        key=itemgetter(sort_field),
+        reverse=True,
+    )
+    return head + list(islice(merged, start, window))
+
+
+async def find_one_with_archive(
+    database: AsyncIOMotorDatabase, collection_name: str, filter_dict: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Look a document up in the hot collection, falling back to the archive"""
+    doc = await database[collection_name].find_one(filter_dict)
+    if doc is None and await get_archive_cutoff(database, collection_name):
+        doc = await database[ARCHIVE_COLLECTIONS[collection_name]].find_one(filter_dict)
+    return doc
@@ -0,0 +1,51 @@
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import time
+
+
+class TTLCache:
+    """Small in-process cache with per-entry expiry and a size bound
+
+    When full the oldest entry is evicted; with ``lru`` reads refresh an
+    entry's position, so the least recently used one goes first.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024, lru: bool = False):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.lru = lru
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a cached value, or None if missing or expired"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            return None
+        if self.lru:
+            # Dicts keep insertion order; re-inserting moves the key to the end
+            self._data[key] = self._data.pop(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the oldest entry when full"""
+        if key not in self._data and len(self._data) >= self.maxsize:
+            self._data.pop(next(iter(self._data)))
+        self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+
+    def delete(self, key: Hashable) -> None:
+        """Drop a single entry"""
+        self._data.pop(key, None)
+
+    def evict_if(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Drop every entry whose key matches the predicate"""
+        for key in [k for k in self._data if predicate(k)]:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
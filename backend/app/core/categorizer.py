@@ -0,0 +1,169 @@
+"""
+Offline expense categorizer
+
+Titles are reduced to a key (lowercase words, digits dropped, so "Uber 4821"
+and "uber 1377" are the same key) and scored with a hashing model: each word,
+each pair of adjacent words, and each prefix of a word of at least
+``MIN_PREFIX`` letters, is hashed to 32 bits. Only the hashes the seed
+keywords produce are kept, sorted, next to a weight matrix with a column per
+category, so a lookup is a ``searchsorted`` and collisions are negligible. A
+word equal to a seed keyword scores 1.0, as does a pair equal to a two-word
+seed ("swiggy instamart" outscores "swiggy" alone). A word that only starts
+with a keyword ("pizzas") scores ``PREFIX_WEIGHT``, which is below
+``MIN_SCORE``: a prefix counts only when something else in the title agrees,
+so "billiards" and "showroom" stay uncategorized. A batch of keys is scored
+with one gather and one ``reduceat``, and a key scoring below ``MIN_SCORE``
+everywhere is left uncategorized.
+"""
+
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+from app.core.analytics import UNCATEGORIZED
+
+MIN_SCORE = 0.6
+MIN_PREFIX = 4
+PREFIX_WEIGHT = 0.4
+
+_WORD_PATTERN = re.compile(r"[a-z]+")
+
+CATEGORY_KEYWORDS: Dict[str, List[str]] = {
+    "Food": (
+        "dinner lunch breakfast brunch snacks coffee cafe tea restaurant pizza "
+        "burger biryani dosa chai bakery dessert swiggy zomato ubereats dominos kfc "
+        "mcdonalds starbucks food meal takeaway bar pub drinks beer"
+    ).split()
+    + ["uber eats"],
+    "Groceries": (
+        "groceries grocery vegetables fruits milk supermarket bigbasket blinkit "
+        "zepto instamart dmart kirana provisions"
+    ).split()
+    + ["swiggy instamart", "amazon fresh"],
+    "Transport": (
+        "uber ola rapido cab taxi auto rickshaw metro bus fuel petrol diesel "
+        "parking toll train local commute"
+    ).split(),
+    "Travel": (
+        "flight flights airline indigo vistara hotel hostel airbnb trip travel "
+        "holiday vacation booking makemytrip goibibo irctc visa luggage"
+    ).split(),
+    "Shopping": (
+        "amazon flipkart myntra ajio shopping clothes shoes mall gift gifts "
+        "electronics gadget furniture decor"
+    ).split(),
+    "Bills": (
+        "rent electricity water gas internet wifi broadband phone mobile recharge "
+        "postpaid bill bills maintenance insurance emi subscription dth"
+    ).split(),
+    "Entertainment": (
+        "movie movies cinema pvr inox netflix spotify hotstar prime concert "
+        "tickets ticket show games gaming bowling party club"
+    ).split()
+    + ["amazon prime"],
+    "Health": (
+        "doctor hospital clinic pharmacy medicine medicines apollo medplus "
+        "pharmeasy gym yoga dentist checkup"
+    ).split(),
+}
+
+
+def title_key(title: str) -> str:
+    """Normalized form of a title, shared by overrides and the cache"""
+    return " ".join(_WORD_PATTERN.findall(title.lower()))
+
+
+def _hash(feature: str) -> int:
+    # crc32 is stable across processes, unlike hash()
+    return zlib.crc32(feature.encode())
+
+
+def _features(key: str) -> List[int]:
+    indices: List[int] = []
+    words = key.split()
+    for word in words:
+        indices.append(_hash(f"w:{word}"))
+        for end in range(MIN_PREFIX, len(word)):
+            indices.append(_hash(f"p:{word[:end]}"))
+    for pair in zip(words, words[1:]):
+        indices.append(_hash("b:" + " ".join(pair)))
+    return indices
+
+
+class Categorizer:
+    """A linear model over hashed words, word pairs and word prefixes"""
+
+    def __init__(
+        self, hashes: np.ndarray, weights: np.ndarray, categories: Sequence[str]
+    ):
+        # ``weights`` has a row per sorted hash plus a final zero row for misses
+        self.hashes = hashes
+        self.weights = weights
+        self.categories = list(categories)
+
+    @classmethod
+    def from_keywords(
+        cls, keywords: Dict[str, Iterable[str]] = CATEGORY_KEYWORDS
+    ) -> "Categorizer":
+        categories = list(keywords)
+        rows: Dict[int, np.ndarray] = {}
+
+        def add(feature: str, column: int, weight: float) -> None:
+            row = rows.setdefault(_hash(feature), np.zeros(len(categories), np.float32))
+            row[column] += weight
+
+        for column, category in enumerate(categories):
+            for keyword in keywords[category]:
+                word = title_key(keyword)
+                if " " in word:
+                    add(f"b:{word}", column, 1.0)
+                    continue
+                add(f"w:{word}", column, 1.0)
+                if len(word) >= MIN_PREFIX:
+                    add(f"p:{word}", column, PREFIX_WEIGHT)
+
+        hashes = np.array(sorted(rows), dtype=np.int64)
+        weights = np.vstack(
+            [rows[h] for h in hashes.tolist()] + [np.zeros(len(categories), np.float32)]
+        )
+        return cls(hashes, weights, categories)
+
+    def predict(self, keys: Sequence[str]) -> List[str]:
+        """Category for each title key, or ``UNCATEGORIZED``"""
+        if not keys:
+            return []
+        indices: List[int] = []
+        offsets = np.zeros(len(keys), dtype=np.int64)
+        for row, key in enumerate(keys):
+            offsets[row] = len(indices)
+            indices.extend(_features(key))
+        if not indices:
+            return [UNCATEGORIZED] * len(keys)
+
+        # Row of each feature (the zero row if unknown), summed per key. One
+        # extra miss keeps trailing offsets in range; reduceat gives keys
+        # without features their neighbour's first row, so those are zeroed.
+        features = np.array(indices + [-1], dtype=np.int64)
+        positions = np.searchsorted(self.hashes, features)
+        positions = np.minimum(positions, len(self.hashes))
+        known = positions < len(self.hashes)
+        known[known] = self.hashes[positions[known]] == features[known]
+        contributions = self.weights[np.where(known, positions, len(self.hashes))]
+        empty = np.diff(np.append(offsets, len(indices))) == 0
+        scores = np.add.reduceat(contributions, offsets)
+        scores[empty] = 0.0
+
+        best = scores.argmax(axis=1)
+        confident = scores[np.arange(len(keys)), best] >= MIN_SCORE
+        return [
+            self.categories[column] if ok else UNCATEGORIZED
+            for column, ok in zip(best.tolist(), confident.tolist())
+        ]
+
+
+@lru_cache(maxsize=1)
+def get_categorizer() -> Categorizer:
+    return Categorizer.from_keywords()
@@ -0,0 +1,144 @@
+"""
+Negotiated response compression
+
+Responses at or above ``compression_min_size`` are compressed with brotli or
+gzip, whichever has the higher q-value in ``Accept-Encoding`` (brotli on ties).
+Responses that already carry a ``Content-Encoding``, such as the precompressed
+FAQ bodies, and streamed responses are passed through untouched.
+"""
+
+import gzip
+from typing import Dict, Optional, Set
+
+from app.core.config import settings
+from app.core.profiling import profile_section
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip alone is still served
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def encoding_qualities(accept_encoding: str) -> Dict[str, float]:
+    """Quality value of each content coding in an ``Accept-Encoding`` header"""
+    qualities = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    pass
+        qualities[coding] = quality
+    return qualities
+
+
+def accepted_encodings(accept_encoding: str) -> Set[str]:
+    """Content codings an ``Accept-Encoding`` header allows, lowercased"""
+    return {
+        coding
+        for coding, quality in encoding_qualities(accept_encoding).items()
+        if quality > 0
+    }
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """The coding to compress a dynamic response with, if any
+
+    The accepted coding with the highest q-value, brotli on ties; none if
+    the client ranks ``identity`` above both.
+    """
+    qualities = encoding_qualities(accept_encoding)
+    wildcard = qualities.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_quality = None, 0.0
+    for coding in candidates:
+        quality = qualities.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    if best is not None and qualities.get("identity", 0.0) > best_quality:
+        return None
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.compression_brotli_quality)
+    return gzip.compress(body, settings.compression_gzip_level)
+
+
+class CompressionMiddleware:
+    """Compresses large single-message responses the client can decode"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = None
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                encoding = choose_encoding(value.decode("latin-1"))
+                break
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = {k.lower(): v for k, v in message.get("headers", [])}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                if b"content-encoding" in headers or not content_type.startswith(
+                    COMPRESSIBLE_TYPES
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Held until the body shows whether it's worth compressing
+                    start = message
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body") or len(body) < settings.compression_min_size:
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            with profile_section("compress"):
+                compressed = compress(body, encoding)
+            headers = []
+            vary = [b"Accept-Encoding"]
+            for key, value in start.get("headers", []):
+                if key.lower() == b"vary":
+                    vary.insert(0, value)
+                elif key.lower() != b"content-length":
+                    headers.append((key, value))
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", b", ".join(vary)),
+            ]
+            await send({**start, "headers": headers})
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,7 +1,11 @@
-from pydantic_settings import BaseSettings
+from pydantic import model_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import List
 import os
 
+# Published in the repo, so tokens signed with it can be forged by anyone
+DEFAULT_SECRET_KEY = "your-secret-key-here-please-change-in-production"
+
 
 class Settings(BaseSettings):
     # Database
@@ -9,15 +13,123 @@ class Settings(BaseSettings):
     database_name: str = "paisasplit"
 
     # Security
-    secret_key: str = "your-secret-key-here-please-change-in-production"
+    secret_key: str = DEFAULT_SECRET_KEY
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    auth_enabled: bool = True
+    auth_cache_ttl: int = 300  # seconds; entries never outlive their token
+    auth_cache_size: int = 10000
+    admin_user_ids: List[str] = []  # may edit the FAQ
 
     # Application
     app_name: str = "PaisaSplit API"
     app_version: str = "1.0.0"
     debug: bool = True
 
+    # Server
+    server_mode: str = "development"
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int = 0  # 0 = one per CPU core
+    server_keep_alive: int = 5
+    server_backlog: int = 2048
+    server_max_requests: int = 10000
+    server_max_requests_jitter: int = 1000
+    server_graceful_timeout: int = 30
+    server_worker_timeout: int = 60
+
+    # Startup
+    fast_start: bool = False  # load routers on first hit, connect to Mongo lazily
+    startup_target_ms: float = 500
+
+    # Profiling
+    profiling_enabled: bool = False
+    profiling_token: str = ""  # X-Profile-Token value that triggers sampling
+    profiling_sample_interval: float = 0.001
+    profiling_query_threshold: int = 20
+    profiling_output_dir: str = "profiles"
+
+    # Recurring transactions
+    recurring_scheduler_enabled: bool = True
+    recurring_batch_size: int = 500
+    recurring_max_catchup: int = 24  # occurrences per template per pass
+    recurring_max_sleep: float = 300
+
+    # Receipts
+    receipt_max_bytes: int = 10 * 1024 * 1024
+    receipt_workers: int = 2
+    receipt_max_pending: int = 32
+    receipt_thumbnail_size: int = 320
+
+    # Logging
+    log_level: str = "INFO"
+    log_format: str = "json"  # or "text"
+    log_queue_size: int = 10000  # records beyond this are dropped, not waited on
+    log_info_sample_rate: float = 1.0
+    log_sampled_loggers: List[str] = ["uvicorn.access"]
+
+    # Event-loop monitor (seconds)
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval: float = 0.1
+    loop_monitor_window: int = 600  # lag samples kept for percentiles
+    loop_slow_callback_threshold: float = 0.1
+
+    # Request deadlines (seconds); X-Request-Timeout may ask for up to the max
+    request_timeout_read: float = 5.0
+    request_timeout_write: float = 10.0
+    request_timeout_slow: float = 30.0
+    request_timeout_max: float = 60.0
+
+    # Response compression
+    compression_min_size: int = 1024  # bytes
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+
+    # Caching
+    activity_stats_cache_ttl: int = 30
+    membership_cache_ttl: int = 30  # per worker; bounds staleness across workers
+    faq_snapshot_ttl: int = 300
+    # Seconds a coalesced read result is reused; 0 only shares in-flight calls
+    coalescing_cache_ttl: float = 0.25
+
+    # Dashboard
+    dashboard_section_timeout: float = 2.0
+
+    # Reconciliation (python -m app.jobs.reconcile_balances)
+    reconcile_workers: int = 4
+    reconcile_chunk_size: int = 500  # users or groups per aggregation
+    reconcile_pause: float = 0.2  # seconds each worker waits between chunks
+
+    # Balance history
+    # Events newer than this are left for the next snapshot run, so writes
+    # still in flight when the job starts aren't missed
+    balance_snapshot_lag_seconds: int = 60
+
+    # Sharded group counters; write rates are counted per worker
+    group_counter_enabled: bool = True
+    group_counter_threshold: float = 5.0  # writes per second that make a group hot
+    group_counter_window: float = 10.0  # seconds over which the rate is measured
+    group_counter_shards: int = 8
+    group_counter_read_cache_ttl: float = 0.5
+    group_counter_compact_interval: float = 5.0
+    # Seconds without shard writes before a group returns to direct writes;
+    # keep well above the 30s at which busy workers re-mark their groups
+    group_counter_idle_seconds: int = 300
+
+    # Seconds edits to names and avatars are collected before their copies
+    # in groups, balances and activities are rewritten
+    propagation_delay: float = 1.0
+
+    # Categorization
+    categorizer_cache_size: int = 50000  # title -> category results kept
+    categorizer_cache_ttl: int = 3600
+    categorize_batch_size: int = 2000  # backfill rows per read and bulk write
+
+    # Archival
+    archive_transactions_after_days: int = 365
+    archive_activities_after_days: int = 180
+    archive_batch_size: int = 1000
+
     # CORS
     allowed_origins: List[str] = [
         "http://localhost:3000",
@@ -25,8 +137,20 @@ class Settings(BaseSettings):
         "exp://localhost:8081",
     ]
 
-    class Config:
-        env_file = ".env"
+    model_config = SettingsConfigDict(env_file=".env")
+
+    @model_validator(mode="after")
+    def _require_secret_key(self) -> "Settings":
+        if (
+            self.auth_enabled
+            and self.secret_key == DEFAULT_SECRET_KEY
+            and self.server_mode != "development"
+        ):
+            raise ValueError(
+                "SECRET_KEY must be changed from the default when AUTH_ENABLED "
+                "is set outside development"
+            )
+        return self
 
 
 settings = Settings()
@@ -1,5 +1,8 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import OperationFailure
+from typing import Optional
 from .config import settings
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,33 +11,162 @@ logger = logging.getLogger(__name__)
 class Database:
     client: AsyncIOMotorClient = None
     database = None
+    ready: bool = False
+    error: Optional[str] = None
+    handshake_task: Optional[asyncio.Task] = None
 
 
 db = Database()
 
 
-async def connect_to_mongo():
-    """Create database connection"""
+async def connect_to_mongo(lazy: bool = False):
+    """Create database connection
+
+    With ``lazy`` the client is created without waiting for the server; the
+    ping and index creation run in the background and readiness is reported
+    through ``get_database_status``.
+    """
     try:
-        db.client = AsyncIOMotorClient(settings.mongodb_url)
+        event_listeners = []
+        if settings.profiling_enabled:
+            from app.core.profiling import MongoCommandProfiler
+
+            event_listeners.append(MongoCommandProfiler())
+
+        db.client = AsyncIOMotorClient(
+            settings.mongodb_url, event_listeners=event_listeners
+        )
         db.database = db.client[settings.database_name]
 
-        # Test the connection
-        await db.client.admin.command("ping")
-        logger.info(f"Connected to MongoDB at {settings.mongodb_url}")
+        if lazy:
+            db.handshake_task = asyncio.create_task(_background_handshake())
+            return
+
+        await _handshake()
 
     except Exception as e:
         logger.error(f"Could not connect to MongoDB: {e}")
         raise
 
 
+async def _handshake():
+    """Test the connection and prepare indexes"""
+    await db.client.admin.command("ping")
+    logger.info(f"Connected to MongoDB at {settings.mongodb_url}")
+
+    await create_indexes()
+    db.ready = True
+    db.error = None
+
+
+async def _background_handshake():
+    """Retry the handshake with backoff until the server answers"""
+    delay = 1
+    while True:
+        try:
+            await _handshake()
+            return
+        except Exception as e:
+            db.error = str(e)
+            logger.error(f"Could not connect to MongoDB: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+
+async def create_indexes():
+    """Create the indexes the services rely on for range queries"""
+    for name in ("activities", "activities_archive"):
+        await db.database[name].create_index([("participants", 1), ("timestamp", -1)])
+        await db.database[name].create_index([("group_id", 1), ("timestamp", -1)])
+
+    for name in ("transactions", "transactions_archive"):
+        await db.database[name].create_index([("user_id", 1), ("created_at", -1)])
+        await db.database[name].create_index([("group_id", 1), ("created_at", -1)])
+        await db.database[name].create_index([("participants", 1), ("created_at", -1)])
+    for name in ("activities_archive", "transactions_archive"):
+        # Copies the archive job has not finished with
+        await db.database[name].create_index(
+            "rolled_up", partialFilterExpression={"rolled_up": False}
+        )
+    await db.database.transactions.create_index([("status", 1), ("created_at", 1)])
+    # One materialized transaction per recurring occurrence
+    await db.database.transactions.create_index(
+        [("recurring_id", 1), ("created_at", 1)],
+        unique=True,
+        partialFilterExpression={"recurring_id": {"$type": "string"}},
+    )
+
+    try:
+        # Balances are upserted per (user, currency)
+        await db.database.balances.create_index(
+            [("user_id", 1), ("currency", 1)], unique=True
+        )
+    except OperationFailure as e:
+        logger.warning(
+            "Balances are not unique per (user_id, currency) yet; run "
+            f"python -m app.jobs.dedupe_balances: {e}"
+        )
+    # Receipts are deduplicated per uploader; the older global index is dropped
+    if "sha256_1" in await db.database.receipts.index_information():
+        await db.database.receipts.drop_index("sha256_1")
+    await db.database.receipts.create_index(
+        [("uploaded_by", 1), ("sha256", 1)], unique=True
+    )
+    await db.database.recurring_transactions.create_index(
+        [("is_active", 1), ("next_run_at", 1)]
+    )
+    await db.database.recurring_transactions.create_index(
+        [("user_id", 1), ("next_run_at", 1)]
+    )
+    await db.database.pair_ledger.create_index(
+        [("user_a", 1), ("user_b", 1), ("currency", 1)], unique=True
+    )
+    await db.database.pair_ledger.create_index("users")
+    await db.database.spending_reports.create_index(
+        [("user_id", 1), ("year", -1), ("month", -1)], unique=True
+    )
+    await db.database.balance_events.create_index(
+        [("user_id", 1), ("currency", 1), ("created_at", 1)]
+    )
+    await db.database.balance_events.create_index("created_at")
+    await db.database.balance_snapshots.create_index(
+        [("user_id", 1), ("currency", 1), ("as_of", -1)], unique=True
+    )
+    await db.database.group_counter_shards.create_index(
+        [("group_id", 1), ("shard", 1)], unique=True
+    )
+    await db.database.group_counter_shards.create_index("dirty")
+    await db.database.groups.create_index("counters_active_at", sparse=True)
+    await db.database.category_overrides.create_index(
+        [("user_id", 1), ("key", 1)], unique=True
+    )
+
+
 async def close_mongo_connection():
     """Close database connection"""
+    if db.handshake_task and not db.handshake_task.done():
+        db.handshake_task.cancel()
     if db.client:
         db.client.close()
+        db.ready = False
         logger.info("Disconnected from MongoDB")
 
 
+async def wait_for_database() -> None:
+    """Wait for a lazy connection's handshake to complete"""
+    if db.handshake_task is not None:
+        await asyncio.shield(db.handshake_task)
+
+
 def get_database():
     """Get database instance"""
     return db.database
+
+
+def get_database_status() -> str:
+    """Readiness of the database connection: ready, connecting or unavailable"""
+    if db.ready:
+        return "ready"
+    if db.error:
+        return "unavailable"
+    return "connecting"
@@ -0,0 +1,192 @@
+"""
+Per-request deadlines
+
+Every HTTP request gets a time budget from its route class, or from an
+``X-Request-Timeout`` header (seconds, capped at ``request_timeout_max``).
+The budget is applied two ways for the whole request, including tasks it
+spawns:
+
+- ``pymongo.timeout``, so every find, aggregate, bulk write and cursor
+  ``getMore`` sends a ``maxTimeMS`` for what is left of the budget and gives
+  up client-side (server selection, pool checkout, socket reads) at the same
+  moment. Motor copies the context into its worker threads, so this reaches
+  the driver without threading a timeout through every service call.
+- ``asyncio.timeout`` around the handler, which cancels it at the deadline.
+
+A request whose deadline passes before its response starts is answered with
+``504 Gateway Timeout``, including when a service swallowed the driver's
+timeout error and would otherwise have answered 404 or an empty list.
+
+The deadline covers producing a response, not delivering it: once the
+response has started, the handler is no longer cancelled, so a streamed body
+(a receipt download) is never cut off after its 200. Reads made while
+streaming still carry the request's driver budget, so streamed bodies run
+them through ``spawn_detached`` with a budget of their own. Single-flight
+executions are detached the same way, and each caller only waits for them
+until its own deadline.
+"""
+
+import asyncio
+import contextvars
+import logging
+import re
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Coroutine, Dict, Optional
+
+import pymongo
+from pymongo.errors import PyMongoError
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (method, path pattern) for routes that legitimately take longer
+SLOW_ROUTES = [
+    ("POST", re.compile(r"^/api/v1/support/spending-reports$")),
+    ("POST", re.compile(r"^/api/v1/balances/user/[^/]+/history/reconcile$")),
+    ("POST", re.compile(r"^/api/v1/receipts/?$")),
+    ("GET", re.compile(r"^/api/v1/receipts/[^/]+/(content|thumbnail)$")),
+]
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+
+@dataclass
+class DeadlineStats:
+    requests: int = 0
+    header_overrides: int = 0
+    exhausted: int = 0
+
+
+_stats: Dict[str, DeadlineStats] = {}
+
+
+def get_deadline_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-route-class counters for the metrics endpoint"""
+    return {name: asdict(stats) for name, stats in _stats.items()}
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current request's deadline, or None outside one"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def clamp(timeout: float) -> float:
+    """``timeout``, shortened to fit the current request's deadline"""
+    left = remaining()
+    return timeout if left is None else max(0.0, min(timeout, left))
+
+
+def spawn_detached(coro: Coroutine, timeout: Optional[float] = None) -> asyncio.Task:
+    """Start a background task that outlives the request and its deadline
+
+    It starts from an empty context, so it doesn't inherit the request's
+    deadline, profile or request id. With ``timeout`` it gets a budget of its
+    own, enforced the same two ways as a request's.
+    """
+    if timeout is not None:
+        coro = _within_budget(coro, timeout)
+    return asyncio.create_task(coro, context=contextvars.Context())
+
+
+async def _within_budget(coro: Coroutine, timeout: float) -> Any:
+    _deadline.set(time.monotonic() + timeout)
+    with pymongo.timeout(timeout):
+        async with asyncio.timeout(timeout):
+            return await coro
+
+
+def route_class(method: str, path: str) -> str:
+    for slow_method, pattern in SLOW_ROUTES:
+        if method == slow_method and pattern.match(path):
+            return "slow"
+    return "read" if method in ("GET", "HEAD") else "write"
+
+
+def _requested_timeout(scope) -> Optional[float]:
+    for key, value in scope["headers"]:
+        if key == b"x-request-timeout":
+            try:
+                timeout = float(value)
+            except ValueError:
+                return None
+            return timeout if timeout > 0 else None
+    return None
+
+
+def _is_timeout(error: BaseException) -> bool:
+    return isinstance(error, TimeoutError) or (
+        isinstance(error, PyMongoError) and error.timeout
+    )
+
+
+class DeadlineMiddleware:
+    """Bounds each request by its deadline and turns overruns into 504s"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        name = route_class(scope["method"], scope["path"])
+        stats = _stats.setdefault(name, DeadlineStats())
+        stats.requests += 1
+        budget = getattr(settings, f"request_timeout_{name}")
+        requested = _requested_timeout(scope)
+        if requested is not None:
+            stats.header_overrides += 1
+            budget = min(requested, settings.request_timeout_max)
+
+        deadline = time.monotonic() + budget
+        token = _deadline.set(deadline)
+        started = False
+        expired = False
+
+        handler_timeout: Optional[asyncio.Timeout] = None
+
+        async def send_within_deadline(message):
+            nonlocal started, expired
+            if expired:
+                return
+            if message["type"] == "http.response.start":
+                if time.monotonic() >= deadline:
+                    # Too late to be useful; the result may also be a
+                    # swallowed timeout dressed up as a 404 or empty list
+                    expired = True
+                    return
+                started = True
+                # The status is sent; let the body finish
+                if not handler_timeout.expired():
+                    handler_timeout.reschedule(None)
+            await send(message)
+
+        try:
+            with pymongo.timeout(budget):
+                async with asyncio.timeout(budget) as handler_timeout:
+                    await self.app(scope, receive, send_within_deadline)
+        except Exception as e:
+            if started or not _is_timeout(e):
+                raise
+            expired = True
+        finally:
+            _deadline.reset(token)
+
+        if expired:
+            stats.exhausted += 1
+            logger.warning(
+                f"Deadline of {budget:.1f}s exceeded: {scope['method']} {scope['path']}"
+            )
+            response = JSONResponse(
+                {"detail": "Request deadline exceeded"}, status_code=504
+            )
+            await response(scope, receive, send)
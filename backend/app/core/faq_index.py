@@ -0,0 +1,178 @@
+"""
+In-memory FAQ snapshot
+
+FAQ content changes rarely and is read constantly, so the whole collection is
+held in an immutable snapshot: items by id and category, the JSON list bodies
+already compressed for each category, and an inverted index for search.
+Writes build a new snapshot and swap it in; readers never wait on Mongo.
+"""
+
+import gzip
+import hashlib
+import json
+import math
+import re
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.compression import accepted_encodings
+from app.models import FAQItem
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip alone is still served
+    brotli = None
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it my of on or "
+    "the to what when where which who why will with you your".split()
+)
+# Matches in the question count more than matches in the answer
+_QUESTION_WEIGHT = 3.0
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords and trailing plurals removed"""
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+@dataclass(frozen=True)
+class EncodedBody:
+    """A response body precompressed in every supported encoding"""
+
+    etag: str
+    encodings: Dict[str, bytes]
+
+    @classmethod
+    def build(cls, content: Any) -> "EncodedBody":
+        identity = json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+        encodings = {"identity": identity, "gzip": gzip.compress(identity, 9)}
+        if brotli is not None:
+            encodings["br"] = brotli.compress(identity, quality=11)
+        return cls(etag=f'"{hashlib.sha1(identity).hexdigest()}"', encodings=encodings)
+
+    def negotiate(self, accept_encoding: str) -> Tuple[str, bytes]:
+        """Pick the smallest body the client accepts"""
+        accepted = accepted_encodings(accept_encoding)
+
+        best = "identity"
+        for coding in ("br", "gzip"):
+            if coding in self.encodings and (coding in accepted or "*" in accepted):
+                if len(self.encodings[coding]) < len(self.encodings[best]):
+                    best = coding
+        return best, self.encodings[best]
+
+
+@dataclass
+class FAQSnapshot:
+    items: Dict[str, FAQItem] = field(default_factory=dict)
+    # Active items in display order
+    active: List[FAQItem] = field(default_factory=list)
+    categories: List[str] = field(default_factory=list)
+    # Active items per category, None meaning all categories
+    bodies: Dict[Optional[str], EncodedBody] = field(default_factory=dict)
+    # token -> {item id: weight}
+    postings: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    loaded_at: float = 0.0
+
+    @classmethod
+    def build(cls, faq_docs: List[Dict[str, Any]]) -> "FAQSnapshot":
+        items = {str(doc["_id"]): FAQItem.model_validate(doc) for doc in faq_docs}
+        active = sorted(
+            (item for item in items.values() if item.is_active),
+            key=lambda item: (item.category, item.order, item.created_at),
+        )
+
+        by_category: Dict[Optional[str], List[Dict[str, Any]]] = defaultdict(list)
+        for item in active:
+            content = item.model_dump(mode="json", by_alias=True)
+            by_category[None].append(content)
+            by_category[item.category].append(content)
+        by_category.setdefault(None, [])
+        bodies = {
+            category: EncodedBody.build(content)
+            for category, content in by_category.items()
+        }
+
+        # Term frequency per field, scaled by inverse document frequency
+        term_counts = {
+            str(item.id): (
+                Counter(tokenize(item.question)),
+                Counter(tokenize(item.answer)),
+            )
+            for item in active
+        }
+        document_frequency: Counter = Counter()
+        for question, answer in term_counts.values():
+            document_frequency.update(set(question) | set(answer))
+
+        postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        for item_id, (question, answer) in term_counts.items():
+            length = sum(question.values()) + sum(answer.values()) or 1
+            for token in set(question) | set(answer):
+                tf = (_QUESTION_WEIGHT * question[token] + answer[token]) / length
+                idf = math.log(1 + len(active) / document_frequency[token])
+                postings[token][item_id] = tf * idf
+
+        return cls(
+            items=items,
+            active=active,
+            categories=sorted({item.category for item in active}),
+            bodies=bodies,
+            postings=dict(postings),
+            loaded_at=time.monotonic(),
+        )
+
+    def list_items(self, category: Optional[str] = None) -> List[FAQItem]:
+        return [
+            item
+            for item in self.active
+            if category is None or item.category == category
+        ]
+
+    def search(
+        self, query: str, category: Optional[str] = None, limit: int = 10
+    ) -> List[FAQItem]:
+        """Rank active items by summed tf-idf of the query terms
+
+        The last term also matches as a prefix so results appear while the
+        user is still typing.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        scores: Dict[str, float] = defaultdict(float)
+        matched: Dict[str, int] = defaultdict(int)
+        for position, token in enumerate(tokens):
+            postings = dict(self.postings.get(token, {}))
+            if position == len(tokens) - 1 and not postings:
+                for term, term_postings in self.postings.items():
+                    if term.startswith(token):
+                        for item_id, weight in term_postings.items():
+                            postings[item_id] = max(postings.get(item_id, 0), weight)
+            for item_id, weight in postings.items():
+                scores[item_id] += weight
+                matched[item_id] += 1
+
+        ranked = sorted(scores, key=lambda i: (matched[i], scores[i]), reverse=True)
+        results = []
+        for item_id in ranked:
+            item = self.items[item_id]
+            if category is None or item.category == category:
+                results.append(item)
+                if len(results) == limit:
+                    break
+        return results
@@ -0,0 +1,87 @@
+"""
+Sparse fieldsets for list endpoints
+
+``?fields=title,amount,created_at`` limits a list response to those top-level
+fields (``id`` is always included). The selection becomes a Mongo projection,
+so unrequested fields, embedded group members in particular, are never read,
+validated or serialized; responses are built from a trimmed copy of the model.
+"""
+
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Query, status
+from fastapi.responses import Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+
+from app.core.profiling import profile_section
+
+
+def _trimmed_model(model: Type[BaseModel], names: Tuple[str, ...]) -> Type[BaseModel]:
+    return create_model(
+        f"{model.__name__}Fields",
+        __config__=ConfigDict(populate_by_name=True),
+        **{
+            name: (model.model_fields[name].annotation, model.model_fields[name])
+            for name in names
+        },
+    )
+
+
+class FieldSet:
+    """A client-selected subset of a model's fields"""
+
+    def __init__(self, model: Type[BaseModel], names: Tuple[str, ...]):
+        self.model = _trimmed_model(model, names)
+        self.adapter = TypeAdapter(List[self.model])
+        self.projection: Dict[str, int] = {
+            model.model_fields[name].alias or name: 1 for name in names
+        }
+        # Amounts are stored in minor units and need the currency to decode
+        if "currency" in model.model_fields:
+            self.projection["currency"] = 1
+
+    @classmethod
+    def parse(cls, model: Type[BaseModel], fields: str) -> "FieldSet":
+        """Build from a comma-separated field list; raises ValueError on unknown names"""
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - set(model.model_fields)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        names = tuple(name for name in model.model_fields if name in requested)
+        if "id" in model.model_fields and "id" not in names:
+            names = ("id",) + names
+        return _fieldset(model, names)
+
+    def response(self, items: List[BaseModel]) -> Response:
+        # Serialized straight to JSON bytes by pydantic-core
+        with profile_section("encode"):
+            content = self.adapter.dump_json(items, by_alias=True)
+        return Response(content=content, media_type="application/json")
+
+
+# Models and adapters are costly to build and clients ask for the same few sets
+@lru_cache(maxsize=256)
+def _fieldset(model: Type[BaseModel], names: Tuple[str, ...]) -> FieldSet:
+    return FieldSet(model, names)
+
+
+def fieldset_query(
+    model: Type[BaseModel],
+) -> Callable[[Optional[str]], Optional[FieldSet]]:
+    """Dependency reading ``?fields=`` for a list of ``model``"""
+
+    def dependency(
+        fields: Optional[str] = Query(
+            None,
+            description="Comma-separated fields to return; id is always included",
+        )
+    ) -> Optional[FieldSet]:
+        if not fields:
+            return None
+        try:
+            return FieldSet.parse(model, fields)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return dependency
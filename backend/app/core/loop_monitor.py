@@ -0,0 +1,181 @@
+"""
+Event-loop lag monitor and slow-callback detector
+
+Every request on a worker shares one asyncio loop, so synchronous work in a
+coroutine (validating a large page, a Python-side currency loop, a blocking
+log handler) delays everything else on that worker. Two pieces watch for it:
+
+- a heartbeat coroutine sleeps ``loop_monitor_interval`` and records how late
+  it wakes up; the lag percentiles are reported on ``/health`` and
+  ``/metrics``
+- a watchdog thread notices when the heartbeat is overdue by more than
+  ``loop_slow_callback_threshold`` and captures the loop thread's stack while
+  it is still blocked, along with the route whose ASGI scope is on that stack
+
+Stack capture works the same way as the sampling profiler, so it also works
+under uvloop, where asyncio's own slow-callback debugging does not.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def _describe_stack(frame) -> Dict[str, Any]:
+    """Route, innermost app frame and full stack of a thread's current frame"""
+    route = None
+    location = None
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        where = f"{code.co_name} ({code.co_filename}:{frame.f_lineno})"
+        stack.append(where)
+        if location is None and code.co_filename.startswith(_APP_DIR):
+            location = where
+        if route is None:
+            scope = frame.f_locals.get("scope")
+            if isinstance(scope, dict) and scope.get("type") == "http":
+                route = f"{scope.get('method')} {scope.get('path')}"
+        frame = frame.f_back
+    return {
+        "route": route,
+        "location": location or (stack[0] if stack else None),
+        "stack": list(reversed(stack)),
+    }
+
+
+class LoopMonitor:
+    """Samples loop lag and captures the code that blocks the loop"""
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        threshold: float = 0.1,
+        window: int = 600,
+        keep: int = 50,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.slow_callbacks: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self.slow_by_route: Counter = Counter()
+        self._last_beat = time.monotonic()
+        self._capture: Optional[Dict[str, Any]] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-monitor", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await asyncio.to_thread(self._watchdog.join)
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.samples.append(lag)
+            self._last_beat = time.monotonic()
+
+            capture, self._capture = self._capture, None
+            if capture is not None:
+                self._record(capture, lag)
+
+    def _watch(self) -> None:
+        poll = max(0.01, self.threshold / 4)
+        captured_for = None
+        while not self._stop.wait(poll):
+            beat = self._last_beat
+            overdue = time.monotonic() - beat - self.interval
+            if overdue < self.threshold or captured_for == beat:
+                continue
+            # Still blocked: whatever is on the loop thread's stack is the cause
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._capture = _describe_stack(frame)
+            captured_for = beat
+
+    def _record(self, capture: Dict[str, Any], lag: float) -> None:
+        route = capture["route"] or "(background)"
+        self.slow_by_route[route] += 1
+        self.slow_callbacks.append(
+            {
+                "at": time.time(),
+                "blocked_ms": round(lag * 1000, 1),
+                "route": route,
+                "location": capture["location"],
+                "stack": capture["stack"][-12:],
+            }
+        )
+        logger.warning(
+            f"Event loop blocked for {lag * 1000:.0f} ms in {route} "
+            f"at {capture['location']}"
+        )
+
+    def lag_percentiles(self) -> Dict[str, float]:
+        """Lag over the sample window, in milliseconds"""
+        if not self.samples:
+            return {}
+        ordered = sorted(self.samples)
+        return {
+            "p50": round(_percentile(ordered, 0.50) * 1000, 2),
+            "p90": round(_percentile(ordered, 0.90) * 1000, 2),
+            "p99": round(_percentile(ordered, 0.99) * 1000, 2),
+            "max": round(ordered[-1] * 1000, 2),
+            "samples": len(ordered),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lag_ms": self.lag_percentiles(),
+            "slow_callbacks": {
+                "threshold_ms": self.threshold * 1000,
+                "by_route": dict(self.slow_by_route.most_common(20)),
+                "recent": list(self.slow_callbacks),
+            },
+        }
+
+
+loop_monitor = LoopMonitor(
+    interval=settings.loop_monitor_interval,
+    threshold=settings.loop_slow_callback_threshold,
+    window=settings.loop_monitor_window,
+)
@@ -0,0 +1,142 @@
+"""
+Exact money handling
+
+Amounts are stored in Mongo as int64 minor units (paise, cents, ...) so that
+services and ``$sum``/``$inc`` aggregate them exactly. The API keeps exposing
+major-unit floats; conversion happens only when documents cross the service
+boundary through ``encode_amounts``/``decode_amounts``.
+
+Documents written before the migration hold doubles in major units.
+``decode_amounts`` passes those through unchanged, so reads keep working while
+``app.jobs.migrate_money`` converts them. Aggregations read amounts through
+``minor_units`` so ``$sum`` never adds a double to minor units.
+"""
+
+from decimal import Decimal, ROUND_HALF_EVEN
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from bson.int64 import Int64
+
+from app.models import Currency
+
+# Digits after the decimal point for each currency
+MINOR_UNIT_EXPONENTS: Dict[Currency, int] = {
+    Currency.USD: 2,
+    Currency.EUR: 2,
+    Currency.INR: 2,
+    Currency.GBP: 2,
+    Currency.CAD: 2,
+    Currency.AUD: 2,
+}
+
+# Money fields per collection; dotted paths descend into embedded arrays
+MONEY_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "balances": ("amount",),
+    "transactions": ("amount",),
+    "transactions_archive": ("amount",),
+    "activities": ("amount",),
+    "activities_archive": ("amount",),
+    "recurring_transactions": ("amount",),
+    "groups": ("total_expenses", "members.balance"),
+    "spending_reports": ("total_spent", "categories.amount"),
+}
+
+
+def _scale(currency: Union[Currency, str, None]) -> int:
+    try:
+        exponent = MINOR_UNIT_EXPONENTS[Currency(currency)]
+    except ValueError:
+        exponent = 2
+    return 10**exponent
+
+
+def to_minor(amount: Union[float, int, str, Decimal], currency=Currency.INR) -> Int64:
+    """Convert a major-unit amount to int64 minor units, rounding half-to-even"""
+    minor = (Decimal(str(amount)) * _scale(currency)).to_integral_value(
+        rounding=ROUND_HALF_EVEN
+    )
+    return Int64(minor)
+
+
+def to_major(minor: int, currency=Currency.INR) -> float:
+    """Convert int64 minor units back to a major-unit float for the API"""
+    return minor / _scale(currency)
+
+
+def minor_units(field: str = "$amount", currency: Any = "$currency") -> Dict[str, Any]:
+    """Aggregation expression for an amount in int64 minor units
+
+    Legacy major-unit doubles are scaled by their currency's exponent and
+    rounded half-to-even like ``to_minor``; anything else passes through.
+    """
+    scale = {
+        "$switch": {
+            "branches": [
+                {"case": {"$eq": [currency, c.value]}, "then": 10**exponent}
+                for c, exponent in MINOR_UNIT_EXPONENTS.items()
+            ],
+            "default": _scale(None),
+        }
+    }
+    return {
+        "$cond": [
+            {"$eq": [{"$type": field}, "double"]},
+            {"$toLong": {"$round": [{"$multiply": [field, scale]}, 0]}},
+            field,
+        ]
+    }
+
+
+def split_minor(total: int, parts: int) -> List[int]:
+    """Split minor units into ``parts`` shares that sum exactly to ``total``"""
+    base, remainder = divmod(total, parts)
+    return [base + 1 if i < remainder else base for i in range(parts)]
+
+
+def _walk(
+    doc: Dict[str, Any],
+    path: str,
+    currency: Optional[str],
+    convert: Callable[[Any, Optional[str]], Any],
+) -> None:
+    head, _, rest = path.partition(".")
+    if head not in doc:
+        return
+    currency = doc.get("currency", currency)
+    if rest:
+        for item in doc[head] or []:
+            _walk(item, rest, currency, convert)
+    elif doc[head] is not None:
+        doc[head] = convert(doc[head], currency)
+
+
+def _encode(value: Any, currency: Optional[str]) -> Any:
+    # Already-minor ints are left alone so encoding is idempotent
+    if isinstance(value, int):
+        return Int64(value)
+    return to_minor(value, currency or Currency.INR)
+
+
+def _decode(value: Any, currency: Optional[str]) -> Any:
+    # Legacy documents store major-unit doubles
+    if isinstance(value, float):
+        return value
+    return to_major(value, currency or Currency.INR)
+
+
+def encode_amounts(
+    doc: Dict[str, Any], collection_name: str, currency: Optional[str] = None
+) -> Dict[str, Any]:
+    """Convert a document's major-unit floats to minor units, in place"""
+    for path in MONEY_FIELDS[collection_name]:
+        _walk(doc, path, currency, _encode)
+    return doc
+
+
+def decode_amounts(
+    doc: Dict[str, Any], collection_name: str, currency: Optional[str] = None
+) -> Dict[str, Any]:
+    """Convert a stored document's minor units to major-unit floats, in place"""
+    for path in MONEY_FIELDS[collection_name]:
+        _walk(doc, path, currency, _decode)
+    return doc
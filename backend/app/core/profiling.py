@@ -0,0 +1,214 @@
+"""
+Opt-in per-request profiling
+
+With ``PROFILING_ENABLED`` every request gets a ``RequestProfile`` in a context
+variable. Mongo commands are counted and timed by a pymongo command listener
+(motor copies the context into its executor threads), services time model
+construction with ``profile_section("model")`` and response rendering is timed
+by ``ProfiledJSONResponse``. The totals are returned in a ``Server-Timing``
+header, and requests issuing more queries than the threshold are logged as
+likely N+1 patterns.
+
+Sending ``X-Profile-Token`` equal to ``PROFILING_TOKEN`` additionally runs a
+sampling profiler for that request and writes folded stacks (the input format
+of flamegraph.pl / speedscope) to ``PROFILING_OUTPUT_DIR``.
+"""
+
+import asyncio
+import contextvars
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from fastapi.responses import JSONResponse
+from pymongo import monitoring
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RequestProfile:
+    __slots__ = ("started", "mongo_count", "mongo_us", "sections", "commands", "lock")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.mongo_count = 0
+        self.mongo_us = 0
+        self.sections: Dict[str, float] = {}
+        self.commands: Counter = Counter()
+        self.lock = threading.Lock()
+
+    def add_section(self, name: str, seconds: float) -> None:
+        self.sections[name] = self.sections.get(name, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        total_ms = (time.perf_counter() - self.started) * 1000
+        parts = [
+            f'mongo;dur={self.mongo_us / 1000:.2f};desc="{self.mongo_count} queries"'
+        ]
+        parts.extend(
+            f"{name};dur={seconds * 1000:.2f}"
+            for name, seconds in self.sections.items()
+        )
+        parts.append(f"total;dur={total_ms:.2f}")
+        return ", ".join(parts)
+
+
+_current_profile: contextvars.ContextVar[Optional[RequestProfile]] = (
+    contextvars.ContextVar("request_profile", default=None)
+)
+
+
+def get_current_profile() -> Optional[RequestProfile]:
+    return _current_profile.get()
+
+
+@contextmanager
+def profile_section(name: str):
+    """Attribute the time spent in the block to a named Server-Timing entry"""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_section(name, time.perf_counter() - started)
+
+
+class MongoCommandProfiler(monitoring.CommandListener):
+    """Counts and times Mongo commands against the active request profile"""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def _record(self, event, command_name: str) -> None:
+        profile = _current_profile.get()
+        if profile is None:
+            return
+        with profile.lock:
+            profile.mongo_count += 1
+            profile.mongo_us += event.duration_micros
+            profile.commands[command_name] += 1
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._record(event, event.command_name)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._record(event, event.command_name)
+
+
+class ProfiledJSONResponse(JSONResponse):
+    """JSONResponse that reports its rendering time to the request profile"""
+
+    def render(self, content: Any) -> bytes:
+        with profile_section("encode"):
+            return super().render(content)
+
+
+class SamplingProfiler:
+    """Samples one thread's stack at a fixed interval into folded stacks
+
+    All coroutines running on the loop thread are sampled, so concurrent
+    requests show up in the profile too.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path: str) -> None:
+        with open(path, "w") as f:
+            for stack, count in self.stacks.items():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfilingMiddleware:
+    """Sets up the request profile and emits Server-Timing"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _wants_sampling(self, scope) -> bool:
+        if not settings.profiling_token:
+            return False
+        for key, value in scope["headers"]:
+            if key == b"x-profile-token":
+                return hmac.compare_digest(value, settings.profiling_token.encode())
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+
+        sampler = None
+        if self._wants_sampling(scope):
+            sampler = SamplingProfiler(
+                threading.get_ident(), settings.profiling_sample_interval
+            )
+            sampler.start()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_profile.reset(token)
+            if sampler is not None:
+                sampler.stop()
+                await self._dump(scope, sampler)
+            if profile.mongo_count > settings.profiling_query_threshold:
+                logger.warning(
+                    f"Possible N+1: {scope['method']} {scope['path']} issued "
+                    f"{profile.mongo_count} Mongo commands "
+                    f"{dict(profile.commands.most_common(5))}"
+                )
+
+    async def _dump(self, scope, sampler: SamplingProfiler) -> None:
+        os.makedirs(settings.profiling_output_dir, exist_ok=True)
+        name = scope["path"].strip("/").replace("/", "_") or "root"
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        path = os.path.join(
+            settings.profiling_output_dir, f"{stamp}-{scope['method']}-{name}.folded"
+        )
+        await asyncio.to_thread(sampler.write, path)
+        logger.info(f"Wrote request profile to {path}")
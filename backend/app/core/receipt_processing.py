@@ -0,0 +1,94 @@
+"""
+CPU-bound receipt image work, run in a bounded process pool
+
+The functions here execute in worker processes, so they only take and return
+plain picklable values. Text extraction uses Tesseract when it is installed;
+without it receipts still get a thumbnail.
+"""
+
+import asyncio
+import io
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.config import settings
+
+_TOTAL_PATTERN = re.compile(
+    r"(?:grand\s+total|total|amount\s+due|net\s+amount)\D{0,10}(\d[\d,]*\.\d{2})",
+    re.IGNORECASE,
+)
+
+
+def _detect_total(text: str) -> Optional[str]:
+    matches = _TOTAL_PATTERN.findall(text)
+    # The last "total" on a receipt is usually the grand total
+    return matches[-1].replace(",", "") if matches else None
+
+
+def process_receipt_image(data: bytes, thumbnail_size: int) -> Dict[str, Any]:
+    """Make a JPEG thumbnail and extract text from a receipt image"""
+    from PIL import Image, ImageOps
+
+    image = Image.open(io.BytesIO(data))
+    image = ImageOps.exif_transpose(image)
+
+    thumbnail = image.convert("RGB")
+    thumbnail.thumbnail((thumbnail_size, thumbnail_size))
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, format="JPEG", quality=80, optimize=True)
+
+    text = None
+    try:
+        import pytesseract
+
+        text = pytesseract.image_to_string(ImageOps.grayscale(image))
+    except (ImportError, OSError, RuntimeError):
+        # pytesseract or the tesseract binary is not available
+        pass
+
+    return {
+        "thumbnail": buffer.getvalue(),
+        "width": image.width,
+        "height": image.height,
+        "text": text,
+        "detected_total": _detect_total(text) if text else None,
+    }
+
+
+class ReceiptProcessor:
+    """Process pool plus a semaphore bounding the jobs waiting for it
+
+    A job's image is only read once it holds a slot, so at most
+    ``receipt_max_pending`` images are in memory however many jobs queue.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _ensure_started(self) -> None:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=settings.receipt_workers)
+            self._slots = asyncio.Semaphore(settings.receipt_max_pending)
+
+    async def process(self, read: Callable[[], Awaitable[bytes]]) -> Dict[str, Any]:
+        """Read an image with ``read`` once a slot is free, then process it"""
+        self._ensure_started()
+        async with self._slots:
+            data = await read()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor,
+                process_receipt_image,
+                data,
+                settings.receipt_thumbnail_size,
+            )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+receipt_processor = ReceiptProcessor()
@@ -0,0 +1,77 @@
+import importlib
+import threading
+from typing import List, Tuple
+
+from fastapi import Depends, FastAPI
+
+from app.core.security import get_current_principal
+
+# (module in app.routers, mount prefix); the module name doubles as the tag
+ROUTERS: List[Tuple[str, str]] = [
+    ("users", "/api/v1/users"),
+    ("balances", "/api/v1/balances"),
+    ("groups", "/api/v1/groups"),
+    ("transactions", "/api/v1/transactions"),
+    ("recurring", "/api/v1/recurring"),
+    ("receipts", "/api/v1/receipts"),
+    ("activities", "/api/v1/activities"),
+    ("support", "/api/v1/support"),
+    ("dashboard", "/api/v1/dashboard"),
+]
+
+# Paths that need every router registered (the OpenAPI schema and its UIs)
+SCHEMA_PATHS = ("/docs", "/redoc", "/openapi.json")
+
+_loaded = set()
+_lock = threading.Lock()
+
+
+def include_router(app: FastAPI, name: str, prefix: str) -> None:
+    """Import a router module and mount it, once"""
+    with _lock:
+        if name in _loaded:
+            return
+        module = importlib.import_module(f"app.routers.{name}")
+        app.include_router(
+            module.router,
+            prefix=prefix,
+            tags=[name],
+            dependencies=[Depends(get_current_principal)],
+        )
+        # Routes callers reach before they have a token, like sign-up
+        public_router = getattr(module, "public_router", None)
+        if public_router is not None:
+            app.include_router(public_router, prefix=prefix, tags=[name])
+        _loaded.add(name)
+        # Regenerate the schema with the new routes on next request
+        app.openapi_schema = None
+
+
+def include_routers(app: FastAPI) -> None:
+    """Eagerly mount every router"""
+    for name, prefix in ROUTERS:
+        include_router(app, name, prefix)
+
+
+class LazyRouterMiddleware:
+    """Mount each router the first time a request under its prefix arrives
+
+    Used in fast-start mode so that router and service modules are only
+    imported when they are actually needed.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and len(_loaded) < len(ROUTERS):
+            path = scope["path"]
+            fastapi_app = scope["app"]
+            if path.startswith(SCHEMA_PATHS):
+                include_routers(fastapi_app)
+            else:
+                for name, prefix in ROUTERS:
+                    if name not in _loaded and path.startswith(prefix):
+                        include_router(fastapi_app, name, prefix)
+                        break
+        await self.app(scope, receive, send)
@@ -0,0 +1,168 @@
+"""
+Bearer-token authentication
+
+Access tokens are JWTs signed with ``secret_key`` whose ``sub`` is the user
+id, so the caller is known from the token alone, with no users-collection
+read. Verified claims are cached by the token's SHA-256 until the token
+expires (or ``auth_cache_ttl``, if sooner); a repeat request costs one hash
+and one dict lookup instead of an HMAC check and claims parsing.
+
+Every router is mounted behind ``get_current_principal``; routes whose
+``user_id`` names the caller's own data also depend on ``require_self``, and
+group routes on ``require_group_member``. List filters are pinned to the
+caller with ``scope_to_caller``, and routes check documents they load with
+``check_owner``. With auth disabled every check passes.
+"""
+
+import hashlib
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError, jwt
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+_bearer = HTTPBearer(auto_error=False)
+_claims_cache = TTLCache(
+    ttl=settings.auth_cache_ttl, maxsize=settings.auth_cache_size, lru=True
+)
+
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: str
+    expires_at: float
+
+
+def create_access_token(user_id: str, expires_delta: Optional[timedelta] = None) -> str:
+    """Sign an access token for a user"""
+    now = datetime.utcnow()
+    expires = now + (
+        expires_delta or timedelta(minutes=settings.access_token_expire_minutes)
+    )
+    return jwt.encode(
+        {"sub": user_id, "iat": now, "exp": expires},
+        settings.secret_key,
+        algorithm=settings.algorithm,
+    )
+
+
+def verify_token(token: str) -> Principal:
+    """Resolve a token to its principal; raises ValueError if invalid or expired"""
+    key = hashlib.sha256(token.encode()).digest()
+    principal = _claims_cache.get(key)
+    if principal is not None:
+        # The cache entry never outlives the token, but may share its last second
+        if principal.expires_at > time.time():
+            return principal
+        _claims_cache.delete(key)
+
+    try:
+        claims = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    except JWTError as e:
+        raise ValueError(str(e))
+    if not claims.get("sub") or "exp" not in claims:
+        raise ValueError("Token has no subject or expiry")
+
+    principal = Principal(user_id=claims["sub"], expires_at=float(claims["exp"]))
+    ttl = min(principal.expires_at - time.time(), settings.auth_cache_ttl)
+    if ttl > 0:
+        _claims_cache.set(key, principal, ttl=ttl)
+    return principal
+
+
+async def get_current_principal(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> Optional[Principal]:
+    """The authenticated caller; 401 without a valid bearer token"""
+    if not settings.auth_enabled:
+        return None
+    if credentials is None or credentials.scheme.lower() != "bearer":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    try:
+        principal = verify_token(credentials.credentials)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": 'Bearer error="invalid_token"'},
+        )
+    request.state.principal = principal
+    return principal
+
+
+async def require_self(
+    user_id: str, principal: Optional[Principal] = Depends(get_current_principal)
+) -> None:
+    """403 unless the route's ``user_id`` is the caller"""
+    if principal is not None and principal.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to access another user's data",
+        )
+
+
+def is_caller(principal: Optional[Principal], *user_ids: Optional[str]) -> bool:
+    """Whether the caller is one of ``user_ids`` (always, with auth disabled)"""
+    return principal is None or principal.user_id in user_ids
+
+
+def check_owner(principal: Optional[Principal], *user_ids: Optional[str]) -> None:
+    """403 unless the caller is one of ``user_ids``"""
+    if not is_caller(principal, *user_ids):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to access another user's data",
+        )
+
+
+def scope_to_caller(
+    user_id: Optional[str], principal: Optional[Principal]
+) -> Optional[str]:
+    """The ``user_id`` filter for a list route: always the caller's own"""
+    if principal is None:
+        return user_id
+    check_owner(principal, user_id or principal.user_id)
+    return principal.user_id
+
+
+async def is_group_member(principal: Optional[Principal], group_id: str) -> bool:
+    """Whether the caller belongs to a group (always, with auth disabled)"""
+    if principal is None:
+        return True
+    # Imported here so the security module stays cheap to import at startup
+    from app.core.database import get_database
+    from app.services.membership_service import MembershipService
+
+    return await MembershipService(get_database()).is_member(
+        group_id, principal.user_id
+    )
+
+
+async def require_group_member(
+    group_id: str, principal: Optional[Principal] = Depends(get_current_principal)
+) -> None:
+    """403 unless the caller belongs to the route's ``group_id``"""
+    if not await is_group_member(principal, group_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a member of this group",
+        )
+
+
+async def require_admin(
+    principal: Optional[Principal] = Depends(get_current_principal),
+) -> None:
+    """403 unless the caller is listed in ``admin_user_ids``"""
+    if principal is not None and principal.user_id not in settings.admin_user_ids:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admins only")
@@ -0,0 +1,63 @@
+"""
+Production server launcher
+
+Runs the app under gunicorn with uvicorn workers so one box can use all of its
+cores. Each worker imports the app itself and opens its own Mongo client
+through ``lifespan``; the master process never touches the database.
+"""
+
+import multiprocessing
+from typing import Any, Dict
+
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+
+from app.core.config import settings
+
+
+class PaisaSplitWorker(UvicornWorker):
+    """Uvicorn worker pinned to uvloop and httptools"""
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
+
+
+class ProductionServer(BaseApplication):
+    def __init__(self, app_uri: str, options: Dict[str, Any]):
+        self.app_uri = app_uri
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        # Imported in the worker, after fork
+        from app.main import app
+
+        return app
+
+
+def default_worker_count() -> int:
+    return multiprocessing.cpu_count()
+
+
+def run_production(host: str, port: int) -> None:
+    """Serve the app with multiple workers until SIGTERM/SIGINT"""
+    options = {
+        "bind": f"{host}:{port}",
+        "workers": settings.server_workers or default_worker_count(),
+        "worker_class": f"{PaisaSplitWorker.__module__}.{PaisaSplitWorker.__name__}",
+        # SIGTERM stops accepting connections and drains in-flight requests
+        "graceful_timeout": settings.server_graceful_timeout,
+        "timeout": settings.server_worker_timeout,
+        # Recycle workers to cap memory growth; jitter avoids restarting all at once
+        "max_requests": settings.server_max_requests,
+        "max_requests_jitter": settings.server_max_requests_jitter,
+        "keepalive": settings.server_keep_alive,
+        "backlog": settings.server_backlog,
+        "loglevel": "info",
+        "accesslog": "-",
+    }
+    ProductionServer("app.main:app", options).run()
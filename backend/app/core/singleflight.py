@@ -0,0 +1,106 @@
+"""
+Single-flight request coalescing
+
+Concurrent identical reads share one execution: the first caller for a key
+starts the work and everyone arriving while it runs awaits the same task.
+Optionally the result is kept for a few hundred milliseconds so a burst that
+straddles the end of the query is served too.
+
+The shared execution runs detached from whichever caller started it, with
+its own ``request_timeout_read`` budget, so it isn't cut short by that
+caller's deadline or attributed to its profile and request id; each caller
+still stops waiting at its own deadline.
+
+Results are shared between callers, so they must be treated as read-only.
+"""
+
+import asyncio
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.deadline import spawn_detached
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    calls: int = 0
+    executions: int = 0
+    coalesced: int = 0
+    cache_hits: int = 0
+    errors: int = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution"""
+
+    def __init__(self, name: str, ttl: float = 0.0, maxsize: int = 4096):
+        self.name = name
+        self.ttl = ttl
+        self.stats = SingleFlightStats()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._results = TTLCache(ttl=ttl, maxsize=maxsize) if ttl > 0 else None
+        _registry[name] = self
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Return ``fn()``'s result, sharing it with concurrent callers of ``key``"""
+        self.stats.calls += 1
+        if self._results is not None:
+            cached = self._results.get(key)
+            if cached is not None:
+                self.stats.cache_hits += 1
+                return cached[0]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats.executions += 1
+            task = spawn_detached(fn(), timeout=settings.request_timeout_read)
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.stats.coalesced += 1
+
+        # Shielded so one caller going away doesn't cancel the others' result
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        else:
+            # Forgotten while running; its result may predate a write
+            return
+        if task.cancelled() or task.exception() is not None:
+            self.stats.errors += 1
+        elif self._results is not None:
+            # Wrapped so None results are cached too
+            self._results.set(key, (task.result(),))
+
+    def forget(self, key: Hashable) -> None:
+        """Drop the cached result and detach any in-flight call for a key
+
+        Call after a write so later reads don't see data from before it.
+        """
+        self._inflight.pop(key, None)
+        if self._results is not None:
+            self._results.delete(key)
+
+    def forget_if(self, predicate: Callable[[Hashable], bool]) -> None:
+        """``forget`` every key matching the predicate"""
+        for key in [k for k in self._inflight if predicate(k)]:
+            self._inflight.pop(key, None)
+        if self._results is not None:
+            self._results.evict_if(predicate)
+
+
+_registry: Dict[str, SingleFlight] = {}
+
+
+def get_singleflight_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-flight counters for the metrics endpoint"""
+    return {
+        name: {**asdict(flight.stats), "in_flight": len(flight._inflight)}
+        for name, flight in _registry.items()
+    }
@@ -0,0 +1,107 @@
+"""
+Startup profiling report
+
+Imports ``app.main`` in a fresh interpreter with ``-X importtime``, runs the
+app's lifespan up to the point it would serve requests, and prints the
+slowest modules (lifespan imports included) and top-level packages. Exits
+non-zero when the total, import plus lifespan startup, exceeds the target, so
+it can guard startup time in CI. Eager mode waits for MongoDB during startup.
+
+Run with ``python -m app.core.startup_profile [--target-ms 500] [--top 20]``.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from app.core.config import settings
+
+# Times the import and the lifespan up to its yield, as the server does
+_STARTUP_SCRIPT = """
+import asyncio, importlib, time
+start = time.perf_counter()
+module = importlib.import_module({module!r})
+imported = time.perf_counter()
+
+async def startup():
+    async with module.lifespan(module.app):
+        return time.perf_counter()
+
+ready = asyncio.run(startup())
+print((imported - start) * 1000, (ready - imported) * 1000)
+"""
+
+
+def measure_startup(
+    module: str, fast_start: bool
+) -> Tuple[List[Tuple[str, int, int]], float, float]:
+    """Return (module, self_us, cumulative_us) for every import, then the
+    import and lifespan startup wall times in ms"""
+    env = dict(os.environ, FAST_START=str(fast_start))
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            _STARTUP_SCRIPT.format(module=module),
+        ],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    import_ms, lifespan_ms = map(float, proc.stdout.split()[-2:])
+    return rows, import_ms, lifespan_ms
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--target-ms", type=float, default=settings.startup_target_ms)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument(
+        "--eager",
+        action="store_true",
+        help="profile with FAST_START disabled (every router imported)",
+    )
+    args = parser.parse_args()
+
+    rows, import_ms, lifespan_ms = measure_startup(
+        args.module, fast_start=not args.eager
+    )
+    total_ms = import_ms + lifespan_ms
+
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"Slowest modules (cumulative) importing {args.module}:")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: -r[2])[: args.top]:
+        print(
+            f"  {cumulative_us / 1000:9.1f} ms  {self_us / 1000:8.1f} ms self  {name}"
+        )
+
+    print("\nSelf time by top-level package:")
+    for package, self_us in sorted(by_package.items(), key=lambda r: -r[1])[: args.top]:
+        print(f"  {self_us / 1000:9.1f} ms  {package}")
+
+    print(f"\nImport: {import_ms:.1f} ms  lifespan startup: {lifespan_ms:.1f} ms")
+    print(f"Total startup time: {total_ms:.1f} ms (target {args.target_ms:.0f} ms)")
+    return 0 if total_ms <= args.target_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
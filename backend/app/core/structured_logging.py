@@ -0,0 +1,190 @@
+"""
+Non-blocking structured logging
+
+Log calls on the event loop only stamp the record with the request's
+correlation id and put it on a bounded queue; a listener thread formats it
+(as one JSON object per line, or plain text in development) and writes it.
+When the queue is full the record is dropped and counted instead of waiting,
+so logging can never stall request handling. INFO and below from the
+high-volume loggers in ``log_sampled_loggers`` (access logs by default) are
+kept at ``log_info_sample_rate``.
+
+Correlation ids come from the client's ``X-Request-ID`` header, or are
+generated, and are echoed back on the response.
+"""
+
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "request_id", default=None
+)
+
+# Attributes every LogRecord has; anything else was passed with ``extra=``
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "request_id"}
+
+
+@dataclass
+class LoggingStats:
+    enqueued: int = 0
+    dropped: int = 0
+    sampled_out: int = 0
+
+
+_stats = LoggingStats()
+_queue: Optional[queue.Queue] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def get_logging_stats() -> Dict[str, Any]:
+    """Queue counters for the metrics endpoint"""
+    return {
+        **asdict(_stats),
+        "queued": _queue.qsize() if _queue is not None else 0,
+        "capacity": settings.log_queue_size,
+    }
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, with any ``extra=`` fields included"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _SamplingFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        if (
+            record.levelno <= logging.INFO
+            and record.name in settings.log_sampled_loggers
+            and random.random() >= settings.log_info_sample_rate
+        ):
+            _stats.sampled_out += 1
+            return False
+        return True
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues without waiting, leaving formatting to the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Runs on the caller's thread: capture the context and freeze the
+        # arguments, which may be mutated once the call returns. Tracebacks
+        # are formatted by the listener.
+        record = copy.copy(record)
+        record.request_id = _request_id.get()
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+            _stats.enqueued += 1
+        except queue.Full:
+            _stats.dropped += 1
+
+
+def setup_logging() -> None:
+    """Route all logging, uvicorn's included, through the queue"""
+    global _queue, _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    if settings.log_format == "json":
+        output.setFormatter(JSONFormatter())
+    else:
+        output.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+
+    _queue = queue.Queue(maxsize=settings.log_queue_size)
+    handler = _NonBlockingQueueHandler(_queue)
+    handler.addFilter(_SamplingFilter())
+    _listener = logging.handlers.QueueListener(_queue, output)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(settings.log_level.upper())
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access", "gunicorn.error"):
+        logger = logging.getLogger(name)
+        logger.handlers = []
+        logger.propagate = True
+
+
+def shutdown_logging() -> None:
+    """Write out whatever is still queued and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestIdMiddleware:
+    """Gives each request a correlation id and returns it as ``X-Request-ID``"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope["headers"]:
+            if key == REQUEST_ID_HEADER:
+                # Client-supplied ids are trusted only as far as their length
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = _request_id.set(request_id)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER, request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _request_id.reset(token)
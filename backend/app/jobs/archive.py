@@ -0,0 +1,281 @@
+"""
+Move cold transactions and activities into archive collections
+
+Settled/cancelled transactions and activities older than the configured age
+are copied to ``<collection>_archive`` and removed from the hot collection
+only if unchanged since they were read; copies of documents that were edited
+or deleted meanwhile are dropped, and the rest are folded into monthly
+rollups. Copies stay marked ``rolled_up: False`` until rolled up, so an
+interrupted run is finished by the next one and nothing is rolled up twice.
+
+Run with ``python -m app.jobs.archive``.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Set
+
+from bson.int64 import Int64
+from pymongo import DeleteOne, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.archive import ARCHIVE_COLLECTIONS, set_archive_cutoff
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection, get_database
+from app.core.money import to_minor
+from app.models import Currency, TransactionStatus
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+def _transaction_rollup_key(doc: Dict[str, Any]) -> Dict[str, Any]:
+    created_at = doc["created_at"]
+    return {
+        "user_id": doc["user_id"],
+        "group_id": doc.get("group_id"),
+        "year": created_at.year,
+        "month": created_at.month,
+        "currency": doc.get("currency"),
+        "status": doc.get("status"),
+    }
+
+
+def _activity_rollup_key(doc: Dict[str, Any]) -> Dict[str, Any]:
+    timestamp = doc["timestamp"]
+    return {
+        "created_by": doc["created_by"],
+        "group_id": doc.get("group_id"),
+        "year": timestamp.year,
+        "month": timestamp.month,
+        "type": doc.get("type"),
+        "currency": doc.get("currency"),
+    }
+
+
+async def _present_ids(collection, ids: List[Any]) -> Set[Any]:
+    return {
+        doc["_id"] async for doc in collection.find({"_id": {"$in": ids}}, {"_id": 1})
+    }
+
+
+async def _roll_up(
+    database: AsyncIOMotorDatabase,
+    archive,
+    ids: List[Any],
+    rollup_collection: str,
+    rollup_key: Callable[[Dict[str, Any]], Dict[str, Any]],
+) -> None:
+    """Fold archived copies not yet rolled up into the rollups"""
+    pending = await archive.find({"_id": {"$in": ids}, "rolled_up": False}).to_list(
+        length=None
+    )
+
+    rollups: Dict[tuple, Dict[str, Any]] = {}
+    for doc in pending:
+        key = rollup_key(doc)
+        entry = rollups.setdefault(
+            tuple(key.values()), {"key": key, "count": 0, "amount": 0}
+        )
+        entry["count"] += 1
+        # Rollups hold int64 minor units; legacy doubles are converted first
+        amount = doc.get("amount", 0)
+        if isinstance(amount, float):
+            amount = to_minor(amount, doc.get("currency") or Currency.INR)
+        entry["amount"] += amount
+
+    if rollups:
+        await database[rollup_collection].bulk_write(
+            [
+                UpdateOne(
+                    {"_id": entry["key"]},
+                    {
+                        "$inc": {
+                            "count": entry["count"],
+                            "amount": Int64(entry["amount"]),
+                        }
+                    },
+                    upsert=True,
+                )
+                for entry in rollups.values()
+            ],
+            ordered=False,
+        )
+        await archive.update_many(
+            {"_id": {"$in": [doc["_id"] for doc in pending]}},
+            {"$set": {"rolled_up": True}},
+        )
+
+
+async def _archive_batch(
+    database: AsyncIOMotorDatabase,
+    collection_name: str,
+    filter_dict: Dict[str, Any],
+    docs: List[Dict[str, Any]],
+    rollup_collection: str,
+    rollup_key: Callable[[Dict[str, Any]], Dict[str, Any]],
+) -> int:
+    hot = database[collection_name]
+    archive = database[ARCHIVE_COLLECTIONS[collection_name]]
+    ids = [doc["_id"] for doc in docs]
+
+    # Copies stay pending (``rolled_up: False``) until the hot document is gone
+    try:
+        await archive.bulk_write(
+            [
+                ReplaceOne(
+                    {"_id": doc["_id"], "rolled_up": {"$ne": True}},
+                    {**doc, "rolled_up": False},
+                    upsert=True,
+                )
+                for doc in docs
+            ],
+            ordered=False,
+        )
+    except BulkWriteError as e:
+        # Already rolled up by an older run; anything else is a real failure
+        if any(err["code"] != DUPLICATE_KEY_ERROR for err in e.details["writeErrors"]):
+            raise
+
+    # A user delete that ran before the copy landed left nothing to remove it;
+    # later ones remove the pending copy themselves
+    present = await _present_ids(hot, ids)
+    deleted = 0
+    if present:
+        # Only documents unchanged since they were read, so a racing edit wins
+        result = await hot.bulk_write(
+            [
+                DeleteOne(
+                    {
+                        **filter_dict,
+                        "_id": doc["_id"],
+                        "updated_at": doc.get("updated_at"),
+                    }
+                )
+                for doc in docs
+                if doc["_id"] in present
+            ],
+            ordered=False,
+        )
+        deleted = result.deleted_count
+
+    stale = (set(ids) - present) | await _present_ids(hot, list(present))
+    if stale:
+        await archive.delete_many({"_id": {"$in": list(stale)}, "rolled_up": False})
+    await _roll_up(database, archive, ids, rollup_collection, rollup_key)
+    return deleted
+
+
+async def _finish_interrupted(
+    database: AsyncIOMotorDatabase,
+    collection_name: str,
+    rollup_collection: str,
+    rollup_key: Callable[[Dict[str, Any]], Dict[str, Any]],
+) -> None:
+    """Settle copies an interrupted run left pending"""
+    archive = database[ARCHIVE_COLLECTIONS[collection_name]]
+    ids = [doc["_id"] async for doc in archive.find({"rolled_up": False}, {"_id": 1})]
+    if not ids:
+        return
+    # Still hot: dropped, and copied afresh below if they still qualify
+    present = await _present_ids(database[collection_name], ids)
+    if present:
+        await archive.delete_many({"_id": {"$in": list(present)}, "rolled_up": False})
+    await _roll_up(database, archive, ids, rollup_collection, rollup_key)
+
+
+async def archive_collection(
+    database: AsyncIOMotorDatabase,
+    collection_name: str,
+    filter_dict: Dict[str, Any],
+    cutoff: datetime,
+    rollup_collection: str,
+    rollup_key: Callable[[Dict[str, Any]], Dict[str, Any]],
+    batch_size: int,
+) -> int:
+    """Archive every document matching the filter, one batch at a time"""
+    await _finish_interrupted(database, collection_name, rollup_collection, rollup_key)
+
+    archived = 0
+    last_id = None
+    while True:
+        # Documents an edit kept in the hot collection are passed over
+        batch_filter = dict(filter_dict)
+        if last_id is not None:
+            batch_filter["_id"] = {"$gt": last_id}
+        docs = (
+            await database[collection_name]
+            .find(batch_filter)
+            .sort("_id", 1)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not docs:
+            break
+        last_id = docs[-1]["_id"]
+        archived += await _archive_batch(
+            database,
+            collection_name,
+            filter_dict,
+            docs,
+            rollup_collection,
+            rollup_key,
+        )
+
+    # Advance the watermark only once everything below it has moved
+    await set_archive_cutoff(database, collection_name, cutoff)
+    logger.info(f"Archived {archived} documents from {collection_name}")
+    return archived
+
+
+async def run_archival(database: AsyncIOMotorDatabase) -> Dict[str, int]:
+    """Archive cold transactions and activities"""
+    now = datetime.utcnow()
+    batch_size = settings.archive_batch_size
+
+    transactions_cutoff = now - timedelta(days=settings.archive_transactions_after_days)
+    activities_cutoff = now - timedelta(days=settings.archive_activities_after_days)
+
+    transactions = await archive_collection(
+        database,
+        "transactions",
+        {
+            "status": {
+                "$in": [
+                    TransactionStatus.SETTLED.value,
+                    TransactionStatus.CANCELLED.value,
+                ]
+            },
+            "created_at": {"$lt": transactions_cutoff},
+        },
+        transactions_cutoff,
+        "transaction_rollups",
+        _transaction_rollup_key,
+        batch_size,
+    )
+    activities = await archive_collection(
+        database,
+        "activities",
+        {"timestamp": {"$lt": activities_cutoff}},
+        activities_cutoff,
+        "activity_rollups",
+        _activity_rollup_key,
+        batch_size,
+    )
+    return {"transactions": transactions, "activities": activities}
+
+
+async def main():
+    await connect_to_mongo()
+    try:
+        await run_archival(get_database())
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
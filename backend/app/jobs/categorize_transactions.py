@@ -0,0 +1,121 @@
+"""
+Categorize existing transactions, archived ones included
+
+Transactions without a category are read in ``_id`` order in batches of
+``categorize_batch_size`` (just the fields the categorizer needs), each
+batch is categorized in one pass with one overrides query, and the results
+are written with one unordered bulk write while the next batch is read.
+With ``--recategorize``, categories set by an override or the model are
+recomputed too, e.g. after the keyword list changes; ones users chose are
+never touched. Safe to stop and re-run: written documents no longer match.
+
+Run with ``python -m app.jobs.categorize_transactions``.
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.archive import ARCHIVE_COLLECTIONS
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection, get_database
+from app.services.category_service import AUTO_SOURCES, CategoryService
+
+logger = logging.getLogger(__name__)
+
+_FIELDS = {"user_id": 1, "title": 1, "category": 1, "category_source": 1}
+
+
+async def _write(collection, docs: List[Dict[str, Any]]) -> None:
+    await collection.bulk_write(
+        [
+            UpdateOne(
+                {"_id": doc["_id"]},
+                {
+                    "$set": {
+                        "category": doc["category"],
+                        "category_source": doc["category_source"],
+                    }
+                },
+            )
+            for doc in docs
+        ],
+        ordered=False,
+    )
+
+
+async def categorize_collection(
+    database: AsyncIOMotorDatabase,
+    collection_name: str,
+    batch_size: int,
+    recategorize: bool = False,
+) -> int:
+    """Categorize one collection; returns the documents written"""
+    collection = database[collection_name]
+    categories = CategoryService(database)
+    needs_category: Dict[str, Any] = {"category": {"$in": [None, ""]}}
+    if recategorize:
+        needs_category = {
+            "$or": [needs_category, {"category_source": {"$in": list(AUTO_SOURCES)}}]
+        }
+
+    written = 0
+    last_id = None
+    pending_write: Optional[asyncio.Task] = None
+    started = time.monotonic()
+    while True:
+        filter_dict = dict(needs_category)
+        if last_id is not None:
+            filter_dict["_id"] = {"$gt": last_id}
+        docs = (
+            await collection.find(filter_dict, _FIELDS)
+            .sort("_id", 1)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if pending_write:
+            await pending_write
+            pending_write = None
+        if not docs:
+            break
+
+        last_id = docs[-1]["_id"]
+        await categories.categorize(docs, recategorize=recategorize)
+        # Written while the next batch is read
+        pending_write = asyncio.create_task(_write(collection, docs))
+        written += len(docs)
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"{collection_name}: {written} categorized "
+            f"({written / elapsed if elapsed else 0:.0f}/s)"
+        )
+    return written
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--batch-size", type=int, default=settings.categorize_batch_size
+    )
+    parser.add_argument("--recategorize", action="store_true")
+    args = parser.parse_args()
+
+    await connect_to_mongo()
+    try:
+        for name in ("transactions", ARCHIVE_COLLECTIONS["transactions"]):
+            count = await categorize_collection(
+                get_database(), name, args.batch_size, recategorize=args.recategorize
+            )
+            logger.info(f"Categorized {count} documents in {name}")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
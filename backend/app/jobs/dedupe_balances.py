@@ -0,0 +1,44 @@
+"""
+Merge duplicate balances and make them unique per (user, currency)
+
+Balance changes are upserted on (user_id, currency), which needs a unique
+index, but older data can hold several documents for a pair. Each pair's
+extra documents are folded into its oldest one, then the old non-unique
+index is replaced by the unique one. Safe to run again; if writes create a
+new duplicate before the index is built, run it again.
+
+Run with ``python -m app.jobs.dedupe_balances``.
+"""
+
+import asyncio
+import logging
+
+from app.core.database import connect_to_mongo, close_mongo_connection, get_database
+from app.services.balance_service import BalanceService
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "user_id_1_currency_1"
+
+
+async def main():
+    await connect_to_mongo()
+    try:
+        database = get_database()
+        merged = await BalanceService(database).merge_duplicates()
+        logger.info(f"Merged {merged} duplicate balances")
+
+        indexes = await database.balances.index_information()
+        if INDEX_NAME in indexes and not indexes[INDEX_NAME].get("unique"):
+            await database.balances.drop_index(INDEX_NAME)
+        await database.balances.create_index(
+            [("user_id", 1), ("currency", 1)], unique=True
+        )
+        logger.info("Balances are unique per (user_id, currency)")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,28 @@
+"""
+Issue an access token for a user
+
+For local development, scripts and benchmarks: prints a bearer token for the
+given user id, signed with the configured ``SECRET_KEY``.
+
+Run with ``python -m app.jobs.issue_token <user_id> [--minutes N]``.
+"""
+
+import argparse
+from datetime import timedelta
+
+from app.core.config import settings
+from app.core.security import create_access_token
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("user_id")
+    parser.add_argument(
+        "--minutes", type=int, default=settings.access_token_expire_minutes
+    )
+    args = parser.parse_args()
+    print(create_access_token(args.user_id, timedelta(minutes=args.minutes)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Convert stored amounts from major-unit doubles to int64 minor units
+
+Walks every collection listed in ``app.core.money.MONEY_FIELDS`` (plus the
+archive rollups) and rewrites documents that still hold doubles. Converted
+values are ints, so the job is idempotent and can be re-run or resumed at any
+time. Run it before serving traffic with this version: ``$inc`` on a
+not-yet-migrated balance would mix units.
+
+Run with ``python -m app.jobs.migrate_money``.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict
+
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection, get_database
+from app.core.money import MONEY_FIELDS, encode_amounts, to_minor
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLLECTIONS = ("transaction_rollups", "activity_rollups")
+
+
+def _legacy_filter(collection_name: str) -> Dict[str, Any]:
+    return {
+        "$or": [{path: {"$type": "double"}} for path in MONEY_FIELDS[collection_name]]
+    }
+
+
+async def migrate_collection(
+    database: AsyncIOMotorDatabase, collection_name: str, batch_size: int
+) -> int:
+    """Rewrite every legacy document in a collection, batch by batch"""
+    collection = database[collection_name]
+    fields = {path.split(".")[0] for path in MONEY_FIELDS[collection_name]}
+    # Embedded arrays are projected whole so each item keeps its currency
+    projection = {field: 1 for field in fields}
+    projection["currency"] = 1
+
+    migrated = 0
+    last_id = None
+    while True:
+        filter_dict = _legacy_filter(collection_name)
+        if last_id is not None:
+            filter_dict["_id"] = {"$gt": last_id}
+        docs = (
+            await collection.find(filter_dict, projection)
+            .sort("_id", 1)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not docs:
+            break
+        last_id = docs[-1]["_id"]
+
+        operations = []
+        for doc in docs:
+            original = {field: doc.get(field) for field in fields}
+            encode_amounts(doc, collection_name)
+            operations.append(
+                UpdateOne(
+                    # Guard against a concurrent write changing the values
+                    {"_id": doc["_id"], **original},
+                    {"$set": {field: doc[field] for field in fields if field in doc}},
+                )
+            )
+        result = await collection.bulk_write(operations, ordered=False)
+        migrated += result.modified_count
+
+    logger.info(f"Migrated {migrated} documents in {collection_name}")
+    return migrated
+
+
+async def migrate_rollups(
+    database: AsyncIOMotorDatabase, collection_name: str, batch_size: int
+) -> int:
+    """Rollups keep their currency inside the compound _id"""
+    collection = database[collection_name]
+    migrated = 0
+    last_id = None
+    while True:
+        filter_dict: Dict[str, Any] = {"amount": {"$type": "double"}}
+        if last_id is not None:
+            filter_dict["_id"] = {"$gt": last_id}
+        docs = (
+            await collection.find(filter_dict)
+            .sort("_id", 1)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not docs:
+            break
+        last_id = docs[-1]["_id"]
+
+        result = await collection.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": doc["_id"], "amount": doc["amount"]},
+                    {
+                        "$set": {
+                            "amount": to_minor(doc["amount"], doc["_id"]["currency"])
+                        }
+                    },
+                )
+                for doc in docs
+            ],
+            ordered=False,
+        )
+        migrated += result.modified_count
+
+    logger.info(f"Migrated {migrated} documents in {collection_name}")
+    return migrated
+
+
+async def run_migration(database: AsyncIOMotorDatabase) -> Dict[str, int]:
+    batch_size = settings.archive_batch_size
+    counts = {}
+    for collection_name in MONEY_FIELDS:
+        counts[collection_name] = await migrate_collection(
+            database, collection_name, batch_size
+        )
+    for collection_name in ROLLUP_COLLECTIONS:
+        counts[collection_name] = await migrate_rollups(
+            database, collection_name, batch_size
+        )
+    return counts
+
+
+async def main():
+    await connect_to_mongo()
+    try:
+        await run_migration(get_database())
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+"""
+Rebuild the pairwise debt ledger from every stored transaction
+
+Needed once to backfill ``pair_ledger`` for existing transactions (hot and
+archived), and safe to run again if the ledger is suspected to have drifted.
+The new ledger is built in a side collection and swapped in with a rename;
+transactions written while the job runs are not reflected, so run it while
+writes are paused. Amounts must already be in minor units
+(``app.jobs.migrate_money``).
+
+Run with ``python -m app.jobs.rebuild_ledger``.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Tuple
+
+from bson.int64 import Int64
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.archive import ARCHIVE_COLLECTIONS
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection, get_database
+from app.models import TransactionStatus
+from app.services.transaction_service import transaction_pair_effects
+
+logger = logging.getLogger(__name__)
+
+EFFECT_PROJECTION = {
+    "user_id": 1,
+    "participants": 1,
+    "amount": 1,
+    "currency": 1,
+    "type": 1,
+    "status": 1,
+}
+
+
+async def rebuild_ledger(database: AsyncIOMotorDatabase) -> int:
+    """Recompute every pair balance and replace the ledger; returns pair count"""
+    totals: Dict[Tuple[str, str, str], int] = defaultdict(int)
+    for collection_name in ("transactions", ARCHIVE_COLLECTIONS["transactions"]):
+        cursor = database[collection_name].find(
+            {"status": {"$ne": TransactionStatus.CANCELLED}},
+            EFFECT_PROJECTION,
+            batch_size=settings.archive_batch_size,
+        )
+        async for doc in cursor:
+            for (user_a, user_b), delta in transaction_pair_effects(doc).items():
+                totals[(user_a, user_b, doc["currency"])] += delta
+
+    now = datetime.utcnow()
+    staging = database.pair_ledger_rebuild
+    await staging.drop()
+    entries = [
+        {
+            "user_a": user_a,
+            "user_b": user_b,
+            "currency": currency,
+            "users": [user_a, user_b],
+            "amount": Int64(amount),
+            "created_at": now,
+            "updated_at": now,
+        }
+        for (user_a, user_b, currency), amount in totals.items()
+    ]
+    for start in range(0, len(entries), settings.archive_batch_size):
+        await staging.insert_many(
+            entries[start : start + settings.archive_batch_size], ordered=False
+        )
+    await staging.create_index(
+        [("user_a", 1), ("user_b", 1), ("currency", 1)], unique=True
+    )
+    await staging.create_index("users")
+    if entries:
+        await staging.rename("pair_ledger", dropTarget=True)
+    else:
+        await database.pair_ledger.delete_many({})
+    return len(entries)
+
+
+async def main():
+    await connect_to_mongo()
+    try:
+        count = await rebuild_ledger(get_database())
+        logger.info(f"Rebuilt pair ledger with {count} pairs")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,30 @@
+"""
+Rebuild the user -> groups membership index from the groups collection
+
+Needed once to backfill ``group_memberships`` for existing groups, and safe to
+run again whenever the index is suspected to have drifted.
+
+Run with ``python -m app.jobs.rebuild_memberships``.
+"""
+
+import asyncio
+import logging
+
+from app.core.database import connect_to_mongo, close_mongo_connection, get_database
+from app.services.membership_service import MembershipService
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    await connect_to_mongo()
+    try:
+        count = await MembershipService(get_database()).rebuild()
+        logger.info(f"Rebuilt group memberships for {count} users")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
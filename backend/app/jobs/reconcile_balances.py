@@ -0,0 +1,505 @@
+"""
+Reconcile stored balances against the transaction history
+
+Balances and group member balances are maintained by deltas, so a lost or
+doubled write leaves them wrong for good. This job recomputes what they
+should be and reports (and with ``--repair`` fixes) any drift:
+
+- ``balances``: per (user, currency), the effects of every non-cancelled
+  transaction, hot and archived, plus opening/manual/closing entries from the
+  balance event log
+- ``groups``: per member, the effects of the group's transactions, summed
+  across currencies as ``_apply_effects`` does, and the group's split total
+
+Users (or groups) are streamed in id order and cut into chunks; a bounded pool
+of workers recomputes each chunk with one server-side aggregation, pausing
+between chunks so the API keeps its share of the database. Drift is checked
+twice, a pause apart, and only drift that holds still is repaired, so writes
+racing the check aren't mistaken for it. Repairs are ``$inc`` by the
+difference, through the same paths as normal balance updates.
+
+Progress is recorded after every contiguous run of finished chunks, and
+``--resume`` continues an interrupted run from there.
+
+Balances edited by hand before the balance event log existed have no
+opening/manual events and show up as drift; review the report before
+repairing for the first time.
+
+Run with ``python -m app.jobs.reconcile_balances [--repair] [--resume]
+[--scope balances|groups|all] [--workers N] [--chunk-size N] [--pause S]``.
+"""
+
+import argparse
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.int64 import Int64
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.archive import ARCHIVE_COLLECTIONS
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection, get_database
+from app.core.money import minor_units
+from app.models import TransactionStatus, TransactionType
+from app.services.balance_service import BalanceService
+from app.services.group_counter_service import COUNTER_FIELDS, GroupCounterService
+from app.services.group_service import GroupService
+
+logger = logging.getLogger(__name__)
+
+# Balance events that don't come from transactions
+NON_TRANSACTION_SOURCES = ["opening", "manual", "closing"]
+
+Drift = Dict[Tuple[Any, ...], Tuple[int, int]]
+
+
+@dataclass
+class ReconcileReport:
+    scope: str
+    chunks: int = 0
+    checked: int = 0
+    drifted: int = 0
+    repaired: int = 0
+    unrepairable: int = 0
+
+
+def _share(index: Any) -> Dict[str, Any]:
+    # split_minor: the first ``remainder`` shares get one extra minor unit
+    return {"$add": ["$base", {"$cond": [{"$lt": [index, "$remainder"]}, 1, 0]}]}
+
+
+def _effect_stages() -> List[Dict[str, Any]]:
+    """Unwind each transaction into per-user ``effects`` rows
+
+    Mirrors ``transaction_debts``: participants are de-duplicated in order and
+    the payer removed, and shares follow ``split_minor``, the remainder going
+    to the first shares (for a split, the payer's own share is the first).
+    """
+    is_split = {"$eq": ["$type", TransactionType.SPLIT.value]}
+    return [
+        {
+            "$project": {
+                "user_id": 1,
+                "group_id": 1,
+                "currency": 1,
+                "type": 1,
+                "amount": 1,
+                "others": {
+                    "$filter": {
+                        "input": {
+                            "$reduce": {
+                                "input": {"$ifNull": ["$participants", []]},
+                                "initialValue": [],
+                                "in": {
+                                    "$cond": [
+                                        {"$in": ["$$this", "$$value"]},
+                                        "$$value",
+                                        {"$concatArrays": ["$$value", ["$$this"]]},
+                                    ]
+                                },
+                            }
+                        },
+                        "cond": {"$ne": ["$$this", "$user_id"]},
+                    }
+                },
+            }
+        },
+        {"$match": {"others.0": {"$exists": True}}},
+        {
+            "$set": {
+                "offset": {"$cond": [is_split, 1, 0]},
+                "parts": {"$add": [{"$size": "$others"}, {"$cond": [is_split, 1, 0]}]},
+            }
+        },
+        {
+            "$set": {
+                "base": {"$toLong": {"$floor": {"$divide": ["$amount", "$parts"]}}},
+                "remainder": {"$mod": ["$amount", "$parts"]},
+            }
+        },
+        {
+            "$set": {
+                "effects": {
+                    "$concatArrays": [
+                        {
+                            "$map": {
+                                "input": {"$range": [0, {"$size": "$others"}]},
+                                "as": "i",
+                                "in": {
+                                    "user_id": {"$arrayElemAt": ["$others", "$$i"]},
+                                    "delta": {
+                                        "$subtract": [
+                                            0,
+                                            _share({"$add": ["$$i", "$offset"]}),
+                                        ]
+                                    },
+                                    "payer": False,
+                                },
+                            }
+                        },
+                        [
+                            {
+                                "user_id": "$user_id",
+                                "delta": {
+                                    "$subtract": [
+                                        "$amount",
+                                        {"$cond": [is_split, _share(0), 0]},
+                                    ]
+                                },
+                                "payer": True,
+                            }
+                        ],
+                    ]
+                }
+            }
+        },
+        {"$unwind": "$effects"},
+    ]
+
+
+def _with_archive(
+    match: Dict[str, Any], stages: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    per_collection = [{"$match": match}, *_effect_stages(), *stages]
+    return [
+        *per_collection,
+        {
+            "$unionWith": {
+                "coll": ARCHIVE_COLLECTIONS["transactions"],
+                "pipeline": per_collection,
+            }
+        },
+    ]
+
+
+async def _balance_drift(database: AsyncIOMotorDatabase, user_ids: List[str]) -> Drift:
+    expected: Dict[Tuple[str, str], int] = defaultdict(int)
+    pipeline = _with_archive(
+        {
+            "status": {"$ne": TransactionStatus.CANCELLED.value},
+            "$or": [
+                {"user_id": {"$in": user_ids}},
+                {"participants": {"$in": user_ids}},
+            ],
+        },
+        [{"$match": {"effects.user_id": {"$in": user_ids}}}],
+    ) + [
+        {
+            "$group": {
+                "_id": {"user_id": "$effects.user_id", "currency": "$currency"},
+                "amount": {"$sum": "$effects.delta"},
+            }
+        }
+    ]
+    async for row in database.transactions.aggregate(pipeline, allowDiskUse=True):
+        expected[(row["_id"]["user_id"], row["_id"]["currency"])] += row["amount"]
+
+    async for row in database.balance_events.aggregate(
+        [
+            {
+                "$match": {
+                    "user_id": {"$in": user_ids},
+                    "source": {"$in": NON_TRANSACTION_SOURCES},
+                }
+            },
+            {
+                "$group": {
+                    "_id": {"user_id": "$user_id", "currency": "$currency"},
+                    "amount": {"$sum": "$delta"},
+                }
+            },
+        ]
+    ):
+        expected[(row["_id"]["user_id"], row["_id"]["currency"])] += row["amount"]
+
+    actual: Dict[Tuple[str, str], int] = defaultdict(int)
+    async for row in database.balances.aggregate(
+        [
+            {"$match": {"user_id": {"$in": user_ids}}},
+            {
+                "$group": {
+                    "_id": {"user_id": "$user_id", "currency": "$currency"},
+                    "amount": {"$sum": minor_units()},
+                }
+            },
+        ]
+    ):
+        actual[(row["_id"]["user_id"], row["_id"]["currency"])] += row["amount"]
+
+    return {
+        key: (expected.get(key, 0), actual.get(key, 0))
+        for key in expected.keys() | actual.keys()
+        if expected.get(key, 0) != actual.get(key, 0)
+    }
+
+
+async def _group_drift(database: AsyncIOMotorDatabase, group_ids: List[str]) -> Drift:
+    pipeline = _with_archive(
+        {
+            "status": {"$ne": TransactionStatus.CANCELLED.value},
+            "group_id": {"$in": group_ids},
+        },
+        [],
+    ) + [
+        {
+            "$facet": {
+                "members": [
+                    {
+                        "$group": {
+                            "_id": {
+                                "group_id": "$group_id",
+                                "user_id": "$effects.user_id",
+                            },
+                            "amount": {"$sum": "$effects.delta"},
+                        }
+                    }
+                ],
+                "totals": [
+                    {
+                        "$match": {
+                            "effects.payer": True,
+                            "type": TransactionType.SPLIT.value,
+                        }
+                    },
+                    {"$group": {"_id": "$group_id", "amount": {"$sum": minor_units()}}},
+                ],
+            }
+        }
+    ]
+    # Keys are (group_id, user_id), with user_id None for the expense total
+    expected: Dict[Tuple[str, Optional[str]], int] = {}
+    async for result in database.transactions.aggregate(pipeline, allowDiskUse=True):
+        for row in result["members"]:
+            expected[(row["_id"]["group_id"], row["_id"]["user_id"])] = row["amount"]
+        for row in result["totals"]:
+            expected[(row["_id"], None)] = row["amount"]
+
+    actual: Dict[Tuple[str, Optional[str]], int] = {}
+    cursor = database.groups.find(
+        {"_id": {"$in": [ObjectId(g) for g in group_ids]}},
+        {
+            "total_expenses": 1,
+            "members.user_id": 1,
+            "members.balance": 1,
+            **COUNTER_FIELDS,
+        },
+    )
+    group_docs = await cursor.to_list(length=None)
+    # Counts still in shards are part of the group's totals
+    await GroupCounterService(database).merge_shards(group_docs, cached=False)
+    for group_doc in group_docs:
+        group_id = str(group_doc["_id"])
+        actual[(group_id, None)] = group_doc.get("total_expenses", 0)
+        for member in group_doc.get("members", []):
+            actual[(group_id, member["user_id"])] = member.get("balance", 0)
+
+    return {
+        key: (expected.get(key, 0), actual.get(key))
+        for key in expected.keys() | actual.keys()
+        if expected.get(key, 0) != actual.get(key, 0)
+    }
+
+
+async def _repair_balances(database: AsyncIOMotorDatabase, drift: Drift) -> int:
+    deltas = {key: expected - actual for key, (expected, actual) in drift.items()}
+    await BalanceService(database).apply_balance_deltas(deltas, source="reconcile")
+    return len(deltas)
+
+
+async def _repair_groups(database: AsyncIOMotorDatabase, drift: Drift) -> int:
+    by_group: Dict[str, Dict[Optional[str], int]] = defaultdict(dict)
+    repaired = 0
+    for (group_id, user_id), (expected, actual) in drift.items():
+        # A member that has effects but is no longer in the group can't be fixed
+        if actual is not None:
+            by_group[group_id][user_id] = expected - actual
+            repaired += 1
+
+    operations = []
+    for group_id, changes in by_group.items():
+        inc = {"total_expenses": Int64(changes.pop(None, 0))}
+        array_filters = []
+        for index, (user_id, delta) in enumerate(changes.items()):
+            inc[f"members.$[m{index}].balance"] = Int64(delta)
+            array_filters.append({f"m{index}.user_id": user_id})
+        operations.append(
+            UpdateOne(
+                {"_id": ObjectId(group_id)},
+                {"$inc": inc, "$set": {"updated_at": datetime.utcnow()}},
+                array_filters=array_filters or None,
+            )
+        )
+    if operations:
+        await database.groups.bulk_write(operations, ordered=False)
+        GroupService.forget_balance_summaries(by_group)
+    return repaired
+
+
+SCOPES = {
+    "balances": (_balance_drift, _repair_balances),
+    "groups": (_group_drift, _repair_groups),
+}
+
+
+async def _keys(
+    database: AsyncIOMotorDatabase, scope: str, after: Optional[str]
+) -> AsyncIterator[str]:
+    if scope == "balances":
+        pipeline: List[Dict[str, Any]] = [
+            {"$group": {"_id": "$user_id"}},
+            {"$sort": {"_id": 1}},
+        ]
+        if after is not None:
+            pipeline.append({"$match": {"_id": {"$gt": after}}})
+        async for row in database.balances.aggregate(pipeline, allowDiskUse=True):
+            yield row["_id"]
+    else:
+        filter_dict = {"_id": {"$gt": ObjectId(after)}} if after else {}
+        async for group_doc in database.groups.find(filter_dict, {"_id": 1}).sort(
+            "_id", 1
+        ):
+            yield str(group_doc["_id"])
+
+
+async def reconcile(
+    database: AsyncIOMotorDatabase,
+    scope: str,
+    repair: bool = False,
+    resume: bool = False,
+    workers: int = 4,
+    chunk_size: int = 500,
+    pause: float = 0.2,
+) -> ReconcileReport:
+    """Check (and optionally repair) one scope, chunk by chunk"""
+    compute, fix = SCOPES[scope]
+    report = ReconcileReport(scope=scope)
+    state = database.reconcile_state
+
+    after = None
+    if resume:
+        state_doc = await state.find_one({"_id": scope})
+        after = state_doc and state_doc.get("after")
+        if after:
+            logger.info(f"Resuming {scope} reconciliation after {after}")
+    else:
+        await state.delete_one({"_id": scope})
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+    last_keys: Dict[int, str] = {}
+    finished: set = set()
+    watermark = -1
+
+    async def record_progress(index: int) -> None:
+        nonlocal watermark
+        finished.add(index)
+        advanced = False
+        while watermark + 1 in finished:
+            watermark += 1
+            finished.discard(watermark)
+            advanced = True
+        if advanced:
+            await state.update_one(
+                {"_id": scope},
+                {
+                    "$set": {
+                        "after": last_keys.pop(watermark),
+                        "updated_at": datetime.utcnow(),
+                    }
+                },
+                upsert=True,
+            )
+
+    async def worker() -> None:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            index, keys = item
+            drift = await compute(database, keys)
+            if drift:
+                # Only drift that survives a second look is real
+                await asyncio.sleep(pause)
+                again = await compute(database, keys)
+                drift = {k: v for k, v in drift.items() if again.get(k) == v}
+
+            report.checked += len(keys)
+            report.drifted += len(drift)
+            for key, (expected, actual) in sorted(drift.items(), key=str):
+                logger.warning(
+                    f"{scope} drift {key}: expected {expected}, stored {actual}"
+                )
+                if actual is None:
+                    report.unrepairable += 1
+            if repair and drift:
+                report.repaired += await fix(database, drift)
+
+            await record_progress(index)
+            await asyncio.sleep(pause)
+
+    async def produce() -> None:
+        chunk: List[str] = []
+        async for key in _keys(database, scope, after):
+            chunk.append(key)
+            if len(chunk) >= chunk_size:
+                last_keys[report.chunks] = chunk[-1]
+                await queue.put((report.chunks, chunk))
+                report.chunks += 1
+                chunk = []
+        if chunk:
+            last_keys[report.chunks] = chunk[-1]
+            await queue.put((report.chunks, chunk))
+            report.chunks += 1
+        for _ in range(workers):
+            await queue.put(None)
+
+    # The queue bounds how far key streaming runs ahead of the workers
+    tasks = [asyncio.create_task(produce())]
+    tasks += [asyncio.create_task(worker()) for _ in range(workers)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    await state.delete_one({"_id": scope})
+    return report
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scope", choices=["balances", "groups", "all"], default="all")
+    parser.add_argument("--repair", action="store_true")
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument("--workers", type=int, default=settings.reconcile_workers)
+    parser.add_argument("--chunk-size", type=int, default=settings.reconcile_chunk_size)
+    parser.add_argument("--pause", type=float, default=settings.reconcile_pause)
+    args = parser.parse_args()
+
+    scopes = list(SCOPES) if args.scope == "all" else [args.scope]
+    await connect_to_mongo()
+    try:
+        for scope in scopes:
+            report = await reconcile(
+                get_database(),
+                scope,
+                repair=args.repair,
+                resume=args.resume,
+                workers=args.workers,
+                chunk_size=args.chunk_size,
+                pause=args.pause,
+            )
+            logger.info(f"Reconciled {scope}: {asdict(report)}")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,163 @@
+"""
+Write periodic balance snapshots from the balance event log
+
+Each run folds the events recorded since the previous run into a new
+``balance_snapshots`` entry for every (user, currency) that changed, so
+historical and rebuilt balances only replay events newer than one snapshot.
+Events from the last ``balance_snapshot_lag_seconds`` are left for the next
+run. A run is safe to repeat: snapshots are upserted at the run's cutoff and
+progress is only recorded once they are all written.
+
+The first run has no event history to fold, so it seeds snapshots from the
+current ``balances``; run that one while writes are paused.
+
+Run with ``python -m app.jobs.snapshot_balances``.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+from bson.int64 import Int64
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection, get_database
+from app.core.money import minor_units
+
+logger = logging.getLogger(__name__)
+
+STATE_ID = "balances"
+
+
+def _snapshot_upsert(
+    user_id: str, currency: str, amount: int, as_of: datetime
+) -> UpdateOne:
+    return UpdateOne(
+        {"user_id": user_id, "currency": currency, "as_of": as_of},
+        {"$set": {"amount": Int64(amount), "created_at": datetime.utcnow()}},
+        upsert=True,
+    )
+
+
+async def _seed_snapshots(database: AsyncIOMotorDatabase, as_of: datetime) -> int:
+    pipeline = [
+        {
+            "$group": {
+                "_id": {"user_id": "$user_id", "currency": "$currency"},
+                "amount": {"$sum": minor_units()},
+            }
+        }
+    ]
+    operations = []
+    count = 0
+    async for row in database.balances.aggregate(pipeline, allowDiskUse=True):
+        operations.append(
+            _snapshot_upsert(
+                row["_id"]["user_id"], row["_id"]["currency"], row["amount"], as_of
+            )
+        )
+        if len(operations) >= settings.archive_batch_size:
+            await database.balance_snapshots.bulk_write(operations, ordered=False)
+            count += len(operations)
+            operations = []
+    if operations:
+        await database.balance_snapshots.bulk_write(operations, ordered=False)
+        count += len(operations)
+    return count
+
+
+async def _previous_snapshots(
+    database: AsyncIOMotorDatabase, user_ids: List[str], before: datetime
+) -> Dict[Tuple[str, str], int]:
+    pipeline = [
+        {"$match": {"user_id": {"$in": user_ids}, "as_of": {"$lte": before}}},
+        {"$sort": {"as_of": -1}},
+        {
+            "$group": {
+                "_id": {"user_id": "$user_id", "currency": "$currency"},
+                "amount": {"$first": "$amount"},
+            }
+        },
+    ]
+    return {
+        (row["_id"]["user_id"], row["_id"]["currency"]): row["amount"]
+        async for row in database.balance_snapshots.aggregate(pipeline)
+    }
+
+
+async def _fold_batch(
+    database: AsyncIOMotorDatabase,
+    rows: List[Dict[str, Any]],
+    start: datetime,
+    cutoff: datetime,
+) -> None:
+    # Every (user, currency) with events since ``start`` got a snapshot at
+    # ``start`` or earlier, so the latest one plus the window is exact
+    previous = await _previous_snapshots(
+        database, list({row["_id"]["user_id"] for row in rows}), start
+    )
+    operations = []
+    for row in rows:
+        key = (row["_id"]["user_id"], row["_id"]["currency"])
+        operations.append(
+            _snapshot_upsert(*key, previous.get(key, 0) + row["delta"], cutoff)
+        )
+    await database.balance_snapshots.bulk_write(operations, ordered=False)
+
+
+async def snapshot_balances(database: AsyncIOMotorDatabase) -> int:
+    """Snapshot every balance changed since the last run; returns snapshot count"""
+    state = await database.balance_snapshot_state.find_one({"_id": STATE_ID})
+    cutoff = datetime.utcnow() - timedelta(
+        seconds=settings.balance_snapshot_lag_seconds
+    )
+
+    if state is None:
+        cutoff = datetime.utcnow()
+        count = await _seed_snapshots(database, cutoff)
+    else:
+        start = state["as_of"]
+        if cutoff <= start:
+            return 0
+        pipeline = [
+            {"$match": {"created_at": {"$gte": start, "$lt": cutoff}}},
+            {
+                "$group": {
+                    "_id": {"user_id": "$user_id", "currency": "$currency"},
+                    "delta": {"$sum": "$delta"},
+                }
+            },
+        ]
+        count = 0
+        batch: List[Dict[str, Any]] = []
+        async for row in database.balance_events.aggregate(pipeline, allowDiskUse=True):
+            batch.append(row)
+            if len(batch) >= settings.archive_batch_size:
+                await _fold_batch(database, batch, start, cutoff)
+                count += len(batch)
+                batch = []
+        if batch:
+            await _fold_batch(database, batch, start, cutoff)
+            count += len(batch)
+
+    await database.balance_snapshot_state.update_one(
+        {"_id": STATE_ID}, {"$set": {"as_of": cutoff}}, upsert=True
+    )
+    return count
+
+
+async def main():
+    await connect_to_mongo()
+    try:
+        count = await snapshot_balances(get_database())
+        logger.info(f"Wrote {count} balance snapshots")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
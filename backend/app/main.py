@@ -1,25 +1,85 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
-from app.core.database import connect_to_mongo, close_mongo_connection
-from app.routers import balances, groups, activities, users, transactions, support
+from app.core.deadline import DeadlineMiddleware, get_deadline_stats
+from app.core.database import (
+    connect_to_mongo,
+    close_mongo_connection,
+    get_database,
+    get_database_status,
+    wait_for_database,
+)
+from app.core.loop_monitor import loop_monitor
+from app.core.profiling import ProfiledJSONResponse, ProfilingMiddleware
+from app.core.receipt_processing import receipt_processor
+from app.core.routing import LazyRouterMiddleware, include_routers
+from app.core.singleflight import get_singleflight_stats
+from app.core.structured_logging import (
+    RequestIdMiddleware,
+    get_logging_stats,
+    setup_logging,
+)
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
+# Started scheduler and compactor, stopped on shutdown
+_background_workers = []
+
+
+def _start_background_workers() -> None:
+    if settings.recurring_scheduler_enabled:
+        from app.services.recurring_service import recurring_scheduler
+
+        _background_workers.append(recurring_scheduler)
+    if settings.group_counter_enabled:
+        from app.services.group_counter_service import group_counter_compactor
+
+        _background_workers.append(group_counter_compactor)
+    for worker in _background_workers:
+        worker.start(get_database())
+
+
+async def _start_background_workers_when_ready() -> None:
+    # Their imports and first queries would otherwise delay a fast start
+    await wait_for_database()
+    _start_background_workers()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up PaisaSplit API...")
-    await connect_to_mongo()
+    await connect_to_mongo(lazy=settings.fast_start)
+    if settings.loop_monitor_enabled:
+        loop_monitor.start()
+    workers_starting = None
+    if settings.fast_start:
+        workers_starting = asyncio.create_task(_start_background_workers_when_ready())
+    else:
+        _start_background_workers()
     yield
     # Shutdown
     logger.info("Shutting down PaisaSplit API...")
+    if workers_starting and not workers_starting.done():
+        workers_starting.cancel()
+    for worker in _background_workers:
+        await worker.stop()
+    _background_workers.clear()
+    from app.services.propagation_service import profile_propagator
+
+    # Leave most of the graceful timeout for draining requests and the rest of
+    # shutdown, so the worker isn't killed mid-flush
+    await profile_propagator.flush(settings.server_graceful_timeout / 3)
+    receipt_processor.shutdown()
+    await loop_monitor.stop()
     await close_mongo_connection()
 
 
@@ -29,26 +89,36 @@ app = FastAPI(
     description="Backend API for PaisaSplit expense tracking application",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ProfiledJSONResponse,
 )
 
+# Per-request deadlines, applied to every Mongo operation; overruns become 504s
+app.add_middleware(DeadlineMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.allowed_hosts,
+    allow_origins=settings.allowed_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-# Include routers
-app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
-app.include_router(balances.router, prefix="/api/v1/balances", tags=["balances"])
-app.include_router(groups.router, prefix="/api/v1/groups", tags=["groups"])
-app.include_router(
-    transactions.router, prefix="/api/v1/transactions", tags=["transactions"]
-)
-app.include_router(activities.router, prefix="/api/v1/activities", tags=["activities"])
-app.include_router(support.router, prefix="/api/v1/support", tags=["support"])
+# gzip/brotli for large responses; precompressed bodies pass through
+app.add_middleware(CompressionMiddleware)
+
+# Per-request Server-Timing and on-demand sampling profiles
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
+# Correlation id for every log line written while handling a request
+app.add_middleware(RequestIdMiddleware)
+
+# Include routers (in fast-start mode each one is mounted on its first request)
+if settings.fast_start:
+    app.add_middleware(LazyRouterMiddleware)
+else:
+    include_routers(app)
 
 
 @app.get("/")
@@ -58,4 +128,22 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "message": "PaisaSplit API is running"}
+    return {
+        "status": "healthy",
+        "message": "PaisaSplit API is running",
+        "database": get_database_status(),
+        "event_loop_lag_ms": loop_monitor.lag_percentiles(),
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    from app.services.group_counter_service import get_group_counter_stats
+
+    return {
+        "coalescing": get_singleflight_stats(),
+        "deadlines": get_deadline_stats(),
+        "event_loop": loop_monitor.stats(),
+        "group_counters": get_group_counter_stats(),
+        "logging": get_logging_stats(),
+    }
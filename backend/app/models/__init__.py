@@ -1,24 +1,63 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, GetCoreSchemaHandler
+from pydantic.json_schema import JsonSchemaValue
+from pydantic_core import core_schema
+from typing import Annotated, List, Optional, Dict, Any
+from datetime import datetime, timezone
 from bson import ObjectId
+from bson.errors import InvalidId
 from enum import Enum
 
 
 class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
+    """ObjectId field type: accepts ObjectIds or 24-char hex strings, dumps as str
+
+    ObjectIds coming from Mongo pass an isinstance check in pydantic-core and
+    are kept as-is; only strings are parsed.
+    """
 
     @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
+    def validate(cls, v: str) -> ObjectId:
+        try:
+            return ObjectId(v)
+        except (InvalidId, TypeError):
             raise ValueError("Invalid objectid")
-        return ObjectId(v)
 
     @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
+    def __get_pydantic_core_schema__(
+        cls, source_type: Any, handler: GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        from_str = core_schema.chain_schema(
+            [
+                core_schema.str_schema(),
+                core_schema.no_info_plain_validator_function(cls.validate),
+            ]
+        )
+        return core_schema.json_or_python_schema(
+            json_schema=from_str,
+            python_schema=core_schema.union_schema(
+                [core_schema.is_instance_schema(ObjectId), from_str]
+            ),
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                str, when_used="json"
+            ),
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(
+        cls, schema: core_schema.CoreSchema, handler
+    ) -> JsonSchemaValue:
+        return {"type": "string", "pattern": "^[0-9a-fA-F]{24}$"}
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    # Mongo hands back naive UTC datetimes, so aware inputs are stored the same way
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+# A datetime stored and compared as naive UTC
+UtcDateTime = Annotated[datetime, AfterValidator(_naive_utc)]
 
 
 class Currency(str, Enum):
@@ -43,6 +82,19 @@ class TransactionStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+class ReceiptStatus(str, Enum):
+    PENDING = "pending"
+    PROCESSED = "processed"
+    FAILED = "failed"
+
+
+class RecurrenceFrequency(str, Enum):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+    YEARLY = "yearly"
+
+
 # Balance Models
 class Balance(BaseModel):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
@@ -55,10 +107,35 @@ class Balance(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
+    model_config = ConfigDict(populate_by_name=True)
+
+
+# Receipt Models
+class ReceiptSummary(BaseModel):
+    receipt_id: str
+    status: ReceiptStatus = ReceiptStatus.PENDING
+    thumbnail_id: Optional[str] = None
+    detected_total: Optional[float] = None
+
+
+class Receipt(BaseModel):
+    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    sha256: str
+    file_id: str
+    filename: str
+    content_type: str
+    size: int
+    status: ReceiptStatus = ReceiptStatus.PENDING
+    thumbnail_id: Optional[str] = None
+    text: Optional[str] = None
+    detected_total: Optional[float] = None
+    error: Optional[str] = None
+    transaction_ids: List[str] = []
+    uploaded_by: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    processed_at: Optional[datetime] = None
+
+    model_config = ConfigDict(populate_by_name=True)
 
 
 # Transaction Models
@@ -73,13 +150,37 @@ class Transaction(BaseModel):
     group_id: Optional[str] = None
     participants: List[str] = []
     description: Optional[str] = None
+    category: Optional[str] = None
+    recurring_id: Optional[str] = None
+    receipt: Optional[ReceiptSummary] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+# Recurring Transaction Models
+class RecurringTransaction(BaseModel):
+    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    user_id: str
+    title: str
+    amount: float
+    currency: Currency = Currency.INR
+    type: TransactionType = TransactionType.SPLIT
+    group_id: Optional[str] = None
+    participants: List[str] = []
+    description: Optional[str] = None
+    frequency: RecurrenceFrequency
+    interval: int = 1
+    start_at: datetime
+    end_at: Optional[datetime] = None
+    next_run_at: datetime
+    occurrences: int = 0
+    is_active: bool = True
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
+    model_config = ConfigDict(populate_by_name=True)
 
 
 # Group Models
@@ -91,6 +192,10 @@ class GroupMember(BaseModel):
     currency: Currency = Currency.INR
 
 
+class GroupMemberAdd(BaseModel):
+    user_id: str
+
+
 class Group(BaseModel):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     name: str
@@ -103,10 +208,7 @@ class Group(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
+    model_config = ConfigDict(populate_by_name=True)
 
 
 # Activity Models
@@ -124,10 +226,7 @@ class ActivityItem(BaseModel):
     status: TransactionStatus = TransactionStatus.PENDING
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
+    model_config = ConfigDict(populate_by_name=True)
 
 
 # User Models
@@ -140,8 +239,8 @@ class UserPreferences(BaseModel):
 
 class User(BaseModel):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
-    email: str = Field(..., unique=True)
-    username: str = Field(..., unique=True)
+    email: str = Field(..., json_schema_extra={"unique": True})
+    username: str = Field(..., json_schema_extra={"unique": True})
     full_name: str
     avatar: str = ""
     phone: Optional[str] = None
@@ -150,10 +249,25 @@ class User(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class UserPublic(BaseModel):
+    """What other users may see of a user"""
+
+    id: PyObjectId = Field(alias="_id")
+    username: str
+    full_name: str
+    avatar: str = ""
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class UserSignup(User):
+    """A new user and a token to call the API as them"""
+
+    access_token: str
+    token_type: str = "bearer"
 
 
 # Support Models
@@ -166,10 +280,7 @@ class FAQItem(BaseModel):
     is_active: bool = True
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
+    model_config = ConfigDict(populate_by_name=True)
 
 
 # Spending Report Models
@@ -191,10 +302,7 @@ class SpendingReport(BaseModel):
     trends: Dict[str, Any] = {}
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
+    model_config = ConfigDict(populate_by_name=True)
 
 
 # Request/Response Models
@@ -222,6 +330,7 @@ class TransactionCreate(BaseModel):
     group_id: Optional[str] = None
     participants: List[str] = []
     description: Optional[str] = None
+    category: Optional[str] = None
 
 
 class TransactionUpdate(BaseModel):
@@ -232,6 +341,31 @@ class TransactionUpdate(BaseModel):
     status: Optional[TransactionStatus] = None
     participants: Optional[List[str]] = None
     description: Optional[str] = None
+    category: Optional[str] = None
+
+
+class RecurringTransactionCreate(BaseModel):
+    user_id: str
+    title: str
+    amount: float
+    currency: Currency = Currency.INR
+    type: TransactionType = TransactionType.SPLIT
+    group_id: Optional[str] = None
+    participants: List[str] = []
+    description: Optional[str] = None
+    frequency: RecurrenceFrequency
+    interval: int = Field(1, ge=1)
+    start_at: UtcDateTime
+    end_at: Optional[UtcDateTime] = None
+
+
+class RecurringTransactionUpdate(BaseModel):
+    title: Optional[str] = None
+    amount: Optional[float] = None
+    participants: Optional[List[str]] = None
+    description: Optional[str] = None
+    end_at: Optional[UtcDateTime] = None
+    is_active: Optional[bool] = None
 
 
 class GroupCreate(BaseModel):
@@ -2,8 +2,18 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from typing import List, Optional
 from datetime import datetime, timedelta
 
-from app.models import ActivityItem, TransactionType, TransactionStatus
+from app.models import ActivityItem, Currency, TransactionType, TransactionStatus
 from app.core.database import get_database
+from app.core.security import (
+    Principal,
+    get_current_principal,
+    is_caller,
+    is_group_member,
+    require_group_member,
+    require_self,
+    scope_to_caller,
+)
+from app.core.fieldsets import FieldSet, fieldset_query
 from app.services.activity_service import ActivityService
 
 router = APIRouter()
@@ -22,9 +32,11 @@ async def get_activities(
     group_id: Optional[str] = None,
     activity_type: Optional[TransactionType] = None,
     days: Optional[int] = None,
+    fieldset: Optional[FieldSet] = Depends(fieldset_query(ActivityItem)),
+    principal: Optional[Principal] = Depends(get_current_principal),
     activity_service: ActivityService = Depends(get_activity_service),
 ):
-    """Get all activities with optional filtering"""
+    """Get the caller's activities with optional filtering"""
     # Calculate date filter if days parameter is provided
     since_date = None
     if days:
@@ -33,26 +45,40 @@ async def get_activities(
     activities = await activity_service.get_activities(
         skip=skip,
         limit=limit,
-        user_id=user_id,
+        user_id=scope_to_caller(user_id, principal),
         group_id=group_id,
         activity_type=activity_type,
         since_date=since_date,
+        fieldset=fieldset,
     )
+    if fieldset:
+        return fieldset.response(activities)
     return activities
 
 
 @router.get("/{activity_id}", response_model=ActivityItem)
 async def get_activity(
-    activity_id: str, activity_service: ActivityService = Depends(get_activity_service)
+    activity_id: str,
+    principal: Optional[Principal] = Depends(get_current_principal),
+    activity_service: ActivityService = Depends(get_activity_service),
 ):
     """Get a specific activity by ID"""
     activity = await activity_service.get_activity_by_id(activity_id)
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
+    if not (
+        is_caller(principal, activity.created_by, *activity.participants)
+        or (activity.group_id and await is_group_member(principal, activity.group_id))
+    ):
+        raise HTTPException(status_code=403, detail="Not allowed to see this activity")
     return activity
 
 
-@router.get("/user/{user_id}", response_model=List[ActivityItem])
+@router.get(
+    "/user/{user_id}",
+    response_model=List[ActivityItem],
+    dependencies=[Depends(require_self)],
+)
 async def get_user_activities(
     user_id: str,
     skip: int = 0,
@@ -71,7 +97,11 @@ async def get_user_activities(
     return activities
 
 
-@router.get("/group/{group_id}", response_model=List[ActivityItem])
+@router.get(
+    "/group/{group_id}",
+    response_model=List[ActivityItem],
+    dependencies=[Depends(require_group_member)],
+)
 async def get_group_activities(
     group_id: str,
     skip: int = 0,
@@ -90,7 +120,7 @@ async def get_group_activities(
     return activities
 
 
-@router.get("/user/{user_id}/recent")
+@router.get("/user/{user_id}/recent", dependencies=[Depends(require_self)])
 async def get_recent_user_activities(
     user_id: str,
     limit: int = 10,
@@ -104,7 +134,7 @@ async def get_recent_user_activities(
     return activities
 
 
-@router.get("/feed/{user_id}")
+@router.get("/feed/{user_id}", dependencies=[Depends(require_self)])
 async def get_activity_feed(
     user_id: str,
     skip: int = 0,
@@ -116,13 +146,13 @@ async def get_activity_feed(
     return feed
 
 
-@router.get("/stats/{user_id}")
+@router.get("/stats/{user_id}", dependencies=[Depends(require_self)])
 async def get_activity_stats(
     user_id: str,
     days: int = 30,
+    currency: Currency = Currency.INR,
     activity_service: ActivityService = Depends(get_activity_service),
 ):
-    """Get activity statistics for a user"""
-    since_date = datetime.utcnow() - timedelta(days=days)
-    stats = await activity_service.get_activity_stats(user_id, since_date)
+    """Get activity statistics for a user, with amounts in one currency"""
+    stats = await activity_service.get_activity_stats(user_id, days, currency)
     return stats
@@ -1,9 +1,21 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from typing import List, Optional
+from datetime import datetime
 
-from app.models import Balance, BalanceCreate, BalanceUpdate
+from app.models import Balance, BalanceCreate, BalanceUpdate, Currency
 from app.core.database import get_database
+from app.core.security import (
+    Principal,
+    check_owner,
+    get_current_principal,
+    require_admin,
+    require_self,
+    scope_to_caller,
+)
+from app.core.money import to_major
+from app.services.balance_history_service import BalanceHistoryService
 from app.services.balance_service import BalanceService
+from app.services.ledger_service import LedgerService
 
 router = APIRouter()
 
@@ -13,14 +25,29 @@ def get_balance_service():
     return BalanceService(db)
 
 
+def get_balance_history_service():
+    db = get_database()
+    return BalanceHistoryService(db)
+
+
+def get_ledger_service():
+    db = get_database()
+    return LedgerService(db)
+
+
 @router.post("/", response_model=Balance, status_code=status.HTTP_201_CREATED)
 async def create_balance(
     balance_data: BalanceCreate,
+    principal: Optional[Principal] = Depends(get_current_principal),
     balance_service: BalanceService = Depends(get_balance_service),
 ):
-    """Create a new balance record"""
-    balance = await balance_service.create_balance(balance_data)
-    return balance
+    """Create a new balance record for the caller"""
+    check_owner(principal, balance_data.user_id)
+    try:
+        balance = await balance_service.create_balance(balance_data)
+        return balance
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/", response_model=List[Balance])
@@ -28,27 +55,40 @@ async def get_balances(
     skip: int = 0,
     limit: int = 100,
     user_id: Optional[str] = None,
+    principal: Optional[Principal] = Depends(get_current_principal),
     balance_service: BalanceService = Depends(get_balance_service),
 ):
-    """Get all balances with optional filtering by user_id"""
+    """Get the caller's balances (any user's with auth disabled)"""
     balances = await balance_service.get_balances(
-        skip=skip, limit=limit, user_id=user_id
+        skip=skip, limit=limit, user_id=scope_to_caller(user_id, principal)
     )
     return balances
 
 
-@router.get("/{balance_id}", response_model=Balance)
-async def get_balance(
-    balance_id: str, balance_service: BalanceService = Depends(get_balance_service)
-):
-    """Get a specific balance by ID"""
+async def get_owned_balance(
+    balance_id: str,
+    principal: Optional[Principal] = Depends(get_current_principal),
+    balance_service: BalanceService = Depends(get_balance_service),
+) -> Balance:
+    """The route's balance; 404 if missing, 403 if it isn't the caller's"""
     balance = await balance_service.get_balance_by_id(balance_id)
     if not balance:
         raise HTTPException(status_code=404, detail="Balance not found")
+    check_owner(principal, balance.user_id)
+    return balance
+
+
+@router.get("/{balance_id}", response_model=Balance)
+async def get_balance(balance: Balance = Depends(get_owned_balance)):
+    """Get a specific balance by ID"""
     return balance
 
 
-@router.get("/user/{user_id}", response_model=List[Balance])
+@router.get(
+    "/user/{user_id}",
+    response_model=List[Balance],
+    dependencies=[Depends(require_self)],
+)
 async def get_user_balances(
     user_id: str, balance_service: BalanceService = Depends(get_balance_service)
 ):
@@ -57,7 +97,40 @@ async def get_user_balances(
     return balances
 
 
-@router.put("/{balance_id}", response_model=Balance)
+@router.get("/pairs/{user_id}", dependencies=[Depends(require_self)])
+async def get_counterparties(
+    user_id: str,
+    include_settled: bool = False,
+    ledger_service: LedgerService = Depends(get_ledger_service),
+):
+    """Get everyone a user has an outstanding balance with, across all groups"""
+    counterparties = await ledger_service.get_counterparties(
+        user_id, include_settled=include_settled
+    )
+    return {"user_id": user_id, "counterparties": counterparties}
+
+
+@router.get("/pairs/{user_id}/{other_user_id}", dependencies=[Depends(require_self)])
+async def get_pair_balance(
+    user_id: str,
+    other_user_id: str,
+    ledger_service: LedgerService = Depends(get_ledger_service),
+):
+    """Get what other_user_id owes user_id (negative if user_id owes them)"""
+    balances = await ledger_service.get_pair_balance(user_id, other_user_id)
+    return {
+        "user_id": user_id,
+        "other_user_id": other_user_id,
+        "balances": balances,
+        "is_settled": not balances,
+    }
+
+
+@router.put(
+    "/{balance_id}",
+    response_model=Balance,
+    dependencies=[Depends(get_owned_balance)],
+)
 async def update_balance(
     balance_id: str,
     balance_data: BalanceUpdate,
@@ -70,7 +143,7 @@ async def update_balance(
     return balance
 
 
-@router.delete("/{balance_id}")
+@router.delete("/{balance_id}", dependencies=[Depends(get_owned_balance)])
 async def delete_balance(
     balance_id: str, balance_service: BalanceService = Depends(get_balance_service)
 ):
@@ -81,10 +154,64 @@ async def delete_balance(
     return {"message": "Balance deleted successfully"}
 
 
-@router.get("/user/{user_id}/total")
+@router.get("/user/{user_id}/total", dependencies=[Depends(require_self)])
 async def get_user_total_balance(
     user_id: str, balance_service: BalanceService = Depends(get_balance_service)
 ):
     """Get total balance for a user across all currencies (converted to INR)"""
     total = await balance_service.get_user_total_balance(user_id)
     return {"user_id": user_id, "total_balance": total, "currency": "INR"}
+
+
+@router.get("/user/{user_id}/history", dependencies=[Depends(require_self)])
+async def get_user_balance_history(
+    user_id: str,
+    currency: Optional[Currency] = None,
+    skip: int = 0,
+    limit: int = 50,
+    history_service: BalanceHistoryService = Depends(get_balance_history_service),
+):
+    """Get every change to a user's balances, newest first"""
+    events = await history_service.get_events(
+        user_id, currency=currency, skip=skip, limit=limit
+    )
+    return {"user_id": user_id, "events": events}
+
+
+@router.get("/user/{user_id}/as-of", dependencies=[Depends(require_self)])
+async def get_user_balances_as_of(
+    user_id: str,
+    at: datetime,
+    history_service: BalanceHistoryService = Depends(get_balance_history_service),
+):
+    """Get a user's balance in each currency at a point in time"""
+    balances = await history_service.get_balances_as_of(user_id, as_of=at)
+    return {
+        "user_id": user_id,
+        "as_of": at,
+        "balances": {
+            currency: to_major(amount, currency)
+            for currency, amount in balances.items()
+        },
+    }
+
+
+@router.post("/user/{user_id}/history/reconcile", dependencies=[Depends(require_admin)])
+async def reconcile_user_history(
+    user_id: str,
+    history_service: BalanceHistoryService = Depends(get_balance_history_service),
+):
+    """Record corrections so a user's balance history matches the stored balances"""
+    corrections = await history_service.reconcile_history(user_id)
+    if corrections is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Balances changed during reconciliation, retry later",
+        )
+    return {
+        "user_id": user_id,
+        "corrections": {
+            currency: to_major(amount, currency)
+            for currency, amount in corrections.items()
+        },
+    }
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends
+
+from app.core.database import get_database
+from app.core.security import require_self
+from app.services.dashboard_service import DashboardService
+
+router = APIRouter()
+
+
+def get_dashboard_service():
+    db = get_database()
+    return DashboardService(db)
+
+
+@router.get("/{user_id}", dependencies=[Depends(require_self)])
+async def get_dashboard(
+    user_id: str,
+    activity_limit: int = 10,
+    dashboard_service: DashboardService = Depends(get_dashboard_service),
+):
+    """Get everything the home screen shows in one response"""
+    dashboard = await dashboard_service.get_dashboard(
+        user_id, activity_limit=activity_limit
+    )
+    return dashboard
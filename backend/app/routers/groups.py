@@ -1,8 +1,17 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from typing import List, Optional
 
-from app.models import Group, GroupCreate, GroupUpdate, GroupMember
+from app.models import Group, GroupCreate, GroupUpdate, GroupMemberAdd
 from app.core.database import get_database
+from app.core.security import (
+    Principal,
+    check_owner,
+    get_current_principal,
+    require_group_member,
+    require_self,
+    scope_to_caller,
+)
+from app.core.fieldsets import FieldSet, fieldset_query
 from app.services.group_service import GroupService
 
 router = APIRouter()
@@ -13,12 +22,29 @@ def get_group_service():
     return GroupService(db)
 
 
+async def get_existing_group(
+    group_id: str,
+    group_service: GroupService = Depends(get_group_service),
+) -> Group:
+    """The route's group; 404 if it doesn't exist"""
+    group = await group_service.get_group_by_id(group_id)
+    if not group:
+        raise HTTPException(status_code=404, detail="Group not found")
+    return group
+
+
 @router.post("/", response_model=Group, status_code=status.HTTP_201_CREATED)
 async def create_group(
-    group_data: GroupCreate, group_service: GroupService = Depends(get_group_service)
+    group_data: GroupCreate,
+    principal: Optional[Principal] = Depends(get_current_principal),
+    group_service: GroupService = Depends(get_group_service),
 ):
-    """Create a new group"""
-    group = await group_service.create_group(group_data)
+    """Create a new group owned by the caller"""
+    check_owner(principal, group_data.created_by)
+    try:
+        group = await group_service.create_group(group_data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return group
 
 
@@ -27,25 +53,33 @@ async def get_groups(
     skip: int = 0,
     limit: int = 100,
     user_id: Optional[str] = None,
+    fieldset: Optional[FieldSet] = Depends(fieldset_query(Group)),
+    principal: Optional[Principal] = Depends(get_current_principal),
     group_service: GroupService = Depends(get_group_service),
 ):
-    """Get all groups with optional filtering by user_id (groups where user is a member)"""
-    groups = await group_service.get_groups(skip=skip, limit=limit, user_id=user_id)
+    """Get the groups the caller is a member of"""
+    groups = await group_service.get_groups(
+        skip=skip,
+        limit=limit,
+        user_id=scope_to_caller(user_id, principal),
+        fieldset=fieldset,
+    )
+    if fieldset:
+        return fieldset.response(groups)
     return groups
 
 
-@router.get("/{group_id}", response_model=Group)
-async def get_group(
-    group_id: str, group_service: GroupService = Depends(get_group_service)
-):
+@router.get(
+    "/{group_id}", response_model=Group, dependencies=[Depends(require_group_member)]
+)
+async def get_group(group: Group = Depends(get_existing_group)):
     """Get a specific group by ID"""
-    group = await group_service.get_group_by_id(group_id)
-    if not group:
-        raise HTTPException(status_code=404, detail="Group not found")
     return group
 
 
-@router.get("/user/{user_id}", response_model=List[Group])
+@router.get(
+    "/user/{user_id}", response_model=List[Group], dependencies=[Depends(require_self)]
+)
 async def get_user_groups(
     user_id: str, group_service: GroupService = Depends(get_group_service)
 ):
@@ -54,7 +88,9 @@ async def get_user_groups(
     return groups
 
 
-@router.put("/{group_id}", response_model=Group)
+@router.put(
+    "/{group_id}", response_model=Group, dependencies=[Depends(require_group_member)]
+)
 async def update_group(
     group_id: str,
     group_data: GroupUpdate,
@@ -67,31 +103,41 @@ async def update_group(
     return group
 
 
-@router.delete("/{group_id}")
+@router.delete("/{group_id}", dependencies=[Depends(require_group_member)])
 async def delete_group(
-    group_id: str, group_service: GroupService = Depends(get_group_service)
+    group_id: str,
+    principal: Optional[Principal] = Depends(get_current_principal),
+    group: Group = Depends(get_existing_group),
+    group_service: GroupService = Depends(get_group_service),
 ):
-    """Delete a group"""
+    """Delete a group; only its creator may"""
+    check_owner(principal, group.created_by)
     success = await group_service.delete_group(group_id)
     if not success:
         raise HTTPException(status_code=404, detail="Group not found")
     return {"message": "Group deleted successfully"}
 
 
-@router.post("/{group_id}/members", response_model=Group)
+@router.post(
+    "/{group_id}/members",
+    response_model=Group,
+    dependencies=[Depends(require_group_member)],
+)
 async def add_group_member(
     group_id: str,
-    member: GroupMember,
+    member: GroupMemberAdd,
     group_service: GroupService = Depends(get_group_service),
 ):
-    """Add a member to a group"""
-    group = await group_service.add_member(group_id, member)
+    """Add a user to a group; they join with a zero balance"""
+    group = await group_service.add_member(group_id, member.user_id)
     if not group:
-        raise HTTPException(status_code=404, detail="Group not found")
+        raise HTTPException(status_code=404, detail="Group or user not found")
     return group
 
 
-@router.delete("/{group_id}/members/{user_id}")
+@router.delete(
+    "/{group_id}/members/{user_id}", dependencies=[Depends(require_group_member)]
+)
 async def remove_group_member(
     group_id: str,
     user_id: str,
@@ -104,7 +150,7 @@ async def remove_group_member(
     return {"message": "Member removed successfully"}
 
 
-@router.get("/{group_id}/balance")
+@router.get("/{group_id}/balance", dependencies=[Depends(require_group_member)])
 async def get_group_balance_summary(
     group_id: str, group_service: GroupService = Depends(get_group_service)
 ):
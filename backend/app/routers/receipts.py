@@ -0,0 +1,151 @@
+from fastapi import APIRouter, HTTPException, Depends, Request, status
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from bson import ObjectId
+
+from app.models import Receipt
+from app.core.config import settings
+from app.core.database import get_database
+from app.core.deadline import spawn_detached
+from app.core.security import Principal, check_owner, get_current_principal
+from app.services.receipt_service import (
+    ReceiptForbidden,
+    ReceiptService,
+    ReceiptTooLarge,
+)
+
+router = APIRouter()
+
+
+def get_receipt_service():
+    db = get_database()
+    return ReceiptService(db)
+
+
+async def get_owned_receipt(
+    receipt_id: str,
+    principal: Optional[Principal] = Depends(get_current_principal),
+    receipt_service: ReceiptService = Depends(get_receipt_service),
+) -> Receipt:
+    """The route's receipt, if the caller uploaded it"""
+    receipt = await receipt_service.get_receipt_by_id(receipt_id)
+    if not receipt:
+        raise HTTPException(status_code=404, detail="Receipt not found")
+    check_owner(principal, receipt.uploaded_by)
+    return receipt
+
+
+async def _stream_file(receipt_service: ReceiptService, file_id: str):
+    grid_out = await receipt_service.open_file(file_id)
+
+    async def chunks():
+        while True:
+            # Each read gets its own budget; the request's ends with the headers
+            chunk = await spawn_detached(
+                grid_out.readchunk(), timeout=settings.request_timeout_read
+            )
+            if not chunk:
+                break
+            yield chunk
+
+    return StreamingResponse(
+        chunks(),
+        media_type=grid_out.metadata.get("content_type", "application/octet-stream"),
+        headers={"Content-Length": str(grid_out.length)},
+    )
+
+
+@router.post("/", response_model=Receipt, status_code=status.HTTP_201_CREATED)
+async def upload_receipt(
+    request: Request,
+    filename: str = "receipt",
+    transaction_id: Optional[str] = None,
+    principal: Optional[Principal] = Depends(get_current_principal),
+    receipt_service: ReceiptService = Depends(get_receipt_service),
+):
+    """Upload a receipt image as the raw request body (Content-Type: image/*)
+
+    The body is streamed straight into storage; thumbnailing and text
+    extraction happen in the background and are attached to the transaction
+    when done.
+    """
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith("image/"):
+        raise HTTPException(
+            status_code=415, detail="Receipts must be uploaded as an image/* body"
+        )
+    content_length = request.headers.get("content-length")
+    if content_length:
+        try:
+            declared = int(content_length)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Content-Length")
+        if declared > settings.receipt_max_bytes:
+            raise HTTPException(status_code=413, detail="Receipt is too large")
+    if transaction_id and not ObjectId.is_valid(transaction_id):
+        raise HTTPException(status_code=400, detail="Invalid transaction_id")
+
+    try:
+        receipt = await receipt_service.upload_receipt(
+            request.stream(),
+            filename=filename,
+            content_type=content_type,
+            transaction_id=transaction_id,
+            uploaded_by=principal.user_id if principal else None,
+        )
+    except ReceiptTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ReceiptForbidden as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return receipt
+
+
+@router.get("/{receipt_id}", response_model=Receipt)
+async def get_receipt(receipt: Receipt = Depends(get_owned_receipt)):
+    """Get a receipt's processing status and extracted text"""
+    return receipt
+
+
+@router.get("/{receipt_id}/content")
+async def get_receipt_content(
+    receipt: Receipt = Depends(get_owned_receipt),
+    receipt_service: ReceiptService = Depends(get_receipt_service),
+):
+    """Download the original receipt image"""
+    return await _stream_file(receipt_service, receipt.file_id)
+
+
+@router.get("/{receipt_id}/thumbnail")
+async def get_receipt_thumbnail(
+    receipt: Receipt = Depends(get_owned_receipt),
+    receipt_service: ReceiptService = Depends(get_receipt_service),
+):
+    """Download the receipt thumbnail"""
+    if not receipt.thumbnail_id:
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+    return await _stream_file(receipt_service, receipt.thumbnail_id)
+
+
+@router.post("/{receipt_id}/transactions/{transaction_id}", response_model=Receipt)
+async def attach_receipt(
+    receipt_id: str,
+    transaction_id: str,
+    principal: Optional[Principal] = Depends(get_current_principal),
+    receipt_service: ReceiptService = Depends(get_receipt_service),
+):
+    """Attach one of your receipts to one of your transactions"""
+    if not ObjectId.is_valid(receipt_id) or not ObjectId.is_valid(transaction_id):
+        raise HTTPException(status_code=404, detail="Receipt or transaction not found")
+    try:
+        receipt_doc = await receipt_service.attach_to_transaction(
+            ObjectId(receipt_id),
+            transaction_id,
+            principal.user_id if principal else None,
+        )
+    except ReceiptForbidden as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    if not receipt_doc:
+        raise HTTPException(status_code=404, detail="Receipt or transaction not found")
+    return Receipt.model_validate(receipt_doc)
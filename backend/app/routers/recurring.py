@@ -0,0 +1,105 @@
+from fastapi import APIRouter, HTTPException, Depends, status
+from typing import List, Optional
+
+from app.models import (
+    RecurringTransaction,
+    RecurringTransactionCreate,
+    RecurringTransactionUpdate,
+)
+from app.core.database import get_database
+from app.core.security import (
+    Principal,
+    check_owner,
+    get_current_principal,
+    is_group_member,
+    require_self,
+)
+from app.services.recurring_service import RecurringService
+
+router = APIRouter()
+
+
+def get_recurring_service():
+    db = get_database()
+    return RecurringService(db)
+
+
+async def get_owned_recurring(
+    recurring_id: str,
+    principal: Optional[Principal] = Depends(get_current_principal),
+    recurring_service: RecurringService = Depends(get_recurring_service),
+) -> RecurringTransaction:
+    """The route's recurring transaction, if the caller set it up"""
+    recurring = await recurring_service.get_recurring_by_id(recurring_id)
+    if not recurring:
+        raise HTTPException(status_code=404, detail="Recurring transaction not found")
+    check_owner(principal, recurring.user_id)
+    return recurring
+
+
+@router.post(
+    "/", response_model=RecurringTransaction, status_code=status.HTTP_201_CREATED
+)
+async def create_recurring_transaction(
+    recurring_data: RecurringTransactionCreate,
+    principal: Optional[Principal] = Depends(get_current_principal),
+    recurring_service: RecurringService = Depends(get_recurring_service),
+):
+    """Create a recurring transaction (rent, subscriptions, ...) paid by the caller"""
+    check_owner(principal, recurring_data.user_id)
+    if recurring_data.group_id and not await is_group_member(
+        principal, recurring_data.group_id
+    ):
+        raise HTTPException(status_code=403, detail="Not a member of this group")
+    recurring = await recurring_service.create_recurring(recurring_data)
+    return recurring
+
+
+@router.get(
+    "/user/{user_id}",
+    response_model=List[RecurringTransaction],
+    dependencies=[Depends(require_self)],
+)
+async def get_user_recurring_transactions(
+    user_id: str, recurring_service: RecurringService = Depends(get_recurring_service)
+):
+    """Get all recurring transactions for a user"""
+    recurring = await recurring_service.get_recurring_by_user(user_id)
+    return recurring
+
+
+@router.get("/{recurring_id}", response_model=RecurringTransaction)
+async def get_recurring_transaction(
+    recurring: RecurringTransaction = Depends(get_owned_recurring),
+):
+    """Get a specific recurring transaction by ID"""
+    return recurring
+
+
+@router.put(
+    "/{recurring_id}",
+    response_model=RecurringTransaction,
+    dependencies=[Depends(get_owned_recurring)],
+)
+async def update_recurring_transaction(
+    recurring_id: str,
+    recurring_data: RecurringTransactionUpdate,
+    recurring_service: RecurringService = Depends(get_recurring_service),
+):
+    """Update a recurring transaction"""
+    recurring = await recurring_service.update_recurring(recurring_id, recurring_data)
+    if not recurring:
+        raise HTTPException(status_code=404, detail="Recurring transaction not found")
+    return recurring
+
+
+@router.delete("/{recurring_id}", dependencies=[Depends(get_owned_recurring)])
+async def delete_recurring_transaction(
+    recurring_id: str,
+    recurring_service: RecurringService = Depends(get_recurring_service),
+):
+    """Delete a recurring transaction"""
+    success = await recurring_service.delete_recurring(recurring_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Recurring transaction not found")
+    return {"message": "Recurring transaction deleted successfully"}
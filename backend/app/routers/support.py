@@ -1,25 +1,73 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Depends,
+    Path,
+    Query,
+    Request,
+    Response,
+    status,
+)
 from typing import List, Optional
 
 from app.models import FAQItem, SpendingReport
 from app.core.database import get_database
+from app.core.security import require_admin, require_self
+from app.core.faq_index import EncodedBody
 from app.services.support_service import SupportService
 
 router = APIRouter()
 
+# Report periods; anything else would fail building the month's date range
+MIN_YEAR, MAX_YEAR = 2000, 2100
+
 
 def get_support_service():
     db = get_database()
     return SupportService(db)
 
 
+def encoded_response(request: Request, body: EncodedBody) -> Response:
+    """Serve a precompressed body, or 304 if the client's copy is current"""
+    headers = {
+        "ETag": body.etag,
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "public, max-age=60",
+    }
+    if request.headers.get("if-none-match") == body.etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    encoding, content = body.negotiate(request.headers.get("accept-encoding", ""))
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
 @router.get("/faq", response_model=List[FAQItem])
 async def get_faq_items(
+    request: Request,
     category: Optional[str] = None,
     support_service: SupportService = Depends(get_support_service),
 ):
     """Get all FAQ items, optionally filtered by category"""
-    faq_items = await support_service.get_faq_items(category=category)
+    snapshot = await support_service.get_faq_snapshot()
+    body = snapshot.bodies.get(category)
+    if body is None:
+        return []
+    return encoded_response(request, body)
+
+
+@router.get("/faq/search", response_model=List[FAQItem])
+async def search_faq_items(
+    q: str,
+    category: Optional[str] = None,
+    limit: int = 10,
+    support_service: SupportService = Depends(get_support_service),
+):
+    """Search FAQ items"""
+    faq_items = await support_service.search_faq_items(
+        q, category=category, limit=limit
+    )
     return faq_items
 
 
@@ -34,7 +82,12 @@ async def get_faq_item(
     return faq_item
 
 
-@router.post("/faq", response_model=FAQItem, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/faq",
+    response_model=FAQItem,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(require_admin)],
+)
 async def create_faq_item(
     question: str,
     answer: str,
@@ -47,7 +100,9 @@ async def create_faq_item(
     return faq_item
 
 
-@router.put("/faq/{faq_id}", response_model=FAQItem)
+@router.put(
+    "/faq/{faq_id}", response_model=FAQItem, dependencies=[Depends(require_admin)]
+)
 async def update_faq_item(
     faq_id: str,
     question: Optional[str] = None,
@@ -66,7 +121,7 @@ async def update_faq_item(
     return faq_item
 
 
-@router.delete("/faq/{faq_id}")
+@router.delete("/faq/{faq_id}", dependencies=[Depends(require_admin)])
 async def delete_faq_item(
     faq_id: str, support_service: SupportService = Depends(get_support_service)
 ):
@@ -77,10 +132,14 @@ async def delete_faq_item(
     return {"message": "FAQ item deleted successfully"}
 
 
-@router.get("/spending-reports/{user_id}", response_model=List[SpendingReport])
+@router.get(
+    "/spending-reports/{user_id}",
+    response_model=List[SpendingReport],
+    dependencies=[Depends(require_self)],
+)
 async def get_user_spending_reports(
     user_id: str,
-    year: Optional[int] = None,
+    year: Optional[int] = Query(None, ge=MIN_YEAR, le=MAX_YEAR),
     limit: int = 12,
     support_service: SupportService = Depends(get_support_service),
 ):
@@ -91,11 +150,15 @@ async def get_user_spending_reports(
     return reports
 
 
-@router.get("/spending-reports/{user_id}/{year}/{month}", response_model=SpendingReport)
+@router.get(
+    "/spending-reports/{user_id}/{year}/{month}",
+    response_model=SpendingReport,
+    dependencies=[Depends(require_self)],
+)
 async def get_spending_report(
     user_id: str,
-    year: int,
-    month: int,
+    year: int = Path(..., ge=MIN_YEAR, le=MAX_YEAR),
+    month: int = Path(..., ge=1, le=12),
     support_service: SupportService = Depends(get_support_service),
 ):
     """Get a specific spending report for a user, year, and month"""
@@ -109,11 +172,12 @@ async def get_spending_report(
     "/spending-reports",
     response_model=SpendingReport,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(require_self)],
 )
 async def generate_spending_report(
     user_id: str,
-    year: int,
-    month: int,
+    year: int = Query(..., ge=MIN_YEAR, le=MAX_YEAR),
+    month: int = Query(..., ge=1, le=12),
     support_service: SupportService = Depends(get_support_service),
 ):
     """Generate a new spending report for a user, year, and month"""
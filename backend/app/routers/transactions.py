@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from typing import List, Optional
 
 from app.models import (
+    Currency,
     Transaction,
     TransactionCreate,
     TransactionUpdate,
@@ -9,6 +10,17 @@ from app.models import (
     TransactionStatus,
 )
 from app.core.database import get_database
+from app.core.security import (
+    Principal,
+    check_owner,
+    get_current_principal,
+    is_caller,
+    is_group_member,
+    require_group_member,
+    require_self,
+    scope_to_caller,
+)
+from app.core.fieldsets import FieldSet, fieldset_query
 from app.services.transaction_service import TransactionService
 
 router = APIRouter()
@@ -19,12 +31,49 @@ def get_transaction_service():
     return TransactionService(db)
 
 
+async def get_visible_transaction(
+    transaction_id: str,
+    principal: Optional[Principal] = Depends(get_current_principal),
+    transaction_service: TransactionService = Depends(get_transaction_service),
+) -> Transaction:
+    """The route's transaction, if the caller paid, shares it or is in its group"""
+    transaction = await transaction_service.get_transaction_by_id(transaction_id)
+    if not transaction:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    if not (
+        is_caller(principal, transaction.user_id, *transaction.participants)
+        or (
+            transaction.group_id
+            and await is_group_member(principal, transaction.group_id)
+        )
+    ):
+        raise HTTPException(
+            status_code=403, detail="Not allowed to see this transaction"
+        )
+    return transaction
+
+
+async def get_owned_transaction(
+    principal: Optional[Principal] = Depends(get_current_principal),
+    transaction: Transaction = Depends(get_visible_transaction),
+) -> Transaction:
+    """The route's transaction, if the caller paid it"""
+    check_owner(principal, transaction.user_id)
+    return transaction
+
+
 @router.post("/", response_model=Transaction, status_code=status.HTTP_201_CREATED)
 async def create_transaction(
     transaction_data: TransactionCreate,
+    principal: Optional[Principal] = Depends(get_current_principal),
     transaction_service: TransactionService = Depends(get_transaction_service),
 ):
-    """Create a new transaction"""
+    """Create a new transaction paid by the caller"""
+    check_owner(principal, transaction_data.user_id)
+    if transaction_data.group_id and not await is_group_member(
+        principal, transaction_data.group_id
+    ):
+        raise HTTPException(status_code=403, detail="Not a member of this group")
     transaction = await transaction_service.create_transaction(transaction_data)
     return transaction
 
@@ -37,33 +86,38 @@ async def get_transactions(
     group_id: Optional[str] = None,
     transaction_type: Optional[TransactionType] = None,
     status: Optional[TransactionStatus] = None,
+    fieldset: Optional[FieldSet] = Depends(fieldset_query(Transaction)),
+    principal: Optional[Principal] = Depends(get_current_principal),
     transaction_service: TransactionService = Depends(get_transaction_service),
 ):
-    """Get all transactions with optional filtering"""
+    """Get the caller's transactions with optional filtering"""
     transactions = await transaction_service.get_transactions(
         skip=skip,
         limit=limit,
-        user_id=user_id,
+        user_id=scope_to_caller(user_id, principal),
         group_id=group_id,
         transaction_type=transaction_type,
         status=status,
+        fieldset=fieldset,
     )
+    if fieldset:
+        return fieldset.response(transactions)
     return transactions
 
 
 @router.get("/{transaction_id}", response_model=Transaction)
 async def get_transaction(
-    transaction_id: str,
-    transaction_service: TransactionService = Depends(get_transaction_service),
+    transaction: Transaction = Depends(get_visible_transaction),
 ):
     """Get a specific transaction by ID"""
-    transaction = await transaction_service.get_transaction_by_id(transaction_id)
-    if not transaction:
-        raise HTTPException(status_code=404, detail="Transaction not found")
     return transaction
 
 
-@router.get("/user/{user_id}", response_model=List[Transaction])
+@router.get(
+    "/user/{user_id}",
+    response_model=List[Transaction],
+    dependencies=[Depends(require_self)],
+)
 async def get_user_transactions(
     user_id: str,
     skip: int = 0,
@@ -77,7 +131,11 @@ async def get_user_transactions(
     return transactions
 
 
-@router.get("/group/{group_id}", response_model=List[Transaction])
+@router.get(
+    "/group/{group_id}",
+    response_model=List[Transaction],
+    dependencies=[Depends(require_group_member)],
+)
 async def get_group_transactions(
     group_id: str,
     skip: int = 0,
@@ -91,7 +149,11 @@ async def get_group_transactions(
     return transactions
 
 
-@router.put("/{transaction_id}", response_model=Transaction)
+@router.put(
+    "/{transaction_id}",
+    response_model=Transaction,
+    dependencies=[Depends(get_owned_transaction)],
+)
 async def update_transaction(
     transaction_id: str,
     transaction_data: TransactionUpdate,
@@ -106,7 +168,7 @@ async def update_transaction(
     return transaction
 
 
-@router.delete("/{transaction_id}")
+@router.delete("/{transaction_id}", dependencies=[Depends(get_owned_transaction)])
 async def delete_transaction(
     transaction_id: str,
     transaction_service: TransactionService = Depends(get_transaction_service),
@@ -118,7 +180,7 @@ async def delete_transaction(
     return {"message": "Transaction deleted successfully"}
 
 
-@router.patch("/{transaction_id}/status")
+@router.patch("/{transaction_id}/status", dependencies=[Depends(get_owned_transaction)])
 async def update_transaction_status(
     transaction_id: str,
     status: TransactionStatus,
@@ -133,11 +195,12 @@ async def update_transaction_status(
     return transaction
 
 
-@router.get("/user/{user_id}/summary")
+@router.get("/user/{user_id}/summary", dependencies=[Depends(require_self)])
 async def get_user_transaction_summary(
     user_id: str,
+    currency: Currency = Currency.INR,
     transaction_service: TransactionService = Depends(get_transaction_service),
 ):
-    """Get transaction summary for a user"""
-    summary = await transaction_service.get_user_transaction_summary(user_id)
+    """Get transaction summary for a user, amounts by status in ``currency``"""
+    summary = await transaction_service.get_user_transaction_summary(user_id, currency)
     return summary
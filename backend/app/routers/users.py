@@ -1,12 +1,21 @@
 from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import datetime
 
-from app.models import User, UserCreate, UserUpdate
+from app.models import User, UserCreate, UserPublic, UserSignup, UserUpdate
 from app.core.database import get_database
+from app.core.security import (
+    Principal,
+    create_access_token,
+    get_current_principal,
+    is_caller,
+    require_self,
+)
 from app.services.user_service import UserService
 
 router = APIRouter()
+# Mounted without the bearer-token dependency
+public_router = APIRouter()
 
 
 def get_user_service():
@@ -14,61 +23,69 @@ def get_user_service():
     return UserService(db)
 
 
-@router.post("/", response_model=User, status_code=status.HTTP_201_CREATED)
+@public_router.post("/", response_model=UserSignup, status_code=status.HTTP_201_CREATED)
 async def create_user(
     user_data: UserCreate, user_service: UserService = Depends(get_user_service)
 ):
-    """Create a new user"""
+    """Sign up: create a new user and return it with an access token"""
     try:
         user = await user_service.create_user(user_data)
-        return user
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return UserSignup(
+        **user.model_dump(by_alias=True), access_token=create_access_token(str(user.id))
+    )
 
 
-@router.get("/", response_model=List[User])
+@router.get("/", response_model=List[UserPublic])
 async def get_users(
     skip: int = 0,
     limit: int = 100,
     user_service: UserService = Depends(get_user_service),
 ):
-    """Get all users with pagination"""
+    """Get all users' public profiles with pagination"""
     users = await user_service.get_users(skip=skip, limit=limit)
     return users
 
 
-@router.get("/{user_id}", response_model=User)
-async def get_user(user_id: str, user_service: UserService = Depends(get_user_service)):
-    """Get a specific user by ID"""
+@router.get("/{user_id}", response_model=Union[User, UserPublic])
+async def get_user(
+    user_id: str,
+    principal: Optional[Principal] = Depends(get_current_principal),
+    user_service: UserService = Depends(get_user_service),
+):
+    """Get a user by ID; the full profile only for the user themselves"""
     user = await user_service.get_user_by_id(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    if is_caller(principal, user_id):
+        return user
+    return UserPublic.model_validate(user.model_dump(by_alias=True))
 
 
-@router.get("/email/{email}", response_model=User)
+@router.get("/email/{email}", response_model=UserPublic)
 async def get_user_by_email(
     email: str, user_service: UserService = Depends(get_user_service)
 ):
-    """Get a user by email"""
+    """Get a user's public profile by email"""
     user = await user_service.get_user_by_email(email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
-@router.get("/username/{username}", response_model=User)
+@router.get("/username/{username}", response_model=UserPublic)
 async def get_user_by_username(
     username: str, user_service: UserService = Depends(get_user_service)
 ):
-    """Get a user by username"""
+    """Get a user's public profile by username"""
     user = await user_service.get_user_by_username(username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
-@router.put("/{user_id}", response_model=User)
+@router.put("/{user_id}", response_model=User, dependencies=[Depends(require_self)])
 async def update_user(
     user_id: str,
     user_data: UserUpdate,
@@ -81,7 +98,7 @@ async def update_user(
     return user
 
 
-@router.delete("/{user_id}")
+@router.delete("/{user_id}", dependencies=[Depends(require_self)])
 async def delete_user(
     user_id: str, user_service: UserService = Depends(get_user_service)
 ):
@@ -0,0 +1,301 @@
+from typing import List, Optional, Dict, Any
+from datetime import datetime, timedelta
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
+from pydantic import TypeAdapter
+
+from app.core.archive import (
+    ARCHIVE_COLLECTIONS,
+    find_one_with_archive,
+    find_with_archive,
+    get_archive_cutoff,
+)
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.fieldsets import FieldSet
+from app.core.money import decode_amounts, encode_amounts, minor_units, to_major
+from app.core.profiling import profile_section
+from app.core.singleflight import SingleFlight
+from app.models import ActivityItem, Currency, TransactionType
+from app.services.balance_service import BalanceService
+from app.services.membership_service import MembershipService
+
+# Validating a whole page in one call skips per-document Python overhead
+_activity_list = TypeAdapter(List[ActivityItem])
+
+# Concurrent identical group timeline reads share one query
+_group_flight = SingleFlight("activities.group", ttl=settings.coalescing_cache_ttl)
+
+# Stats are keyed by (user_id, days) and shared across requests
+_stats_cache = TTLCache(ttl=settings.activity_stats_cache_ttl, maxsize=4096)
+
+
+class ActivityService:
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        self.collection = database.activities
+
+    async def create_activity(self, activity: ActivityItem) -> ActivityItem:
+        """Record a new activity"""
+        await self.create_activities([activity])
+        return activity
+
+    async def create_activities(self, activities: List[ActivityItem]) -> None:
+        """Record many activities with a single insert"""
+        if not activities:
+            return
+
+        participants = set()
+        group_ids = set()
+        activity_docs = []
+        for activity in activities:
+            # The creator is always a participant so per-user queries only need
+            # the (participants, timestamp) index
+            if activity.created_by not in activity.participants:
+                activity.participants.append(activity.created_by)
+            participants.update(activity.participants)
+            group_ids.add(activity.group_id)
+            activity_docs.append(
+                encode_amounts(activity.model_dump(by_alias=True), "activities")
+            )
+
+        await self.collection.insert_many(activity_docs, ordered=False)
+        _stats_cache.evict_if(lambda key: key[0] in participants)
+        _group_flight.forget_if(lambda key: key[0] in group_ids)
+
+    async def get_activities(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        user_id: Optional[str] = None,
+        group_id: Optional[str] = None,
+        activity_type: Optional[TransactionType] = None,
+        since_date: Optional[datetime] = None,
+        fieldset: Optional[FieldSet] = None,
+    ) -> List[ActivityItem]:
+        """Get all activities with optional filtering"""
+        filter_dict: Dict[str, Any] = {}
+        if user_id:
+            filter_dict["participants"] = user_id
+        if group_id:
+            filter_dict["group_id"] = group_id
+        if activity_type:
+            filter_dict["type"] = activity_type
+        if since_date:
+            filter_dict["timestamp"] = {"$gte": since_date}
+
+        return await self._find(filter_dict, skip, limit, since_date, fieldset)
+
+    async def get_activity_by_id(self, activity_id: str) -> Optional[ActivityItem]:
+        """Get an activity by ID"""
+        try:
+            activity_doc = await find_one_with_archive(
+                self.database, "activities", {"_id": ObjectId(activity_id)}
+            )
+            if activity_doc:
+                return ActivityItem.model_validate(
+                    decode_amounts(activity_doc, "activities")
+                )
+        except Exception:
+            pass
+        return None
+
+    async def get_activities_by_user(
+        self,
+        user_id: str,
+        skip: int = 0,
+        limit: int = 50,
+        since_date: Optional[datetime] = None,
+    ) -> List[ActivityItem]:
+        """Get all activities a user took part in"""
+        return await self.get_activities(
+            skip=skip, limit=limit, user_id=user_id, since_date=since_date
+        )
+
+    async def get_activities_by_group(
+        self,
+        group_id: str,
+        skip: int = 0,
+        limit: int = 50,
+        since_date: Optional[datetime] = None,
+    ) -> List[ActivityItem]:
+        """Get all activities for a group"""
+        if since_date:
+            # "Last N days" windows computed a moment apart should coalesce
+            since_date = since_date.replace(second=0, microsecond=0)
+        return await _group_flight.do(
+            (group_id, skip, limit, since_date),
+            lambda: self.get_activities(
+                skip=skip, limit=limit, group_id=group_id, since_date=since_date
+            ),
+        )
+
+    async def get_activity_feed(
+        self, user_id: str, skip: int = 0, limit: int = 20
+    ) -> List[ActivityItem]:
+        """Get the user's own activities plus those of every group they belong to"""
+        group_ids = await MembershipService(self.database).get_group_ids(user_id)
+        filter_dict = {
+            "$or": [{"participants": user_id}, {"group_id": {"$in": list(group_ids)}}]
+        }
+        return await self._find(filter_dict, skip, limit)
+
+    async def get_activity_stats(
+        self, user_id: str, days: int = 30, currency: Currency = Currency.INR
+    ) -> Dict[str, Any]:
+        """Get activity counts and amounts by type, status, group and day
+
+        Every bucket is summed per currency in Mongo and converted to
+        ``currency`` row by row, so mixed-currency amounts are never added
+        raw. ``by_currency`` keeps each currency's own total.
+        """
+        cache_key = (user_id, days, currency)
+        cached = _stats_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        since_date = datetime.utcnow() - timedelta(days=days)
+        totals = {"count": {"$sum": 1}, "amount": {"$sum": minor_units()}}
+
+        def per_currency(key: Any) -> Dict[str, Any]:
+            return {"_id": {"key": key, "currency": "$currency"}, **totals}
+
+        match = {"$match": {"participants": user_id, "timestamp": {"$gte": since_date}}}
+        pipeline: List[Dict[str, Any]] = [match]
+        cutoff = await get_archive_cutoff(self.database, "activities")
+        if cutoff and since_date < cutoff:
+            pipeline.append(
+                {
+                    "$unionWith": {
+                        "coll": ARCHIVE_COLLECTIONS["activities"],
+                        "pipeline": [match],
+                    }
+                }
+            )
+        pipeline.append(
+            {
+                "$facet": {
+                    "by_type": [{"$group": per_currency("$type")}],
+                    "by_status": [{"$group": per_currency("$status")}],
+                    "by_group": [
+                        {"$match": {"group_id": {"$ne": None}}},
+                        {
+                            "$group": {
+                                **per_currency("$group_id"),
+                                "group_name": {"$first": "$group_name"},
+                            }
+                        },
+                    ],
+                    "timeline": [
+                        {
+                            "$group": per_currency(
+                                {
+                                    "$dateToString": {
+                                        "format": "%Y-%m-%d",
+                                        "date": "$timestamp",
+                                    }
+                                }
+                            )
+                        }
+                    ],
+                }
+            }
+        )
+
+        result = await self.collection.aggregate(pipeline).to_list(length=1)
+        facets = result[0] if result else {}
+        rates = BalanceService.CURRENCY_RATES
+        target_rate = rates.get(Currency(currency), 1.0)
+
+        def convert(row: Dict[str, Any]) -> float:
+            # Sums are exact minor units of the row's own currency
+            row_currency = row["_id"]["currency"] or Currency.INR
+            major = to_major(row["amount"], row_currency)
+            return major * rates.get(Currency(row_currency), 1.0) / target_rate
+
+        def bucket(name: str) -> Dict[Any, Dict[str, Any]]:
+            merged: Dict[Any, Dict[str, Any]] = {}
+            for row in facets.get(name, []):
+                entry = merged.setdefault(
+                    row["_id"]["key"], {"count": 0, "amount": 0.0}
+                )
+                entry["count"] += row["count"]
+                entry["amount"] += convert(row)
+                if "group_name" in row:
+                    entry.setdefault("group_name", row["group_name"])
+            for entry in merged.values():
+                entry["amount"] = round(entry["amount"], 2)
+            return merged
+
+        by_type = bucket("by_type")
+        by_currency: Dict[str, Dict[str, Any]] = {}
+        for row in facets.get("by_type", []):
+            row_currency = row["_id"]["currency"] or Currency.INR
+            entry = by_currency.setdefault(row_currency, {"count": 0, "amount": 0})
+            entry["count"] += row["count"]
+            entry["amount"] += row["amount"]
+
+        by_group = sorted(
+            (
+                {
+                    "group_id": group_id,
+                    "group_name": entry.get("group_name"),
+                    "count": entry["count"],
+                    "amount": entry["amount"],
+                }
+                for group_id, entry in bucket("by_group").items()
+            ),
+            key=lambda row: row["amount"],
+            reverse=True,
+        )
+
+        stats = {
+            "user_id": user_id,
+            "days": days,
+            "since": since_date,
+            "currency": currency,
+            "total_count": sum(entry["count"] for entry in by_type.values()),
+            "total_amount": round(
+                sum(entry["amount"] for entry in by_type.values()), 2
+            ),
+            "by_type": by_type,
+            "by_status": bucket("by_status"),
+            "by_currency": {
+                code: {
+                    "count": entry["count"],
+                    "amount": to_major(entry["amount"], code),
+                }
+                for code, entry in by_currency.items()
+            },
+            "by_group": by_group,
+            "timeline": [
+                {"date": date, **entry}
+                for date, entry in sorted(bucket("timeline").items())
+            ],
+        }
+        _stats_cache.set(cache_key, stats)
+        return stats
+
+    async def _find(
+        self,
+        filter_dict: Dict[str, Any],
+        skip: int,
+        limit: int,
+        since_date: Optional[datetime] = None,
+        fieldset: Optional[FieldSet] = None,
+    ) -> List[ActivityItem]:
+        activity_docs = await find_with_archive(
+            self.database,
+            "activities",
+            filter_dict,
+            "timestamp",
+            skip,
+            limit,
+            since_date=since_date,
+            projection=fieldset.projection if fieldset else None,
+        )
+        adapter = fieldset.adapter if fieldset else _activity_list
+        with profile_section("model"):
+            return adapter.validate_python(
+                [decode_amounts(doc, "activities") for doc in activity_docs]
+            )
@@ -0,0 +1,176 @@
+from typing import Iterable, List, Optional, Dict, Any, Tuple
+from collections import defaultdict
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson.int64 import Int64
+
+from app.core.money import to_major, to_minor
+from app.models import Currency
+
+
+class BalanceHistoryService:
+    """Append-only record of every balance change, with periodic snapshots
+
+    ``balance_events`` holds one document per (user, currency) change in minor
+    units and is never updated. ``balance_snapshots`` holds the balance of a
+    (user, currency) as of a point in time, written by
+    ``app.jobs.snapshot_balances``. A balance at any moment is the latest
+    snapshot before it plus the events after that snapshot, so the work is
+    bounded by one snapshot interval rather than the whole history.
+    """
+
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        self.events = database.balance_events
+        self.snapshots = database.balance_snapshots
+
+    async def record(
+        self,
+        changes: Iterable[Tuple[str, Currency, int]],
+        source: str,
+        refs: Optional[List[str]] = None,
+    ) -> None:
+        """Append (user, currency, minor-unit delta) events; zero deltas are skipped"""
+        now = datetime.utcnow()
+        totals: Dict[Tuple[str, Currency], int] = defaultdict(int)
+        for user_id, currency, delta in changes:
+            totals[(user_id, currency)] += delta
+
+        event_docs = [
+            {
+                "user_id": user_id,
+                "currency": currency,
+                "delta": Int64(delta),
+                "source": source,
+                "refs": refs or [],
+                "created_at": now,
+            }
+            for (user_id, currency), delta in totals.items()
+            if delta
+        ]
+        if event_docs:
+            await self.events.insert_many(event_docs, ordered=False)
+
+    async def get_events(
+        self,
+        user_id: str,
+        currency: Optional[Currency] = None,
+        skip: int = 0,
+        limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        """Get a user's balance changes, newest first"""
+        filter_dict: Dict[str, Any] = {"user_id": user_id}
+        if currency:
+            filter_dict["currency"] = currency
+
+        cursor = (
+            self.events.find(filter_dict)
+            .sort([("created_at", -1), ("_id", -1)])
+            .skip(skip)
+            .limit(limit)
+        )
+        return [
+            {
+                "id": str(event["_id"]),
+                "currency": event["currency"],
+                "delta": to_major(event["delta"], event["currency"]),
+                "source": event["source"],
+                "refs": event.get("refs", []),
+                "created_at": event["created_at"],
+            }
+            for event in await cursor.to_list(length=limit)
+        ]
+
+    async def get_balances_as_of(
+        self, user_id: str, as_of: Optional[datetime] = None
+    ) -> Dict[str, int]:
+        """A user's balance per currency, in minor units, at a point in time"""
+        as_of = as_of or datetime.utcnow()
+
+        # Latest snapshot per currency at or before the requested time
+        snapshots = await self.snapshots.aggregate(
+            [
+                {"$match": {"user_id": user_id, "as_of": {"$lte": as_of}}},
+                {"$sort": {"as_of": -1}},
+                {
+                    "$group": {
+                        "_id": "$currency",
+                        "amount": {"$first": "$amount"},
+                        "as_of": {"$first": "$as_of"},
+                    }
+                },
+            ]
+        ).to_list(length=None)
+
+        # Replay only the tail after each currency's snapshot
+        tails: List[Dict[str, Any]] = [
+            {"currency": s["_id"], "created_at": {"$gte": s["as_of"]}}
+            for s in snapshots
+        ]
+        tails.append({"currency": {"$nin": [s["_id"] for s in snapshots]}})
+        events = await self.events.aggregate(
+            [
+                {
+                    "$match": {
+                        "user_id": user_id,
+                        "created_at": {"$lt": as_of},
+                        "$or": tails,
+                    }
+                },
+                {"$group": {"_id": "$currency", "delta": {"$sum": "$delta"}}},
+            ]
+        ).to_list(length=None)
+
+        balances: Dict[str, int] = defaultdict(int)
+        for row in snapshots:
+            balances[row["_id"]] += row["amount"]
+        for row in events:
+            balances[row["_id"]] += row["delta"]
+        return dict(balances)
+
+    async def _stored_balances(self, user_id: str) -> Dict[str, int]:
+        """A user's stored balance per currency, in minor units"""
+        docs = await self.database.balances.find(
+            {"user_id": user_id}, {"currency": 1, "amount": 1}
+        ).to_list(length=None)
+        stored: Dict[str, int] = defaultdict(int)
+        for doc in docs:
+            amount = doc.get("amount") or 0
+            # Legacy documents store major-unit doubles
+            if isinstance(amount, float):
+                amount = to_minor(amount, doc["currency"])
+            stored[doc["currency"]] += int(amount)
+        return dict(stored)
+
+    async def reconcile_history(
+        self, user_id: str, attempts: int = 3
+    ) -> Optional[Dict[str, int]]:
+        """Append ``reconcile`` events so the log replays to the stored balances
+
+        Stored balances are never written here: the gap between each stored
+        balance and the replayed log (balances from before the log existed,
+        or changes that missed an event) is recorded as a correction, so the
+        log explains the stored value again. Drift between stored balances
+        and transactions is repaired by ``app.jobs.reconcile_balances``,
+        which leaves ``reconcile`` events out of its expected sums.
+
+        Returns the correction per currency, or ``None`` if the balances
+        kept changing while being read.
+        """
+        for _ in range(attempts):
+            stored = await self._stored_balances(user_id)
+            replayed = await self.get_balances_as_of(user_id)
+            # A change between the two reads would be counted twice or not at all
+            if await self._stored_balances(user_id) != stored:
+                continue
+            corrections = {
+                currency: stored.get(currency, 0) - replayed.get(currency, 0)
+                for currency in set(stored) | set(replayed)
+            }
+            corrections = {c: gap for c, gap in corrections.items() if gap}
+            await self.record(
+                [(user_id, c, gap) for c, gap in corrections.items()],
+                source="reconcile",
+            )
+            return corrections
+        return None
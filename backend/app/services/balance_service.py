@@ -1,15 +1,35 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
+from bson.int64 import Int64
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 
+from app.core.config import settings
+from app.core.money import decode_amounts, encode_amounts, minor_units, to_minor
+from app.core.profiling import profile_section
+from app.core.singleflight import SingleFlight
 from app.models import Balance, BalanceCreate, BalanceUpdate, Currency
+from app.services.balance_history_service import BalanceHistoryService
+
+# Concurrent total-balance reads for the same user share one aggregation
+_total_flight = SingleFlight("balances.user_total", ttl=settings.coalescing_cache_ttl)
+
+
+def _stored_minor(balance_doc: dict) -> int:
+    # Legacy documents store major-unit doubles
+    amount = balance_doc.get("amount", 0)
+    if isinstance(amount, float):
+        return to_minor(amount, balance_doc.get("currency") or Currency.INR)
+    return amount
 
 
 class BalanceService:
     def __init__(self, database: AsyncIOMotorDatabase):
         self.database = database
         self.collection = database.balances
+        self.history = BalanceHistoryService(database)
 
     # Currency conversion rates (simplified - in production, use real-time rates)
     CURRENCY_RATES = {
@@ -27,15 +47,31 @@ class BalanceService:
 
     async def create_balance(self, balance_data: BalanceCreate) -> Balance:
         """Create a new balance record"""
-        balance_dict = balance_data.dict()
+        balance_dict = balance_data.model_dump()
         balance_dict["last_activity"] = datetime.utcnow()
         balance_dict["created_at"] = datetime.utcnow()
         balance_dict["updated_at"] = datetime.utcnow()
 
-        result = await self.collection.insert_one(balance_dict)
+        try:
+            result = await self.collection.insert_one(
+                encode_amounts(balance_dict, "balances")
+            )
+        except DuplicateKeyError:
+            raise ValueError("A balance in this currency already exists for the user")
         balance_dict["_id"] = result.inserted_id
+        _total_flight.forget(balance_dict["user_id"])
+        await self.history.record(
+            [
+                (
+                    balance_dict["user_id"],
+                    balance_dict["currency"],
+                    balance_dict["amount"],
+                )
+            ],
+            source="opening",
+        )
 
-        return Balance(**balance_dict)
+        return Balance.model_validate(decode_amounts(balance_dict, "balances"))
 
     async def get_balances(
         self, skip: int = 0, limit: int = 100, user_id: Optional[str] = None
@@ -51,17 +87,19 @@ class BalanceService:
             .limit(limit)
             .sort("last_activity", -1)
         )
-        balances = []
-        async for balance_doc in cursor:
-            balances.append(Balance(**balance_doc))
-        return balances
+        balance_docs = await cursor.to_list(length=None)
+        with profile_section("model"):
+            return [
+                Balance.model_validate(decode_amounts(balance_doc, "balances"))
+                for balance_doc in balance_docs
+            ]
 
     async def get_balance_by_id(self, balance_id: str) -> Optional[Balance]:
         """Get a balance by ID"""
         try:
             balance_doc = await self.collection.find_one({"_id": ObjectId(balance_id)})
             if balance_doc:
-                return Balance(**balance_doc)
+                return Balance.model_validate(decode_amounts(balance_doc, "balances"))
         except Exception:
             pass
         return None
@@ -69,10 +107,12 @@ class BalanceService:
     async def get_balances_by_user(self, user_id: str) -> List[Balance]:
         """Get all balances for a specific user"""
         cursor = self.collection.find({"user_id": user_id}).sort("last_activity", -1)
-        balances = []
-        async for balance_doc in cursor:
-            balances.append(Balance(**balance_doc))
-        return balances
+        balance_docs = await cursor.to_list(length=None)
+        with profile_section("model"):
+            return [
+                Balance.model_validate(decode_amounts(balance_doc, "balances"))
+                for balance_doc in balance_docs
+            ]
 
     async def update_balance(
         self, balance_id: str, balance_data: BalanceUpdate
@@ -80,20 +120,46 @@ class BalanceService:
         """Update a balance"""
         try:
             update_dict = {
-                k: v for k, v in balance_data.dict().items() if v is not None
+                k: v for k, v in balance_data.model_dump().items() if v is not None
             }
             if not update_dict:
                 return await self.get_balance_by_id(balance_id)
 
+            if "amount" in update_dict and "currency" not in update_dict:
+                balance_doc = await self.collection.find_one(
+                    {"_id": ObjectId(balance_id)}, {"currency": 1}
+                )
+                if not balance_doc:
+                    return None
+                encode_amounts(update_dict, "balances", balance_doc.get("currency"))
+            else:
+                encode_amounts(update_dict, "balances")
+
             update_dict["updated_at"] = datetime.utcnow()
             update_dict["last_activity"] = datetime.utcnow()
 
-            result = await self.collection.update_one(
-                {"_id": ObjectId(balance_id)}, {"$set": update_dict}
+            before = await self.collection.find_one_and_update(
+                {"_id": ObjectId(balance_id)},
+                {"$set": update_dict},
+                return_document=ReturnDocument.BEFORE,
             )
+            if not before:
+                return None
 
-            if result.modified_count:
-                return await self.get_balance_by_id(balance_id)
+            _total_flight.forget(before["user_id"])
+            # Recorded as closing the old (currency, amount) and opening the new
+            await self.history.record(
+                [
+                    (before["user_id"], before["currency"], -_stored_minor(before)),
+                    (
+                        before["user_id"],
+                        update_dict.get("currency", before["currency"]),
+                        update_dict.get("amount", _stored_minor(before)),
+                    ),
+                ],
+                source="manual",
+            )
+            return await self.get_balance_by_id(balance_id)
         except Exception:
             pass
         return None
@@ -101,18 +167,44 @@ class BalanceService:
     async def delete_balance(self, balance_id: str) -> bool:
         """Delete a balance"""
         try:
-            result = await self.collection.delete_one({"_id": ObjectId(balance_id)})
-            return result.deleted_count > 0
+            balance_doc = await self.collection.find_one_and_delete(
+                {"_id": ObjectId(balance_id)},
+                {"user_id": 1, "currency": 1, "amount": 1},
+            )
+            if not balance_doc:
+                return False
+            _total_flight.forget(balance_doc["user_id"])
+            await self.history.record(
+                [
+                    (
+                        balance_doc["user_id"],
+                        balance_doc["currency"],
+                        -_stored_minor(balance_doc),
+                    )
+                ],
+                source="closing",
+            )
+            return True
         except Exception:
             return False
 
     async def get_user_total_balance(self, user_id: str) -> float:
         """Get total balance for a user across all currencies (converted to INR)"""
-        balances = await self.get_balances_by_user(user_id)
-        total_inr = 0.0
+        return await _total_flight.do(
+            user_id, lambda: self._get_user_total_balance(user_id)
+        )
 
-        for balance in balances:
-            total_inr += self.convert_to_inr(balance.amount, balance.currency)
+    async def _get_user_total_balance(self, user_id: str) -> float:
+        # Exact per-currency sums in minor units; only one row per currency
+        # comes back, so the float conversion happens a handful of times
+        pipeline = [
+            {"$match": {"user_id": user_id}},
+            {"$group": {"_id": "$currency", "amount": {"$sum": minor_units()}}},
+        ]
+        total_inr = 0.0
+        async for row in self.collection.aggregate(pipeline):
+            amount = decode_amounts(row, "balances", row["_id"])["amount"]
+            total_inr += self.convert_to_inr(amount, row["_id"])
 
         return total_inr
 
@@ -121,24 +213,21 @@ class BalanceService:
     ) -> bool:
         """Update balance amount for a user (add or subtract)"""
         try:
-            # Find or create balance record for this user and currency
-            balance_doc = await self.collection.find_one(
-                {"user_id": user_id, "currency": currency}
+            # Apply the change atomically in minor units
+            delta = to_minor(amount_change, currency)
+            result = await self.collection.update_one(
+                {"user_id": user_id, "currency": currency},
+                {
+                    "$inc": {"amount": delta},
+                    "$set": {
+                        "last_activity": datetime.utcnow(),
+                        "updated_at": datetime.utcnow(),
+                    },
+                },
             )
 
-            if balance_doc:
-                # Update existing balance
-                new_amount = balance_doc["amount"] + amount_change
-                result = await self.collection.update_one(
-                    {"_id": balance_doc["_id"]},
-                    {
-                        "$set": {
-                            "amount": new_amount,
-                            "last_activity": datetime.utcnow(),
-                            "updated_at": datetime.utcnow(),
-                        }
-                    },
-                )
+            if result.matched_count:
+                await self.history.record([(user_id, currency, delta)], source="manual")
                 return result.modified_count > 0
             else:
                 # Create new balance record if amount_change is positive
@@ -155,4 +244,83 @@ class BalanceService:
 
         except Exception:
             pass
+        finally:
+            _total_flight.forget(user_id)
         return False
+
+    async def merge_duplicates(self) -> int:
+        """Fold every (user, currency) pair's extra documents into its oldest
+
+        Returns how many documents were merged away. A document whose amount
+        changes while it is merged is left for the next pass.
+        """
+        pipeline = [
+            {"$sort": {"created_at": 1, "_id": 1}},
+            {
+                "$group": {
+                    "_id": {"user_id": "$user_id", "currency": "$currency"},
+                    "ids": {"$push": "$_id"},
+                }
+            },
+            {"$match": {"ids.1": {"$exists": True}}},
+        ]
+        merged = 0
+        async for group in self.collection.aggregate(pipeline):
+            keeper_id, *extra_ids = group["ids"]
+            for extra_id in extra_ids:
+                extra = await self.collection.find_one({"_id": extra_id})
+                if extra is None:
+                    continue
+                # Only the amount just read is moved, so a racing $inc isn't lost
+                removed = await self.collection.find_one_and_delete(
+                    {"_id": extra_id, "amount": extra["amount"]}
+                )
+                if removed is None:
+                    continue
+                await self.collection.update_one(
+                    {"_id": keeper_id},
+                    {
+                        "$inc": {"amount": Int64(_stored_minor(removed))},
+                        "$max": {"last_activity": removed["last_activity"]},
+                    },
+                )
+                merged += 1
+        return merged
+
+    async def apply_balance_deltas(
+        self,
+        deltas: Dict[Tuple[str, Currency], int],
+        source: str = "transaction",
+        refs: Optional[List[str]] = None,
+    ) -> None:
+        """Apply many (user, currency) changes, in minor units, in one round trip"""
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"user_id": user_id, "currency": currency},
+                {
+                    "$inc": {"amount": Int64(delta)},
+                    "$set": {"last_activity": now, "updated_at": now},
+                    "$setOnInsert": {
+                        "name": "Auto-generated",
+                        "avatar": "",
+                        "created_at": now,
+                    },
+                },
+                upsert=True,
+            )
+            for (user_id, currency), delta in deltas.items()
+            if delta
+        ]
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+        for user_id, _ in deltas:
+            _total_flight.forget(user_id)
+        await self.history.record(
+            [
+                (user_id, currency, delta)
+                for (user_id, currency), delta in deltas.items()
+            ],
+            source=source,
+            refs=refs,
+        )
@@ -0,0 +1,101 @@
+from typing import Any, Dict, List, Set, Tuple
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.cache import TTLCache
+from app.core.categorizer import get_categorizer, title_key
+from app.core.config import settings
+from app.core.profiling import profile_section
+
+# Where a transaction's category came from; only the automatic ones are
+# ever recomputed
+SOURCE_USER = "user"
+SOURCE_OVERRIDE = "override"
+SOURCE_MODEL = "model"
+AUTO_SOURCES = (SOURCE_OVERRIDE, SOURCE_MODEL)
+
+# Title key -> model category; the model is fixed, so entries never go stale
+_category_cache = TTLCache(
+    ttl=settings.categorizer_cache_ttl,
+    maxsize=settings.categorizer_cache_size,
+    lru=True,
+)
+
+
+class CategoryService:
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        self.overrides = database.category_overrides
+
+    async def categorize(
+        self, transaction_docs: List[Dict[str, Any]], recategorize: bool = False
+    ) -> int:
+        """Fill in ``category`` on stored-form transactions, in place
+
+        A user's own override for the title wins, then the model. Documents
+        whose category was set by hand are left alone, as are automatic ones
+        unless ``recategorize``. Returns how many documents were categorized.
+        """
+        pending = [
+            doc
+            for doc in transaction_docs
+            if not doc.get("category")
+            or (recategorize and doc.get("category_source") in AUTO_SOURCES)
+        ]
+        if not pending:
+            return 0
+
+        keys = [title_key(doc.get("title") or "") for doc in pending]
+        overrides = await self._load_overrides(
+            {(doc["user_id"], key) for doc, key in zip(pending, keys)}
+        )
+
+        with profile_section("categorize"):
+            categories: Dict[str, str] = {}
+            unseen = []
+            for key in dict.fromkeys(keys):
+                cached = _category_cache.get(key)
+                if cached is None:
+                    unseen.append(key)
+                else:
+                    categories[key] = cached
+            for key, category in zip(unseen, get_categorizer().predict(unseen)):
+                categories[key] = category
+                _category_cache.set(key, category)
+
+        for doc, key in zip(pending, keys):
+            override = overrides.get((doc["user_id"], key))
+            if override:
+                doc["category"], doc["category_source"] = override, SOURCE_OVERRIDE
+            else:
+                doc["category"], doc["category_source"] = categories[key], SOURCE_MODEL
+        return len(pending)
+
+    async def set_override(self, user_id: str, title: str, category: str) -> None:
+        """Remember a user's category for a title, for their future transactions"""
+        key = title_key(title)
+        if not key:
+            return
+        await self.overrides.update_one(
+            {"user_id": user_id, "key": key},
+            {"$set": {"category": category, "updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+
+    async def _load_overrides(
+        self, pairs: Set[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], str]:
+        if not pairs:
+            return {}
+        cursor = self.overrides.find(
+            {
+                "user_id": {"$in": list({user_id for user_id, _ in pairs})},
+                "key": {"$in": list({key for _, key in pairs})},
+            },
+            {"user_id": 1, "key": 1, "category": 1},
+        )
+        return {
+            (doc["user_id"], doc["key"]): doc["category"]
+            async for doc in cursor
+            if (doc["user_id"], doc["key"]) in pairs
+        }
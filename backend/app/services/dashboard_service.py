@@ -0,0 +1,107 @@
+from typing import Any, Awaitable, Callable, Dict, List
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import time
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core import deadline
+from app.core.config import settings
+from app.models import Group
+from app.services.activity_service import ActivityService
+from app.services.balance_service import BalanceService
+from app.services.group_service import GroupService
+from app.services.transaction_service import TransactionService
+
+logger = logging.getLogger(__name__)
+
+
+class DashboardService:
+    """Everything the home screen needs, gathered concurrently
+
+    Each section runs as its own task with its own timeout. A section that
+    fails or times out comes back as ``None`` and is named in ``errors``, so
+    one slow query degrades the dashboard instead of failing it.
+    """
+
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+
+    async def get_dashboard(
+        self, user_id: str, activity_limit: int = 10
+    ) -> Dict[str, Any]:
+        """Get a user's balances, groups, recent activity and transaction summary"""
+        balances = BalanceService(self.database)
+        activities = ActivityService(self.database)
+        sections: Dict[str, Callable[[], Awaitable[Any]]] = {
+            "balances": lambda: self._balances(balances, user_id),
+            "total_balance": lambda: balances.get_user_total_balance(user_id),
+            "groups": lambda: self._groups(user_id),
+            "recent_activities": lambda: activities.get_activities_by_user(
+                user_id,
+                skip=0,
+                limit=activity_limit,
+                since_date=datetime.utcnow() - timedelta(days=7),
+            ),
+            "transaction_summary": lambda: TransactionService(
+                self.database
+            ).get_user_transaction_summary(user_id),
+        }
+
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(self._section(name, load) for name, load in sections.items())
+        )
+
+        dashboard: Dict[str, Any] = {"user_id": user_id}
+        errors: Dict[str, str] = {}
+        for name, (value, error) in zip(sections, results):
+            dashboard[name] = value
+            if error:
+                errors[name] = error
+        dashboard["errors"] = errors
+        dashboard["partial"] = bool(errors)
+        dashboard["generated_in_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return dashboard
+
+    async def _section(self, name: str, load: Callable[[], Awaitable[Any]]):
+        try:
+            value = await asyncio.wait_for(
+                load(), timeout=deadline.clamp(settings.dashboard_section_timeout)
+            )
+            return value, None
+        except asyncio.TimeoutError:
+            logger.warning(f"Dashboard section {name} timed out")
+            return None, "timeout"
+        except Exception as e:
+            logger.error(f"Dashboard section {name} failed: {e}")
+            return None, "error"
+
+    async def _balances(
+        self, balances: BalanceService, user_id: str
+    ) -> List[Dict[str, Any]]:
+        return [
+            {"currency": balance.currency, "amount": balance.amount}
+            for balance in await balances.get_balances_by_user(user_id)
+        ]
+
+    async def _groups(self, user_id: str) -> List[Dict[str, Any]]:
+        groups: List[Group] = await GroupService(self.database).get_groups_by_user(
+            user_id
+        )
+        # Members are summarized; the full list is one tap away
+        return [
+            {
+                "id": str(group.id),
+                "name": group.name,
+                "avatar": group.avatar,
+                "currency": group.currency,
+                "total_expenses": group.total_expenses,
+                "member_count": len(group.members),
+                "my_balance": next(
+                    (m.balance for m in group.members if m.user_id == user_id), 0.0
+                ),
+            }
+            for group in groups
+        ]
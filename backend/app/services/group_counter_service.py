@@ -0,0 +1,415 @@
+"""
+Sharded group counters
+
+A busy group's expense writes all ``$inc`` the same document. Once a worker
+sees a group take more than ``group_counter_threshold`` writes per second it
+marks the group sharded and sends that group's increments to one of
+``group_counter_shards`` documents in ``group_counter_shards`` instead.
+
+Reads add the unfolded shard counts to the group document. A compactor
+folds shards back into the group in three steps (move the counts to
+``pending``, apply them to the group and record the fold id, clear
+``pending``), each safe to retry, and readers skip pending counts whose fold
+id the group already records. A fold can land between a reader's group and
+shard reads, leaving its counts in neither; the reader notices the group's
+last fold id has moved, re-reads the group's counters and tries again. A
+group idle for ``group_counter_idle_seconds`` goes back to direct writes.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.int64 import Int64
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument, UpdateOne
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Fields reads need, alongside the counters, to add in unfolded shards
+COUNTER_FIELDS = {"counter_shards": 1, "counter_folds": 1}
+
+# How often a worker still sending writes to shards re-marks the group, so
+# the compactor never retires a group that is in use
+_ASSERT_INTERVAL = 30.0
+# Fold ids kept on the group; a retried fold older than this could apply twice
+_FOLD_HISTORY = 64
+# Shard reads per merge before giving up on a group the compactor keeps moving
+_MERGE_ATTEMPTS = 3
+
+
+@dataclass
+class _WriteRate:
+    window_start: float
+    count: int = 0
+    hot: bool = False
+    asserted_at: float = 0.0
+
+
+@dataclass
+class GroupCounterStats:
+    direct_writes: int = 0
+    shard_writes: int = 0
+    folds: int = 0
+    retired: int = 0
+
+
+_stats = GroupCounterStats()
+_rates = TTLCache(ttl=settings.group_counter_window * 2, maxsize=10000)
+# group_id -> (last fold id seen on the group, shard counts)
+_shard_cache = TTLCache(ttl=settings.group_counter_read_cache_ttl, maxsize=10000)
+
+
+def get_group_counter_stats() -> Dict[str, Any]:
+    """Counters for the metrics endpoint"""
+    return {**asdict(_stats), "tracked_groups": len(_rates)}
+
+
+def _count_write(group_id: str) -> _WriteRate:
+    """Count a write for the group and decide whether it is hot"""
+    now = time.monotonic()
+    window = settings.group_counter_window
+    limit = settings.group_counter_threshold * window
+    rate = _rates.get(group_id) or _WriteRate(window_start=now)
+    elapsed = now - rate.window_start
+    if elapsed >= window:
+        # Judge by the window just finished, unless a whole window went by empty
+        rate.hot = elapsed < 2 * window and rate.count >= limit
+        rate.window_start, rate.count = now, 0
+    rate.count += 1
+    if rate.count >= limit:
+        rate.hot = True
+    _rates.set(group_id, rate)
+    return rate
+
+
+def _last_fold(group_doc: Dict[str, Any]) -> Optional[ObjectId]:
+    return (group_doc.get("counter_folds") or [None])[-1]
+
+
+def _member_inc(balances: Dict[str, int]) -> Tuple[Dict[str, Any], List[Dict]]:
+    inc = {}
+    array_filters = []
+    for index, (user_id, delta) in enumerate(balances.items()):
+        inc[f"members.$[m{index}].balance"] = Int64(delta)
+        array_filters.append({f"m{index}.user_id": user_id})
+    return inc, array_filters
+
+
+class GroupCounterService:
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        self.collection = database.group_counter_shards
+
+    async def apply_group_deltas(
+        self,
+        group_members: Dict[str, Dict[str, int]],
+        group_expenses: Dict[str, int],
+    ) -> None:
+        """Add member balance and expense changes (minor units) to groups"""
+        now = datetime.utcnow()
+        direct = []
+        sharded = []
+        for group_id, members in group_members.items():
+            expenses = group_expenses.get(group_id, 0)
+            rate = _count_write(group_id) if settings.group_counter_enabled else None
+            if rate is None or not rate.hot:
+                inc, array_filters = _member_inc(members)
+                inc["total_expenses"] = Int64(expenses)
+                direct.append(
+                    UpdateOne(
+                        {"_id": ObjectId(group_id)},
+                        {"$inc": inc, "$set": {"updated_at": now}},
+                        array_filters=array_filters,
+                    )
+                )
+                continue
+
+            if time.monotonic() - rate.asserted_at >= _ASSERT_INTERVAL:
+                # Readers must know to look at the shards before any lands there
+                await self.database.groups.update_one(
+                    {"_id": ObjectId(group_id)},
+                    {
+                        "$set": {
+                            "counter_shards": settings.group_counter_shards,
+                            "counters_active_at": now,
+                        }
+                    },
+                )
+                rate.asserted_at = time.monotonic()
+            inc = {f"balances.{user_id}": Int64(d) for user_id, d in members.items()}
+            inc["total_expenses"] = Int64(expenses)
+            sharded.append(
+                UpdateOne(
+                    {
+                        "group_id": group_id,
+                        "shard": random.randrange(settings.group_counter_shards),
+                    },
+                    {"$inc": inc, "$set": {"dirty": True, "updated_at": now}},
+                    upsert=True,
+                )
+            )
+            _shard_cache.delete(group_id)
+
+        if direct:
+            await self.database.groups.bulk_write(direct, ordered=False)
+            _stats.direct_writes += len(direct)
+        if sharded:
+            await self.collection.bulk_write(sharded, ordered=False)
+            _stats.shard_writes += len(sharded)
+
+    async def merge_shards(
+        self, group_docs: List[Dict[str, Any]], cached: bool = True
+    ) -> None:
+        """Add unfolded shard counts to raw (minor-unit) group documents in place"""
+        sharded = {
+            str(doc["_id"]): doc for doc in group_docs if doc.get("counter_shards")
+        }
+        if not sharded:
+            return
+
+        counts: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for group_id, doc in sharded.items():
+            entry = _shard_cache.get(group_id) if cached else None
+            if entry is not None and entry[0] == _last_fold(doc):
+                counts[group_id] = entry[1]
+            else:
+                missing.append(group_id)
+
+        for attempt in range(_MERGE_ATTEMPTS):
+            if not missing:
+                break
+            fetched = await self._read_shards(missing)
+            # The last try goes unchecked: a group folded that often in one
+            # read may come out briefly short, and isn't cached
+            checked = attempt < _MERGE_ATTEMPTS - 1
+            moved = await self._refresh_moved(sharded, missing) if checked else set()
+            for group_id, group_counts in fetched.items():
+                if group_id in moved:
+                    continue
+                if checked:
+                    # Keyed by the last fold: once the group records another
+                    # fold these counts may already be in it
+                    _shard_cache.set(
+                        group_id, (_last_fold(sharded[group_id]), group_counts)
+                    )
+                counts[group_id] = group_counts
+            missing = list(moved)
+
+        for group_id, doc in sharded.items():
+            folded = set(doc.get("counter_folds") or [])
+            total = counts[group_id]["total_expenses"]
+            balances = dict(counts[group_id]["balances"])
+            for pending in counts[group_id]["pending"]:
+                if pending["fold_id"] in folded:
+                    continue
+                total += pending.get("total_expenses", 0)
+                for user_id, delta in pending.get("balances", {}).items():
+                    balances[user_id] = balances.get(user_id, 0) + delta
+
+            if "total_expenses" in doc:
+                doc["total_expenses"] += total
+            for member in doc.get("members", []):
+                if "balance" in member:
+                    member["balance"] += balances.get(member["user_id"], 0)
+
+    async def _read_shards(self, group_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        fetched = {
+            group_id: {"total_expenses": 0, "balances": {}, "pending": []}
+            for group_id in group_ids
+        }
+        async for shard in self.collection.find({"group_id": {"$in": group_ids}}):
+            group_counts = fetched[shard["group_id"]]
+            group_counts["total_expenses"] += shard.get("total_expenses", 0)
+            for user_id, delta in shard.get("balances", {}).items():
+                balances = group_counts["balances"]
+                balances[user_id] = balances.get(user_id, 0) + delta
+            if shard.get("pending"):
+                group_counts["pending"].append(shard["pending"])
+        return fetched
+
+    async def _refresh_moved(
+        self, sharded: Dict[str, Dict[str, Any]], group_ids: List[str]
+    ) -> set:
+        """Re-read the counters of groups a fold reached since they were read
+
+        Every fold pushes a new id, so an unchanged last fold id means no fold
+        landed between the group read and the shard read just made.
+        """
+        moved = set()
+        async for fresh in self.database.groups.find(
+            {"_id": {"$in": [ObjectId(group_id) for group_id in group_ids]}},
+            {"counter_folds": 1, "total_expenses": 1, "members": 1},
+        ):
+            group_id = str(fresh["_id"])
+            doc = sharded[group_id]
+            if _last_fold(fresh) == _last_fold(doc):
+                continue
+            doc["counter_folds"] = fresh.get("counter_folds")
+            if "total_expenses" in doc:
+                doc["total_expenses"] = fresh.get("total_expenses", 0)
+            balances = {
+                member["user_id"]: member.get("balance", 0)
+                for member in fresh.get("members", [])
+            }
+            for member in doc.get("members", []):
+                if "balance" in member and member["user_id"] in balances:
+                    member["balance"] = balances[member["user_id"]]
+            moved.add(group_id)
+        return moved
+
+    async def delete_shards(self, group_id: str) -> None:
+        await self.collection.delete_many({"group_id": group_id})
+        _shard_cache.delete(group_id)
+
+    async def compact(self) -> int:
+        """Fold every shard with counts into its group; returns the folds made"""
+        from app.services.group_service import GroupService
+
+        folded = set()
+        async for shard in self.collection.find(
+            {"$or": [{"dirty": True}, {"pending": {"$exists": True}}]}
+        ):
+            if await self._fold(shard):
+                folded.add(shard["group_id"])
+                _stats.folds += 1
+        for group_id in folded:
+            _shard_cache.delete(group_id)
+        GroupService.forget_balance_summaries(folded)
+
+        await self._retire_idle()
+        return len(folded)
+
+    async def _fold(self, shard: Dict[str, Any]) -> bool:
+        pending = shard.get("pending")
+        if pending is None:
+            shard = await self.collection.find_one_and_update(
+                {"_id": shard["_id"], "pending": {"$exists": False}},
+                [
+                    {
+                        "$set": {
+                            "pending": {
+                                "fold_id": ObjectId(),
+                                "total_expenses": "$total_expenses",
+                                "balances": {
+                                    "$ifNull": ["$balances", {"$literal": {}}]
+                                },
+                            },
+                            "total_expenses": Int64(0),
+                            "balances": {"$literal": {}},
+                            "dirty": False,
+                        }
+                    }
+                ],
+                return_document=ReturnDocument.AFTER,
+            )
+            if shard is None:
+                # Another compactor got there first
+                return False
+            pending = shard["pending"]
+
+        fold_id = pending["fold_id"]
+        inc, array_filters = _member_inc(
+            {u: d for u, d in pending.get("balances", {}).items() if d}
+        )
+        inc["total_expenses"] = Int64(pending.get("total_expenses", 0))
+        await self.database.groups.update_one(
+            {"_id": ObjectId(shard["group_id"]), "counter_folds": {"$ne": fold_id}},
+            {
+                "$inc": inc,
+                "$push": {
+                    "counter_folds": {"$each": [fold_id], "$slice": -_FOLD_HISTORY}
+                },
+                "$set": {"updated_at": datetime.utcnow()},
+            },
+            array_filters=array_filters or None,
+        )
+        await self.collection.update_one(
+            {"_id": shard["_id"], "pending.fold_id": fold_id},
+            {"$unset": {"pending": ""}},
+        )
+        return True
+
+    async def _retire_idle(self) -> None:
+        """Return groups with no recent shard writes to direct writes"""
+        cutoff = datetime.utcnow() - timedelta(
+            seconds=settings.group_counter_idle_seconds
+        )
+        async for group_doc in self.database.groups.find(
+            {"counters_active_at": {"$lt": cutoff}}, {"_id": 1}
+        ):
+            group_id = str(group_doc["_id"])
+            unfolded = await self.collection.find_one(
+                {
+                    "group_id": group_id,
+                    "$or": [{"dirty": True}, {"pending": {"$exists": True}}],
+                },
+                {"_id": 1},
+            )
+            if unfolded:
+                continue
+            result = await self.database.groups.update_one(
+                {"_id": group_doc["_id"], "counters_active_at": {"$lt": cutoff}},
+                {
+                    "$unset": {
+                        "counter_shards": "",
+                        "counters_active_at": "",
+                        "counter_folds": "",
+                    }
+                },
+            )
+            if result.modified_count:
+                # A write racing this sets dirty, which keeps its shard
+                await self.collection.delete_many(
+                    {
+                        "group_id": group_id,
+                        "dirty": {"$ne": True},
+                        "pending": {"$exists": False},
+                    }
+                )
+                _shard_cache.delete(group_id)
+                _stats.retired += 1
+
+
+class GroupCounterCompactor:
+    """Periodically folds counter shards back into their groups
+
+    Every worker runs one; folds are claimed atomically, so they don't collide.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, database: AsyncIOMotorDatabase) -> None:
+        self._task = asyncio.create_task(self._run(GroupCounterService(database)))
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, service: GroupCounterService) -> None:
+        while True:
+            await asyncio.sleep(settings.group_counter_compact_interval)
+            try:
+                await service.compact()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Group counter compaction failed: {e}")
+
+
+group_counter_compactor = GroupCounterCompactor()
@@ -0,0 +1,266 @@
+from typing import Iterable, List, Optional, Dict, Any
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from app.core.config import settings
+from app.core.money import decode_amounts, encode_amounts, to_major
+from app.core.fieldsets import FieldSet
+from app.core.profiling import profile_section
+from app.core.singleflight import SingleFlight
+from app.models import Group, GroupCreate, GroupUpdate, GroupMember
+from app.services.group_counter_service import COUNTER_FIELDS, GroupCounterService
+from app.services.membership_service import MembershipService
+from app.services.propagation_service import profile_propagator
+
+# Members refreshing together after a settle-up share one read of the group
+_summary_flight = SingleFlight(
+    "groups.balance_summary", ttl=settings.coalescing_cache_ttl
+)
+
+
+class GroupService:
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        self.collection = database.groups
+        self.memberships = MembershipService(database)
+        self.counters = GroupCounterService(database)
+
+    async def create_group(self, group_data: GroupCreate) -> Group:
+        """Create a new group with its creator as the first member"""
+        creator = await self._new_member(group_data.created_by, group_data.currency)
+        if creator is None:
+            raise ValueError("Creator not found")
+        group_dict = group_data.model_dump()
+        group_dict["members"] = [creator.model_dump()]
+        group_dict["total_expenses"] = 0.0
+        group_dict["created_at"] = datetime.utcnow()
+        group_dict["updated_at"] = datetime.utcnow()
+
+        result = await self.collection.insert_one(encode_amounts(group_dict, "groups"))
+        group_dict["_id"] = result.inserted_id
+        await self.memberships.add(str(result.inserted_id), [creator.user_id])
+
+        return Group.model_validate(decode_amounts(group_dict, "groups"))
+
+    async def _new_member(self, user_id: str, currency: str) -> Optional[GroupMember]:
+        """A zero-balance member carrying the user's current name and avatar"""
+        if not ObjectId.is_valid(user_id):
+            return None
+        user_doc = await self.database.users.find_one(
+            {"_id": ObjectId(user_id), "is_active": True}, {"full_name": 1, "avatar": 1}
+        )
+        if not user_doc:
+            return None
+        return GroupMember(
+            user_id=user_id,
+            name=user_doc["full_name"],
+            avatar=user_doc.get("avatar", ""),
+            currency=currency,
+        )
+
+    async def get_groups(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        user_id: Optional[str] = None,
+        fieldset: Optional[FieldSet] = None,
+    ) -> List[Group]:
+        """Get all groups, optionally only those a user belongs to"""
+        filter_dict: Dict[str, Any] = {}
+        if user_id:
+            group_ids = await self.memberships.get_group_ids(user_id)
+            if not group_ids:
+                return []
+            filter_dict["_id"] = {"$in": [ObjectId(g) for g in group_ids]}
+
+        projection = {**fieldset.projection, **COUNTER_FIELDS} if fieldset else None
+        cursor = (
+            self.collection.find(filter_dict, projection)
+            .sort("updated_at", -1)
+            .skip(skip)
+            .limit(limit)
+        )
+        group_docs = await cursor.to_list(length=limit)
+        await self.counters.merge_shards(group_docs)
+        with profile_section("model"):
+            if fieldset:
+                return fieldset.adapter.validate_python(
+                    [decode_amounts(doc, "groups") for doc in group_docs]
+                )
+            return [
+                Group.model_validate(decode_amounts(doc, "groups"))
+                for doc in group_docs
+            ]
+
+    async def get_group_by_id(self, group_id: str) -> Optional[Group]:
+        """Get a group by ID"""
+        try:
+            group_doc = await self.collection.find_one({"_id": ObjectId(group_id)})
+            if group_doc:
+                await self.counters.merge_shards([group_doc])
+                return Group.model_validate(decode_amounts(group_doc, "groups"))
+        except Exception:
+            pass
+        return None
+
+    async def get_groups_by_user(self, user_id: str) -> List[Group]:
+        """Get all groups a user belongs to"""
+        group_ids = await self.memberships.get_group_ids(user_id)
+        if not group_ids:
+            return []
+        return await self.get_groups(limit=len(group_ids), user_id=user_id)
+
+    async def update_group(
+        self, group_id: str, group_data: GroupUpdate
+    ) -> Optional[Group]:
+        """Update a group"""
+        try:
+            update_dict = {
+                k: v for k, v in group_data.model_dump().items() if v is not None
+            }
+            if not update_dict:
+                return await self.get_group_by_id(group_id)
+
+            update_dict["updated_at"] = datetime.utcnow()
+
+            result = await self.collection.update_one(
+                {"_id": ObjectId(group_id)}, {"$set": update_dict}
+            )
+
+            if result.modified_count:
+                _summary_flight.forget(group_id)
+                if "name" in update_dict:
+                    profile_propagator.group_renamed(self.database, group_id)
+                return await self.get_group_by_id(group_id)
+        except Exception:
+            pass
+        return None
+
+    async def delete_group(self, group_id: str) -> bool:
+        """Delete a group"""
+        try:
+            group_doc = await self.collection.find_one_and_delete(
+                {"_id": ObjectId(group_id)}, {"members.user_id": 1}
+            )
+            if not group_doc:
+                return False
+            _summary_flight.forget(group_id)
+            await self.counters.delete_shards(group_id)
+            await self.memberships.remove(
+                group_id, [member["user_id"] for member in group_doc.get("members", [])]
+            )
+            return True
+        except Exception:
+            return False
+
+    async def add_member(self, group_id: str, user_id: str) -> Optional[Group]:
+        """Add a user to a group with a zero balance"""
+        try:
+            group_doc = await self.collection.find_one(
+                {"_id": ObjectId(group_id)}, {"currency": 1}
+            )
+            if not group_doc:
+                return None
+            member = await self._new_member(user_id, group_doc.get("currency"))
+            if member is None:
+                return None
+            member_dict = encode_amounts(member.model_dump(), "groups")
+            group_doc = await self.collection.find_one_and_update(
+                {"_id": ObjectId(group_id), "members.user_id": {"$ne": user_id}},
+                {
+                    "$push": {"members": member_dict},
+                    "$set": {"updated_at": datetime.utcnow()},
+                },
+                return_document=ReturnDocument.AFTER,
+            )
+            if not group_doc:
+                # Either the group is gone or the user is already in it
+                return await self.get_group_by_id(group_id)
+
+            _summary_flight.forget(group_id)
+            await self.memberships.add(group_id, [user_id])
+            await self.counters.merge_shards([group_doc])
+            return Group.model_validate(decode_amounts(group_doc, "groups"))
+        except Exception:
+            pass
+        return None
+
+    async def remove_member(self, group_id: str, user_id: str) -> bool:
+        """Remove a member from a group"""
+        try:
+            result = await self.collection.update_one(
+                {"_id": ObjectId(group_id), "members.user_id": user_id},
+                {
+                    "$pull": {"members": {"user_id": user_id}},
+                    "$set": {"updated_at": datetime.utcnow()},
+                },
+            )
+            if not result.modified_count:
+                return False
+
+            _summary_flight.forget(group_id)
+            await self.memberships.remove(group_id, [user_id])
+            return True
+        except Exception:
+            return False
+
+    async def get_group_balance_summary(
+        self, group_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """Get each member's balance and the group's total expenses"""
+        return await _summary_flight.do(
+            group_id, lambda: self._get_group_balance_summary(group_id)
+        )
+
+    @staticmethod
+    def forget_balance_summaries(group_ids: Iterable[str]) -> None:
+        """Stop serving coalesced summaries read before a balance change"""
+        for group_id in group_ids:
+            _summary_flight.forget(group_id)
+
+    async def _get_group_balance_summary(
+        self, group_id: str
+    ) -> Optional[Dict[str, Any]]:
+        try:
+            group_doc = await self.collection.find_one(
+                {"_id": ObjectId(group_id)},
+                {
+                    "name": 1,
+                    "currency": 1,
+                    "total_expenses": 1,
+                    "members": 1,
+                    **COUNTER_FIELDS,
+                },
+            )
+        except Exception:
+            return None
+        if not group_doc:
+            return None
+        await self.counters.merge_shards([group_doc])
+
+        currency = group_doc.get("currency")
+        members = group_doc.get("members", [])
+        # Minor units, so "settled" is an exact comparison
+        owed = sum(m["balance"] for m in members if m["balance"] > 0)
+        owing = -sum(m["balance"] for m in members if m["balance"] < 0)
+
+        return {
+            "group_id": group_id,
+            "name": group_doc["name"],
+            "currency": currency,
+            "total_expenses": to_major(group_doc.get("total_expenses", 0), currency),
+            "total_owed": to_major(owed, currency),
+            "total_owing": to_major(owing, currency),
+            "is_settled": owed == 0 and owing == 0,
+            "members": [
+                {
+                    "user_id": m["user_id"],
+                    "name": m["name"],
+                    "avatar": m["avatar"],
+                    "balance": to_major(m["balance"], m.get("currency", currency)),
+                }
+                for m in members
+            ],
+        }
@@ -0,0 +1,94 @@
+from typing import List, Dict, Any, Tuple
+from datetime import datetime
+from collections import defaultdict
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson.int64 import Int64
+from pymongo import UpdateOne
+
+from app.core.money import to_major
+from app.models import Currency
+
+
+def normalize_pair(user_id: str, other_user_id: str) -> Tuple[str, str]:
+    """Order a pair of users the way ledger entries are keyed"""
+    return tuple(sorted((user_id, other_user_id)))
+
+
+class LedgerService:
+    """Net amount owed between every pair of users, per currency
+
+    One ``pair_ledger`` document per sorted (user_a, user_b, currency), where a
+    positive ``amount`` (minor units) means user_b owes user_a. Transactions
+    keep it current with ``$inc``, so "what do I owe X" is a single lookup and
+    "everyone I have a balance with" is one indexed query on ``users``.
+    """
+
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        self.collection = database.pair_ledger
+
+    async def apply_pair_deltas(
+        self, deltas: Dict[Tuple[str, str, Currency], int]
+    ) -> None:
+        """Add minor-unit changes to many pairs in one bulk write"""
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"user_a": user_a, "user_b": user_b, "currency": currency},
+                {
+                    "$inc": {"amount": Int64(delta)},
+                    "$set": {"updated_at": now},
+                    "$setOnInsert": {"users": [user_a, user_b], "created_at": now},
+                },
+                upsert=True,
+            )
+            for (user_a, user_b, currency), delta in deltas.items()
+            if delta
+        ]
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+
+    async def get_pair_balance(
+        self, user_id: str, other_user_id: str
+    ) -> List[Dict[str, Any]]:
+        """What other_user_id owes user_id, per currency (negative: user_id owes)"""
+        user_a, user_b = normalize_pair(user_id, other_user_id)
+        entries = await self.collection.find(
+            {"user_a": user_a, "user_b": user_b, "amount": {"$ne": 0}}
+        ).to_list(length=None)
+        return [self._from_perspective(entry, user_id) for entry in entries]
+
+    async def get_counterparties(
+        self, user_id: str, include_settled: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Everyone a user has a balance with, largest amounts first"""
+        filter_dict: Dict[str, Any] = {"users": user_id}
+        if not include_settled:
+            filter_dict["amount"] = {"$ne": 0}
+        entries = await self.collection.find(filter_dict).to_list(length=None)
+
+        counterparties: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for entry in entries:
+            balance = self._from_perspective(entry, user_id)
+            counterparties[balance.pop("user_id")].append(balance)
+
+        return sorted(
+            (
+                {"user_id": other_user_id, "balances": balances}
+                for other_user_id, balances in counterparties.items()
+            ),
+            key=lambda c: max(abs(b["amount"]) for b in c["balances"]),
+            reverse=True,
+        )
+
+    def _from_perspective(self, entry: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+        if entry["user_a"] == user_id:
+            other_user_id, minor = entry["user_b"], entry["amount"]
+        else:
+            other_user_id, minor = entry["user_a"], -entry["amount"]
+        return {
+            "user_id": other_user_id,
+            "currency": entry["currency"],
+            "amount": to_major(minor, entry["currency"]),
+            "updated_at": entry.get("updated_at"),
+        }
@@ -0,0 +1,99 @@
+from typing import FrozenSet, Iterable
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+# user_id -> frozenset of group ids, shared across requests in this process.
+# Joins and leaves invalidate it only in the worker that handled them, so other
+# workers may answer from the old set for up to ``membership_cache_ttl``.
+_membership_cache = TTLCache(ttl=settings.membership_cache_ttl, maxsize=50000)
+
+
+class MembershipService:
+    """Maintained user -> groups index
+
+    ``group_memberships`` holds one document per user listing the groups they
+    belong to, so membership checks and "my groups" lookups are a single
+    primary-key read instead of a query on ``groups.members.user_id``.
+
+    Reads go through a per-process cache that other workers' writes don't
+    invalidate, so a join or leave can take up to ``membership_cache_ttl``
+    to show in other workers. Callers that must see the current set, like
+    name propagation, pass ``fresh=True``.
+    """
+
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        self.collection = database.group_memberships
+
+    async def get_group_ids(self, user_id: str, fresh: bool = False) -> FrozenSet[str]:
+        """Groups a user belongs to; ``fresh`` skips the cache"""
+        group_ids = None if fresh else _membership_cache.get(user_id)
+        if group_ids is None:
+            membership_doc = await self.collection.find_one(
+                {"_id": user_id}, {"group_ids": 1}
+            )
+            group_ids = frozenset(membership_doc["group_ids"] if membership_doc else ())
+            _membership_cache.set(user_id, group_ids)
+        return group_ids
+
+    async def is_member(self, group_id: str, user_id: str) -> bool:
+        """Whether a user belongs to a group"""
+        return group_id in await self.get_group_ids(user_id)
+
+    async def add(self, group_id: str, user_ids: Iterable[str]) -> None:
+        """Record users joining a group"""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        await self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": user_id},
+                    {
+                        "$addToSet": {"group_ids": group_id},
+                        "$set": {"updated_at": datetime.utcnow()},
+                    },
+                    upsert=True,
+                )
+                for user_id in user_ids
+            ],
+            ordered=False,
+        )
+        for user_id in user_ids:
+            _membership_cache.delete(user_id)
+
+    async def remove(self, group_id: str, user_ids: Iterable[str]) -> None:
+        """Record users leaving a group (or the group being deleted)"""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        await self.collection.update_many(
+            {"_id": {"$in": user_ids}},
+            {
+                "$pull": {"group_ids": group_id},
+                "$set": {"updated_at": datetime.utcnow()},
+            },
+        )
+        for user_id in user_ids:
+            _membership_cache.delete(user_id)
+
+    async def rebuild(self) -> int:
+        """Recompute the whole index from the embedded group members"""
+        pipeline = [
+            {"$unwind": "$members"},
+            {
+                "$group": {
+                    "_id": "$members.user_id",
+                    "group_ids": {"$addToSet": {"$toString": "$_id"}},
+                }
+            },
+            {"$set": {"updated_at": datetime.utcnow()}},
+            {"$out": "group_memberships"},
+        ]
+        await self.database.groups.aggregate(pipeline).to_list(length=None)
+        _membership_cache.clear()
+        return await self.collection.count_documents({})
@@ -0,0 +1,163 @@
+"""
+Propagation of names and avatars into their denormalized copies
+
+Group members and balances carry a copy of the user's name and avatar, and
+activities a copy of the group's name. Edits only record which users and
+groups changed; a background task waits ``propagation_delay`` seconds, so a
+burst of edits is handled once, then reads the current values and rewrites
+every stale copy with one batched ``update_many`` per user or group on each
+collection. Values are read at propagation time, not taken from the edit,
+so copies always end up at the latest name whatever order workers run in.
+"""
+
+import asyncio
+import logging
+from typing import Iterable, Optional, Set
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateMany
+
+from app.core.archive import ARCHIVE_COLLECTIONS
+from app.core.config import settings
+from app.core.deadline import spawn_detached
+from app.services.membership_service import MembershipService
+
+logger = logging.getLogger(__name__)
+
+
+class PropagationService:
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+
+    async def propagate_users(self, user_ids: Iterable[str]) -> int:
+        """Copy users' names and avatars to their group memberships and balances"""
+        object_ids = [ObjectId(u) for u in user_ids if ObjectId.is_valid(u)]
+        if not object_ids:
+            return 0
+        memberships = MembershipService(self.database)
+
+        group_ops = []
+        balance_ops = []
+        async for user_doc in self.database.users.find(
+            {"_id": {"$in": object_ids}}, {"full_name": 1, "avatar": 1}
+        ):
+            user_id = str(user_doc["_id"])
+            name = user_doc["full_name"]
+            avatar = user_doc.get("avatar", "")
+            stale = {"$or": [{"name": {"$ne": name}}, {"avatar": {"$ne": avatar}}]}
+
+            balance_ops.append(
+                UpdateMany(
+                    {"user_id": user_id, **stale},
+                    {"$set": {"name": name, "avatar": avatar}},
+                )
+            )
+            # Not the cache: a join handled by another worker may not be in it
+            group_ids = await memberships.get_group_ids(user_id, fresh=True)
+            if group_ids:
+                group_ops.append(
+                    UpdateMany(
+                        {
+                            "_id": {"$in": [ObjectId(g) for g in group_ids]},
+                            "members": {"$elemMatch": {"user_id": user_id, **stale}},
+                        },
+                        {
+                            "$set": {
+                                "members.$[m].name": name,
+                                "members.$[m].avatar": avatar,
+                            }
+                        },
+                        array_filters=[{"m.user_id": user_id}],
+                    )
+                )
+
+        modified = 0
+        if balance_ops:
+            result = await self.database.balances.bulk_write(balance_ops, ordered=False)
+            modified += result.modified_count
+        if group_ops:
+            result = await self.database.groups.bulk_write(group_ops, ordered=False)
+            modified += result.modified_count
+        return modified
+
+    async def propagate_group_names(self, group_ids: Iterable[str]) -> int:
+        """Copy groups' names to their activities, archived ones included"""
+        object_ids = [ObjectId(g) for g in group_ids if ObjectId.is_valid(g)]
+        if not object_ids:
+            return 0
+
+        operations = []
+        async for group_doc in self.database.groups.find(
+            {"_id": {"$in": object_ids}}, {"name": 1}
+        ):
+            operations.append(
+                UpdateMany(
+                    {
+                        "group_id": str(group_doc["_id"]),
+                        "group_name": {"$ne": group_doc["name"]},
+                    },
+                    {"$set": {"group_name": group_doc["name"]}},
+                )
+            )
+
+        modified = 0
+        if operations:
+            for name in ("activities", ARCHIVE_COLLECTIONS["activities"]):
+                result = await self.database[name].bulk_write(operations, ordered=False)
+                modified += result.modified_count
+        return modified
+
+
+class ProfilePropagator:
+    """Collects changed users and groups and propagates them in batches"""
+
+    def __init__(self):
+        self._users: Set[str] = set()
+        self._groups: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def user_changed(self, database: AsyncIOMotorDatabase, user_id: str) -> None:
+        self._users.add(user_id)
+        self._schedule(database)
+
+    def group_renamed(self, database: AsyncIOMotorDatabase, group_id: str) -> None:
+        self._groups.add(group_id)
+        self._schedule(database)
+
+    def _schedule(self, database: AsyncIOMotorDatabase) -> None:
+        if self._task is None or self._task.done():
+            # Runs after the edit's response, so not under its deadline
+            self._task = spawn_detached(self._run(PropagationService(database)))
+
+    async def flush(self, timeout: float) -> None:
+        """Wait for queued propagation to finish, e.g. on shutdown"""
+        if self._task and not self._task.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(self._task), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"Propagation of {len(self._users)} users and "
+                    f"{len(self._groups)} groups did not finish before shutdown"
+                )
+
+    async def _run(self, service: PropagationService) -> None:
+        while self._users or self._groups:
+            # Edits arriving while we wait join this batch
+            await asyncio.sleep(settings.propagation_delay)
+            users, self._users = self._users, set()
+            groups, self._groups = self._groups, set()
+            try:
+                modified = await service.propagate_users(users)
+                modified += await service.propagate_group_names(groups)
+                logger.info(
+                    f"Propagated {len(users)} users and {len(groups)} groups "
+                    f"to {modified} documents"
+                )
+            except Exception as e:
+                logger.error(f"Profile propagation failed, will retry: {e}")
+                self._users |= users
+                self._groups |= groups
+
+
+profile_propagator = ProfilePropagator()
@@ -0,0 +1,232 @@
+from typing import AsyncIterator, Optional, Set
+from datetime import datetime
+import asyncio
+import hashlib
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridFSBucket
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import settings
+from app.core.deadline import spawn_detached
+from app.core.receipt_processing import receipt_processor
+from app.models import Receipt, ReceiptStatus
+
+logger = logging.getLogger(__name__)
+
+# Background processing tasks, referenced so they aren't garbage collected
+_processing_tasks: Set[asyncio.Task] = set()
+
+
+class ReceiptTooLarge(ValueError):
+    pass
+
+
+class ReceiptForbidden(PermissionError):
+    pass
+
+
+class ReceiptService:
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        self.collection = database.receipts
+        self.bucket = AsyncIOMotorGridFSBucket(database, bucket_name="receipts")
+
+    async def upload_receipt(
+        self,
+        chunks: AsyncIterator[bytes],
+        filename: str,
+        content_type: str,
+        transaction_id: Optional[str] = None,
+        uploaded_by: Optional[str] = None,
+    ) -> Receipt:
+        """Stream an upload into GridFS, deduplicating a user's identical files
+
+        Raises ``ReceiptForbidden`` before reading the body if
+        ``transaction_id`` is not the uploader's, and ``LookupError`` if it
+        doesn't exist.
+        """
+        if transaction_id:
+            await self._check_transaction(transaction_id, uploaded_by)
+
+        digest = hashlib.sha256()
+        size = 0
+        grid_in = self.bucket.open_upload_stream(
+            filename, metadata={"content_type": content_type}
+        )
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > settings.receipt_max_bytes:
+                    raise ReceiptTooLarge(
+                        f"Receipt exceeds {settings.receipt_max_bytes} bytes"
+                    )
+                digest.update(chunk)
+                await grid_in.write(chunk)
+        except BaseException:
+            await grid_in.abort()
+            raise
+
+        sha256 = digest.hexdigest()
+        # Per uploader, so one user's upload never links to another's receipt
+        existing = await self.collection.find_one(
+            {"uploaded_by": uploaded_by, "sha256": sha256}
+        )
+        if existing:
+            # Same bytes already stored; drop this copy
+            await grid_in.abort()
+            receipt_doc = existing
+        else:
+            await grid_in.close()
+            receipt_doc = {
+                "sha256": sha256,
+                "file_id": str(grid_in._id),
+                "filename": filename,
+                "content_type": content_type,
+                "size": size,
+                "status": ReceiptStatus.PENDING,
+                "transaction_ids": [],
+                "uploaded_by": uploaded_by,
+                "created_at": datetime.utcnow(),
+            }
+            try:
+                await self.collection.insert_one(receipt_doc)
+                self._schedule_processing(receipt_doc["_id"])
+            except DuplicateKeyError:
+                # A concurrent upload of the same file won the race
+                await self.bucket.delete(grid_in._id)
+                receipt_doc = await self.collection.find_one(
+                    {"uploaded_by": uploaded_by, "sha256": sha256}
+                )
+
+        if transaction_id:
+            receipt_doc = await self.attach_to_transaction(
+                receipt_doc["_id"], transaction_id, uploaded_by
+            )
+        return Receipt.model_validate(receipt_doc)
+
+    async def get_receipt_by_id(self, receipt_id: str) -> Optional[Receipt]:
+        """Get a receipt by ID"""
+        try:
+            receipt_doc = await self.collection.find_one({"_id": ObjectId(receipt_id)})
+            if receipt_doc:
+                return Receipt.model_validate(receipt_doc)
+        except Exception:
+            pass
+        return None
+
+    async def open_file(self, file_id: str):
+        """Open a stored receipt or thumbnail for streaming"""
+        return await self.bucket.open_download_stream(ObjectId(file_id))
+
+    async def attach_to_transaction(
+        self, receipt_id: ObjectId, transaction_id: str, user_id: Optional[str] = None
+    ) -> Optional[dict]:
+        """Link a receipt to a transaction; None if either doesn't exist
+
+        With a ``user_id``, both must be that user's, or ``ReceiptForbidden``
+        is raised.
+        """
+        receipt_doc = await self.collection.find_one(
+            {"_id": receipt_id}, {"uploaded_by": 1}
+        )
+        if not receipt_doc:
+            return None
+        if user_id is not None and receipt_doc.get("uploaded_by") != user_id:
+            raise ReceiptForbidden("Receipt belongs to another user")
+        try:
+            await self._check_transaction(transaction_id, user_id)
+        except LookupError:
+            return None
+
+        receipt_doc = await self.collection.find_one_and_update(
+            {"_id": receipt_id},
+            {"$addToSet": {"transaction_ids": transaction_id}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not receipt_doc:
+            return None
+        # Processing may finish concurrently; never replace its result with
+        # an older pending summary of the same receipt
+        await self.database.transactions.update_one(
+            {
+                "_id": ObjectId(transaction_id),
+                "$or": [
+                    {"receipt.receipt_id": {"$ne": str(receipt_id)}},
+                    {"receipt.status": ReceiptStatus.PENDING},
+                ],
+            },
+            {"$set": {"receipt": self._summary(receipt_doc)}},
+        )
+        return receipt_doc
+
+    async def _check_transaction(
+        self, transaction_id: str, user_id: Optional[str]
+    ) -> None:
+        transaction_doc = await self.database.transactions.find_one(
+            {"_id": ObjectId(transaction_id)}, {"user_id": 1}
+        )
+        if not transaction_doc:
+            raise LookupError("Transaction not found")
+        if user_id is not None and transaction_doc["user_id"] != user_id:
+            raise ReceiptForbidden("Transaction belongs to another user")
+
+    def _summary(self, receipt_doc: dict) -> dict:
+        return {
+            "receipt_id": str(receipt_doc["_id"]),
+            "status": receipt_doc["status"],
+            "thumbnail_id": receipt_doc.get("thumbnail_id"),
+            "detected_total": receipt_doc.get("detected_total"),
+        }
+
+    def _schedule_processing(self, receipt_id: ObjectId) -> None:
+        # Processing outlives the upload request, so it must not inherit its deadline
+        task = spawn_detached(self.process_receipt(receipt_id))
+        _processing_tasks.add(task)
+        task.add_done_callback(_processing_tasks.discard)
+
+    async def process_receipt(self, receipt_id: ObjectId) -> None:
+        """Thumbnail and OCR a receipt off the event loop, then attach the results"""
+        receipt_doc = await self.collection.find_one({"_id": receipt_id})
+        if not receipt_doc:
+            return
+
+        async def read() -> bytes:
+            grid_out = await self.open_file(receipt_doc["file_id"])
+            return await grid_out.read()
+
+        update = {"processed_at": datetime.utcnow()}
+        try:
+            result = await receipt_processor.process(read)
+
+            thumbnail_id = await self.bucket.upload_from_stream(
+                f"thumb-{receipt_doc['filename']}",
+                result["thumbnail"],
+                metadata={"content_type": "image/jpeg", "receipt_id": str(receipt_id)},
+            )
+            update.update(
+                status=ReceiptStatus.PROCESSED,
+                thumbnail_id=str(thumbnail_id),
+                text=result["text"],
+                detected_total=(
+                    float(result["detected_total"])
+                    if result["detected_total"]
+                    else None
+                ),
+            )
+        except Exception as e:
+            logger.error(f"Could not process receipt {receipt_id}: {e}")
+            update.update(status=ReceiptStatus.FAILED, error=str(e))
+
+        receipt_doc = await self.collection.find_one_and_update(
+            {"_id": receipt_id},
+            {"$set": update},
+            return_document=ReturnDocument.AFTER,
+        )
+        if receipt_doc["transaction_ids"]:
+            await self.database.transactions.update_many(
+                {"_id": {"$in": [ObjectId(t) for t in receipt_doc["transaction_ids"]]}},
+                {"$set": {"receipt": self._summary(receipt_doc)}},
+            )
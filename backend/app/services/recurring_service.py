@@ -0,0 +1,295 @@
+from typing import List, Optional, Dict, Any
+from datetime import datetime, timedelta
+import asyncio
+import calendar
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.core.money import decode_amounts, encode_amounts
+from app.models import (
+    RecurrenceFrequency,
+    RecurringTransaction,
+    RecurringTransactionCreate,
+    RecurringTransactionUpdate,
+    TransactionStatus,
+)
+from app.services.transaction_service import TransactionService
+
+logger = logging.getLogger(__name__)
+
+
+def _add_months(moment: datetime, months: int, anchor_day: int) -> datetime:
+    month_index = moment.month - 1 + months
+    year, month = moment.year + month_index // 12, month_index % 12 + 1
+    day = min(anchor_day, calendar.monthrange(year, month)[1])
+    return moment.replace(year=year, month=month, day=day)
+
+
+def next_occurrence(template: Dict[str, Any], after: datetime) -> datetime:
+    """The occurrence following ``after`` for a recurring template"""
+    interval = template.get("interval", 1)
+    frequency = template["frequency"]
+    if frequency == RecurrenceFrequency.DAILY:
+        return after + timedelta(days=interval)
+    if frequency == RecurrenceFrequency.WEEKLY:
+        return after + timedelta(weeks=interval)
+
+    # Months and years keep the start date's day, clamped to short months
+    anchor_day = template["start_at"].day
+    months = interval if frequency == RecurrenceFrequency.MONTHLY else 12 * interval
+    return _add_months(after, months, anchor_day)
+
+
+def resume_at(template: Dict[str, Any], now: datetime) -> datetime:
+    """The first occurrence at or after ``now``, for a template being resumed"""
+    run_at = template["next_run_at"]
+    while run_at < now:
+        run_at = next_occurrence(template, run_at)
+    return run_at
+
+
+class RecurringService:
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        self.collection = database.recurring_transactions
+
+    async def create_recurring(
+        self, recurring_data: RecurringTransactionCreate
+    ) -> RecurringTransaction:
+        """Create a recurring transaction template"""
+        recurring_dict = recurring_data.model_dump()
+        recurring_dict["next_run_at"] = recurring_dict["start_at"]
+        recurring_dict["occurrences"] = 0
+        recurring_dict["is_active"] = True
+        recurring_dict["created_at"] = datetime.utcnow()
+        recurring_dict["updated_at"] = datetime.utcnow()
+
+        result = await self.collection.insert_one(
+            encode_amounts(recurring_dict, "recurring_transactions")
+        )
+        recurring_dict["_id"] = result.inserted_id
+
+        recurring_scheduler.notify(recurring_dict["next_run_at"])
+        return RecurringTransaction(
+            **decode_amounts(recurring_dict, "recurring_transactions")
+        )
+
+    async def get_recurring_by_user(self, user_id: str) -> List[RecurringTransaction]:
+        """Get every recurring template a user pays for"""
+        cursor = self.collection.find({"user_id": user_id}).sort("next_run_at", 1)
+        recurring_docs = await cursor.to_list(length=None)
+        return [
+            RecurringTransaction.model_validate(
+                decode_amounts(doc, "recurring_transactions")
+            )
+            for doc in recurring_docs
+        ]
+
+    async def get_recurring_by_id(
+        self, recurring_id: str
+    ) -> Optional[RecurringTransaction]:
+        """Get a recurring template by ID"""
+        try:
+            recurring_doc = await self.collection.find_one(
+                {"_id": ObjectId(recurring_id)}
+            )
+            if recurring_doc:
+                return RecurringTransaction(
+                    **decode_amounts(recurring_doc, "recurring_transactions")
+                )
+        except Exception:
+            pass
+        return None
+
+    async def update_recurring(
+        self, recurring_id: str, recurring_data: RecurringTransactionUpdate
+    ) -> Optional[RecurringTransaction]:
+        """Update a recurring template; future occurrences use the new values"""
+        try:
+            update_dict = {
+                k: v for k, v in recurring_data.model_dump().items() if v is not None
+            }
+            if not update_dict:
+                return await self.get_recurring_by_id(recurring_id)
+
+            recurring_doc = None
+            if "amount" in update_dict or update_dict.get("is_active"):
+                recurring_doc = await self.collection.find_one(
+                    {"_id": ObjectId(recurring_id)}
+                )
+                if not recurring_doc:
+                    return None
+            if "amount" in update_dict:
+                encode_amounts(
+                    update_dict, "recurring_transactions", recurring_doc["currency"]
+                )
+            if update_dict.get("is_active") and not recurring_doc["is_active"]:
+                # Resume from the next occurrence instead of catching up the pause
+                update_dict["next_run_at"] = resume_at(recurring_doc, datetime.utcnow())
+            update_dict["updated_at"] = datetime.utcnow()
+
+            result = await self.collection.update_one(
+                {"_id": ObjectId(recurring_id)}, {"$set": update_dict}
+            )
+            if result.modified_count:
+                if "next_run_at" in update_dict:
+                    recurring_scheduler.notify(update_dict["next_run_at"])
+                return await self.get_recurring_by_id(recurring_id)
+        except Exception:
+            pass
+        return None
+
+    async def delete_recurring(self, recurring_id: str) -> bool:
+        """Delete a recurring template; materialized transactions are kept"""
+        try:
+            result = await self.collection.delete_one({"_id": ObjectId(recurring_id)})
+            return result.deleted_count > 0
+        except Exception:
+            return False
+
+    async def get_next_due(self) -> Optional[datetime]:
+        """The earliest due time, read from the (is_active, next_run_at) index"""
+        doc = await self.collection.find_one(
+            {"is_active": True}, {"next_run_at": 1}, sort=[("next_run_at", 1)]
+        )
+        return doc["next_run_at"] if doc else None
+
+    async def materialize_due(self, now: datetime) -> int:
+        """Create every occurrence due by ``now``, one batch of templates at a time"""
+        batch_size = settings.recurring_batch_size
+        max_catchup = settings.recurring_max_catchup
+        created = 0
+
+        while True:
+            templates = (
+                await self.collection.find(
+                    {"is_active": True, "next_run_at": {"$lte": now}}
+                )
+                .sort("next_run_at", 1)
+                .limit(batch_size)
+                .to_list(length=batch_size)
+            )
+            if not templates:
+                return created
+
+            transaction_docs = []
+            advances = []
+            for template in templates:
+                run_at = template["next_run_at"]
+                end_at = template.get("end_at")
+                count = 0
+                # Catch up on missed occurrences, a bounded number per pass
+                while run_at <= now and count < max_catchup:
+                    if end_at and run_at > end_at:
+                        break
+                    transaction_docs.append(self._occurrence(template, run_at))
+                    run_at = next_occurrence(template, run_at)
+                    count += 1
+
+                update: Dict[str, Any] = {
+                    "$set": {"next_run_at": run_at, "updated_at": datetime.utcnow()},
+                    "$inc": {"occurrences": count},
+                }
+                if end_at and run_at > end_at:
+                    update["$set"]["is_active"] = False
+                # Only advance if no other worker already did
+                advances.append(
+                    UpdateOne(
+                        {
+                            "_id": template["_id"],
+                            "next_run_at": template["next_run_at"],
+                        },
+                        update,
+                    )
+                )
+
+            # Occurrences are unique per (recurring_id, created_at), so a batch
+            # replayed by another worker or after a crash is not duplicated
+            inserted = await TransactionService(self.database).insert_transactions(
+                transaction_docs
+            )
+            await self.collection.bulk_write(advances, ordered=False)
+            created += len(inserted)
+
+    def _occurrence(self, template: Dict[str, Any], run_at: datetime) -> Dict[str, Any]:
+        return {
+            "user_id": template["user_id"],
+            "title": template["title"],
+            "amount": template["amount"],
+            "currency": template["currency"],
+            "type": template["type"],
+            "status": TransactionStatus.PENDING,
+            "group_id": template.get("group_id"),
+            "participants": list(template.get("participants", [])),
+            "description": template.get("description"),
+            "recurring_id": str(template["_id"]),
+            "created_at": run_at,
+            "updated_at": datetime.utcnow(),
+        }
+
+
+class RecurringScheduler:
+    """Sleeps until the next due template and materializes it
+
+    Due times live in Mongo, ordered by the (is_active, next_run_at) index. The
+    scheduler reads only the earliest one, sleeps until then and is woken
+    early by ``notify`` when a template becomes due sooner. It never scans the
+    whole collection.
+    """
+
+    def __init__(self):
+        self._next_due: Optional[datetime] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, database: AsyncIOMotorDatabase) -> None:
+        self._task = asyncio.create_task(self._run(RecurringService(database)))
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self, due_at: datetime) -> None:
+        """Wake the scheduler if a template became due sooner than expected"""
+        if self._task is None:
+            return
+        if self._next_due is None or due_at < self._next_due:
+            self._next_due = due_at
+            self._wakeup.set()
+
+    async def _run(self, service: RecurringService) -> None:
+        while True:
+            # Cleared first, so a notify during the pass is not lost
+            self._wakeup.clear()
+            try:
+                created = await service.materialize_due(datetime.utcnow())
+                if created:
+                    logger.info(f"Materialized {created} recurring transactions")
+
+                self._next_due = await service.get_next_due()
+                delay = settings.recurring_max_sleep
+                if self._next_due is not None:
+                    due_in = (self._next_due - datetime.utcnow()).total_seconds()
+                    delay = max(0.0, min(delay, due_in))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Recurring scheduler failed: {e}")
+                delay = settings.recurring_max_sleep
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+recurring_scheduler = RecurringScheduler()
@@ -0,0 +1,310 @@
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+import asyncio
+import time
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+
+from app.core.analytics import (
+    UNCATEGORIZED,
+    SpendingColumns,
+    compute_year_reports,
+)
+from app.core.archive import ARCHIVE_COLLECTIONS, get_archive_cutoff
+from app.core.config import settings
+from app.core.faq_index import FAQSnapshot
+from app.core.money import MINOR_UNIT_EXPONENTS, decode_amounts, encode_amounts
+from app.core.profiling import profile_section
+from app.models import (
+    Currency,
+    FAQItem,
+    SpendingReport,
+    TransactionStatus,
+    TransactionType,
+)
+from app.services.balance_service import BalanceService
+
+# FAQ content served from memory; replaced wholesale on every write and
+# reloaded after faq_snapshot_ttl so other workers pick up edits
+_faq_snapshot: Optional[FAQSnapshot] = None
+_faq_lock = asyncio.Lock()
+
+
+class SupportService:
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        self.faq = database.faq_items
+        self.reports = database.spending_reports
+
+    async def get_faq_snapshot(self, force: bool = False) -> FAQSnapshot:
+        """The current FAQ snapshot, loading it when missing or expired"""
+        global _faq_snapshot
+        snapshot = _faq_snapshot
+        if not force and snapshot and not self._faq_expired(snapshot):
+            return snapshot
+
+        async with _faq_lock:
+            # Another request may have reloaded while we waited
+            snapshot = _faq_snapshot
+            if force or not snapshot or self._faq_expired(snapshot):
+                faq_docs = await self.faq.find({}).to_list(length=None)
+                snapshot = FAQSnapshot.build(faq_docs)
+                _faq_snapshot = snapshot
+        return snapshot
+
+    def _faq_expired(self, snapshot: FAQSnapshot) -> bool:
+        return time.monotonic() - snapshot.loaded_at > settings.faq_snapshot_ttl
+
+    async def get_faq_items(self, category: Optional[str] = None) -> List[FAQItem]:
+        """Get active FAQ items, optionally filtered by category"""
+        snapshot = await self.get_faq_snapshot()
+        return snapshot.list_items(category)
+
+    async def get_faq_item_by_id(self, faq_id: str) -> Optional[FAQItem]:
+        """Get an FAQ item by ID"""
+        snapshot = await self.get_faq_snapshot()
+        return snapshot.items.get(faq_id)
+
+    async def search_faq_items(
+        self, query: str, category: Optional[str] = None, limit: int = 10
+    ) -> List[FAQItem]:
+        """Full-text search over active FAQ items"""
+        snapshot = await self.get_faq_snapshot()
+        return snapshot.search(query, category=category, limit=limit)
+
+    async def get_faq_categories(self) -> List[str]:
+        """Get all categories that have active FAQ items"""
+        snapshot = await self.get_faq_snapshot()
+        return snapshot.categories
+
+    async def create_faq_item(
+        self, question: str, answer: str, category: str, order: int = 0
+    ) -> FAQItem:
+        """Create a new FAQ item"""
+        faq_dict = {
+            "question": question,
+            "answer": answer,
+            "category": category,
+            "order": order,
+            "is_active": True,
+            "created_at": datetime.utcnow(),
+        }
+        result = await self.faq.insert_one(faq_dict)
+        faq_dict["_id"] = result.inserted_id
+
+        await self.get_faq_snapshot(force=True)
+        return FAQItem.model_validate(faq_dict)
+
+    async def update_faq_item(
+        self,
+        faq_id: str,
+        question: Optional[str] = None,
+        answer: Optional[str] = None,
+        category: Optional[str] = None,
+        order: Optional[int] = None,
+        is_active: Optional[bool] = None,
+    ) -> Optional[FAQItem]:
+        """Update an FAQ item"""
+        update_dict = {
+            k: v
+            for k, v in {
+                "question": question,
+                "answer": answer,
+                "category": category,
+                "order": order,
+                "is_active": is_active,
+            }.items()
+            if v is not None
+        }
+        try:
+            if not update_dict:
+                faq_doc = await self.faq.find_one({"_id": ObjectId(faq_id)})
+            else:
+                faq_doc = await self.faq.find_one_and_update(
+                    {"_id": ObjectId(faq_id)},
+                    {"$set": update_dict},
+                    return_document=ReturnDocument.AFTER,
+                )
+        except Exception:
+            return None
+        if not faq_doc:
+            return None
+
+        if update_dict:
+            await self.get_faq_snapshot(force=True)
+        return FAQItem.model_validate(faq_doc)
+
+    async def delete_faq_item(self, faq_id: str) -> bool:
+        """Delete an FAQ item"""
+        try:
+            result = await self.faq.delete_one({"_id": ObjectId(faq_id)})
+        except Exception:
+            return False
+        if not result.deleted_count:
+            return False
+
+        await self.get_faq_snapshot(force=True)
+        return True
+
+    async def get_spending_reports(
+        self, user_id: str, year: Optional[int] = None, limit: int = 12
+    ) -> List[SpendingReport]:
+        """Get a user's spending reports, newest first"""
+        filter_dict: Dict[str, Any] = {"user_id": user_id}
+        if year:
+            filter_dict["year"] = year
+
+        cursor = (
+            self.reports.find(filter_dict)
+            .sort([("year", -1), ("month", -1)])
+            .limit(limit)
+        )
+        report_docs = await cursor.to_list(length=limit)
+        with profile_section("model"):
+            return [
+                SpendingReport.model_validate(decode_amounts(doc, "spending_reports"))
+                for doc in report_docs
+            ]
+
+    async def get_spending_report(
+        self, user_id: str, year: int, month: int
+    ) -> Optional[SpendingReport]:
+        """Get a user's spending report for a month"""
+        report_doc = await self.reports.find_one(
+            {"user_id": user_id, "year": year, "month": month}
+        )
+        if report_doc:
+            return SpendingReport.model_validate(
+                decode_amounts(report_doc, "spending_reports")
+            )
+        return None
+
+    async def generate_spending_report(
+        self,
+        user_id: str,
+        year: int,
+        month: int,
+        currency: Currency = Currency.INR,
+    ) -> SpendingReport:
+        """Generate a month's spending report
+
+        The whole year is computed in one pass, so every month of that year up
+        to the current one is (re)generated and stored alongside it.
+        """
+        columns = await self._load_spending_columns(user_id, year, currency)
+        with profile_section("analytics"):
+            year_reports = compute_year_reports(columns)
+
+        now = datetime.utcnow()
+        last_month = now.month if year == now.year else 12
+        operations = []
+        for report in year_reports:
+            if report["month"] > last_month and report["month"] != month:
+                continue
+            report_doc = encode_amounts(
+                {
+                    "user_id": user_id,
+                    "year": year,
+                    "month": report["month"],
+                    "total_spent": report["total_spent"],
+                    "currency": currency,
+                    "categories": report["categories"],
+                    "trends": report["trends"],
+                    "created_at": now,
+                },
+                "spending_reports",
+            )
+            operations.append(
+                UpdateOne(
+                    {"user_id": user_id, "year": year, "month": report["month"]},
+                    {"$set": report_doc},
+                    upsert=True,
+                )
+            )
+        await self.reports.bulk_write(operations, ordered=False)
+
+        return await self.get_spending_report(user_id, year, month)
+
+    async def _load_spending_columns(
+        self, user_id: str, year: int, currency: Currency
+    ) -> SpendingColumns:
+        """Fetch the year's expenses as columns in a single aggregation
+
+        Only split expenses count as spending; the user's part of each is an
+        even share among the payer and participants. The previous December is
+        included so January gets a trend.
+        """
+        start = datetime(year - 1, 12, 1)
+        end = datetime(year + 1, 1, 1)
+        match = {
+            "$match": {
+                "$or": [{"user_id": user_id}, {"participants": user_id}],
+                "type": TransactionType.SPLIT,
+                "status": {"$ne": TransactionStatus.CANCELLED},
+                "created_at": {"$gte": start, "$lt": end},
+            }
+        }
+        project = {
+            "$project": {
+                "_id": 0,
+                "amount": 1,
+                "legacy": {"$eq": [{"$type": "$amount"}, "double"]},
+                "parties": {
+                    "$size": {
+                        "$setUnion": [
+                            ["$user_id"],
+                            {"$ifNull": ["$participants", []]},
+                        ]
+                    }
+                },
+                "currency": {"$ifNull": ["$currency", Currency.INR]},
+                # Month 0 is the previous December
+                "month": {
+                    "$cond": [
+                        {"$lt": ["$created_at", datetime(year, 1, 1)]},
+                        0,
+                        {"$month": "$created_at"},
+                    ]
+                },
+                "category": {"$ifNull": ["$category", UNCATEGORIZED]},
+            }
+        }
+        pipeline = [match, project]
+
+        cutoff = await get_archive_cutoff(self.database, "transactions")
+        if cutoff and start < cutoff:
+            pipeline.append(
+                {
+                    "$unionWith": {
+                        "coll": ARCHIVE_COLLECTIONS["transactions"],
+                        "pipeline": [match, project],
+                    }
+                }
+            )
+
+        # Collapse to one document of parallel numeric arrays per category and
+        # currency, so the driver decodes a few lists instead of a dict per
+        # transaction and no strings are handled row by row
+        pipeline.append(
+            {
+                "$group": {
+                    "_id": {"category": "$category", "currency": "$currency"},
+                    "amounts": {"$push": "$amount"},
+                    "legacy": {"$push": "$legacy"},
+                    "parties": {"$push": "$parties"},
+                    "months": {"$push": "$month"},
+                }
+            }
+        )
+
+        groups = await self.database.transactions.aggregate(
+            pipeline, allowDiskUse=True
+        ).to_list(length=None)
+
+        return SpendingColumns.from_groups(
+            [{**group.pop("_id"), **group} for group in groups],
+            rates={c.value: r for c, r in BalanceService.CURRENCY_RATES.items()},
+            scales={c.value: 10**e for c, e in MINOR_UNIT_EXPONENTS.items()},
+            report_currency=Currency(currency).value,
+        )
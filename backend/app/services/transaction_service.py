@@ -0,0 +1,479 @@
+from typing import List, Optional, Dict, Any, Tuple
+from collections import defaultdict
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from pydantic import TypeAdapter
+
+from app.core.archive import (
+    ARCHIVE_COLLECTIONS,
+    find_with_archive,
+    find_one_with_archive,
+)
+from app.core.fieldsets import FieldSet
+from app.core.money import (
+    decode_amounts,
+    encode_amounts,
+    minor_units,
+    split_minor,
+    to_major,
+)
+from app.core.profiling import profile_section
+from app.models import (
+    ActivityItem,
+    Currency,
+    Transaction,
+    TransactionCreate,
+    TransactionUpdate,
+    TransactionType,
+    TransactionStatus,
+)
+from app.services.activity_service import ActivityService
+from app.services.balance_service import BalanceService
+from app.services.category_service import (
+    AUTO_SOURCES,
+    SOURCE_USER,
+    CategoryService,
+)
+from app.services.group_counter_service import GroupCounterService
+from app.services.group_service import GroupService
+from app.services.ledger_service import LedgerService
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Validating a whole page in one call skips per-document Python overhead
+_transaction_list = TypeAdapter(List[Transaction])
+
+# Fields whose change alters who owes whom
+EFFECT_FIELDS = {"amount", "currency", "type", "status", "participants", "user_id"}
+
+
+def transaction_debts(transaction_doc: Dict[str, Any]) -> List[Tuple[str, str, int]]:
+    """(debtor, creditor, minor units) owed because of a stored transaction
+
+    For a split the payer covers everyone's share including their own, so
+    each other participant owes the payer their share; payments, loans and
+    refunds move the full amount from the payer to the other participants.
+    """
+    if transaction_doc.get("status") == TransactionStatus.CANCELLED:
+        return []
+
+    payer = transaction_doc["user_id"]
+    others = [
+        p for p in dict.fromkeys(transaction_doc.get("participants", [])) if p != payer
+    ]
+    if not others:
+        return []
+
+    amount = transaction_doc["amount"]
+    if transaction_doc["type"] == TransactionType.SPLIT:
+        shares = split_minor(amount, len(others) + 1)[1:]
+    else:
+        shares = split_minor(amount, len(others))
+    return [(participant, payer, share) for participant, share in zip(others, shares)]
+
+
+def transaction_effects(transaction_doc: Dict[str, Any]) -> Dict[str, int]:
+    """Per-user balance change, in minor units; positive means owed money"""
+    effects: Dict[str, int] = defaultdict(int)
+    for debtor, creditor, share in transaction_debts(transaction_doc):
+        effects[creditor] += share
+        effects[debtor] -= share
+    return dict(effects)
+
+
+def transaction_pair_effects(
+    transaction_doc: Dict[str, Any],
+) -> Dict[Tuple[str, str], int]:
+    """Pairwise ledger change keyed by the sorted (user_a, user_b) pair
+
+    Positive amounts mean user_b owes user_a more.
+    """
+    effects: Dict[Tuple[str, str], int] = defaultdict(int)
+    for debtor, creditor, share in transaction_debts(transaction_doc):
+        if creditor < debtor:
+            effects[(creditor, debtor)] += share
+        else:
+            effects[(debtor, creditor)] -= share
+    return dict(effects)
+
+
+class TransactionService:
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        self.collection = database.transactions
+
+    async def create_transaction(
+        self, transaction_data: TransactionCreate
+    ) -> Transaction:
+        """Create a new transaction, update balances and record the activity"""
+        transaction_dict = transaction_data.model_dump()
+        transaction_dict["status"] = TransactionStatus.PENDING
+        if transaction_dict.get("category"):
+            transaction_dict["category_source"] = SOURCE_USER
+        transaction_dict["created_at"] = datetime.utcnow()
+        transaction_dict["updated_at"] = datetime.utcnow()
+
+        await self.insert_transactions(
+            [encode_amounts(transaction_dict, "transactions")]
+        )
+        return Transaction.model_validate(
+            decode_amounts(transaction_dict, "transactions")
+        )
+
+    async def insert_transactions(
+        self, transaction_docs: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Insert stored-form transactions in bulk and apply their effects
+
+        Documents without a category are categorized as one batch first.
+        Documents rejected as duplicates (for example a recurring occurrence
+        that was already materialized) are skipped. Returns the documents that
+        were actually inserted.
+        """
+        if not transaction_docs:
+            return []
+
+        await CategoryService(self.database).categorize(transaction_docs)
+
+        duplicates = set()
+        try:
+            await self.collection.insert_many(transaction_docs, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details["writeErrors"]:
+                if error["code"] != DUPLICATE_KEY_ERROR:
+                    raise
+                duplicates.add(error["index"])
+
+        inserted = [
+            doc for index, doc in enumerate(transaction_docs) if index not in duplicates
+        ]
+        await self._apply_effects(inserted, sign=1)
+        await self._record_activities(inserted)
+        return inserted
+
+    async def get_transactions(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        user_id: Optional[str] = None,
+        group_id: Optional[str] = None,
+        transaction_type: Optional[TransactionType] = None,
+        status: Optional[TransactionStatus] = None,
+        fieldset: Optional[FieldSet] = None,
+    ) -> List[Transaction]:
+        """Get all transactions with optional filtering"""
+        filter_dict: Dict[str, Any] = {}
+        if user_id:
+            filter_dict["$or"] = [{"user_id": user_id}, {"participants": user_id}]
+        if group_id:
+            filter_dict["group_id"] = group_id
+        if transaction_type:
+            filter_dict["type"] = transaction_type
+        if status:
+            filter_dict["status"] = status
+
+        return await self._find(filter_dict, skip, limit, fieldset)
+
+    async def get_transaction_by_id(self, transaction_id: str) -> Optional[Transaction]:
+        """Get a transaction by ID"""
+        try:
+            transaction_doc = await find_one_with_archive(
+                self.database, "transactions", {"_id": ObjectId(transaction_id)}
+            )
+            if transaction_doc:
+                return Transaction.model_validate(
+                    decode_amounts(transaction_doc, "transactions")
+                )
+        except Exception:
+            pass
+        return None
+
+    async def get_transactions_by_user(
+        self, user_id: str, skip: int = 0, limit: int = 100
+    ) -> List[Transaction]:
+        """Get all transactions a user paid for or took part in"""
+        return await self.get_transactions(skip=skip, limit=limit, user_id=user_id)
+
+    async def get_transactions_by_group(
+        self, group_id: str, skip: int = 0, limit: int = 100
+    ) -> List[Transaction]:
+        """Get all transactions for a group"""
+        return await self.get_transactions(skip=skip, limit=limit, group_id=group_id)
+
+    async def update_transaction(
+        self, transaction_id: str, transaction_data: TransactionUpdate
+    ) -> Optional[Transaction]:
+        """Update a transaction, moving balances if the split changed"""
+        try:
+            update_dict = {
+                k: v for k, v in transaction_data.model_dump().items() if v is not None
+            }
+            if not update_dict:
+                return await self.get_transaction_by_id(transaction_id)
+
+            if "amount" in update_dict and "currency" not in update_dict:
+                transaction_doc = await self.collection.find_one(
+                    {"_id": ObjectId(transaction_id)}, {"currency": 1}
+                )
+                if not transaction_doc:
+                    return None
+                currency = transaction_doc.get("currency")
+                encode_amounts(update_dict, "transactions", currency)
+            else:
+                encode_amounts(update_dict, "transactions")
+
+            if "category" in update_dict:
+                update_dict["category_source"] = SOURCE_USER
+            update_dict["updated_at"] = datetime.utcnow()
+
+            before = await self.collection.find_one_and_update(
+                {"_id": ObjectId(transaction_id)},
+                {"$set": update_dict},
+                return_document=ReturnDocument.BEFORE,
+            )
+            if not before:
+                return None
+
+            after = {**before, **update_dict}
+            if EFFECT_FIELDS & update_dict.keys():
+                await self._apply_effects([before], sign=-1)
+                await self._apply_effects([after], sign=1)
+            await self._update_category(before, after, update_dict)
+            return Transaction.model_validate(decode_amounts(after, "transactions"))
+        except Exception:
+            pass
+        return None
+
+    async def _update_category(
+        self,
+        before: Dict[str, Any],
+        after: Dict[str, Any],
+        update_dict: Dict[str, Any],
+    ) -> None:
+        categories = CategoryService(self.database)
+        if "category" in update_dict:
+            # A correction applies to the user's later transactions with the title
+            await categories.set_override(
+                after["user_id"], after["title"], update_dict["category"]
+            )
+        elif "title" in update_dict and (
+            not before.get("category") or before.get("category_source") in AUTO_SOURCES
+        ):
+            await categories.categorize([after], recategorize=True)
+            await self.collection.update_one(
+                {"_id": after["_id"]},
+                {
+                    "$set": {
+                        "category": after["category"],
+                        "category_source": after["category_source"],
+                    }
+                },
+            )
+
+    async def update_transaction_status(
+        self, transaction_id: str, status: TransactionStatus
+    ) -> Optional[Transaction]:
+        """Update the status of a transaction"""
+        return await self.update_transaction(
+            transaction_id, TransactionUpdate(status=status)
+        )
+
+    async def delete_transaction(self, transaction_id: str) -> bool:
+        """Delete a transaction and reverse its balance changes"""
+        try:
+            transaction_doc = await self.collection.find_one_and_delete(
+                {"_id": ObjectId(transaction_id)}
+            )
+            if not transaction_doc:
+                return False
+            # A copy the archive job made but has not finished with
+            await self.database[ARCHIVE_COLLECTIONS["transactions"]].delete_one(
+                {"_id": transaction_doc["_id"], "rolled_up": False}
+            )
+            await self._apply_effects([transaction_doc], sign=-1)
+            return True
+        except Exception:
+            return False
+
+    async def get_user_transaction_summary(
+        self, user_id: str, currency: Currency = Currency.INR
+    ) -> Dict[str, Any]:
+        """Get transaction counts and amounts for a user, including archived history
+
+        Amounts by status are converted to ``currency``; ``by_currency`` keeps
+        each currency's own total.
+        """
+        pipeline = [
+            {"$match": {"user_id": user_id}},
+            {
+                "$group": {
+                    "_id": {"status": "$status", "currency": "$currency"},
+                    "count": {"$sum": 1},
+                    "amount": {"$sum": minor_units()},
+                }
+            },
+        ]
+        rows = await self.collection.aggregate(pipeline).to_list(length=None)
+
+        # Archived transactions only survive as monthly rollups
+        rollups = self.database.transaction_rollups.aggregate(
+            [
+                {"$match": {"_id.user_id": user_id}},
+                {
+                    "$group": {
+                        "_id": {"status": "$_id.status", "currency": "$_id.currency"},
+                        "count": {"$sum": "$count"},
+                        "amount": {"$sum": "$amount"},
+                    }
+                },
+            ]
+        )
+        rows.extend(await rollups.to_list(length=None))
+
+        # Accumulate exact minor units per currency and convert once at the end
+        by_status: Dict[str, Dict[str, Any]] = {}
+        by_currency: Dict[str, int] = {}
+        total_count = 0
+        for row in rows:
+            row_currency = row["_id"]["currency"] or Currency.INR
+            status = by_status.setdefault(
+                row["_id"]["status"], {"count": 0, "amounts": {}}
+            )
+            status["count"] += row["count"]
+            status["amounts"][row_currency] = (
+                status["amounts"].get(row_currency, 0) + row["amount"]
+            )
+            by_currency[row_currency] = by_currency.get(row_currency, 0) + row["amount"]
+            total_count += row["count"]
+
+        rates = BalanceService.CURRENCY_RATES
+        target_rate = rates.get(Currency(currency), 1.0)
+        for status in by_status.values():
+            amount = sum(
+                to_major(minor, row_currency) * rates.get(Currency(row_currency), 1.0)
+                for row_currency, minor in status.pop("amounts").items()
+            )
+            status["amount"] = round(amount / target_rate, 2)
+
+        return {
+            "user_id": user_id,
+            "currency": currency,
+            "total_transactions": total_count,
+            "by_status": by_status,
+            "by_currency": {
+                row_currency: to_major(amount, row_currency)
+                for row_currency, amount in by_currency.items()
+            },
+        }
+
+    async def _apply_effects(
+        self, transaction_docs: List[Dict[str, Any]], sign: int
+    ) -> None:
+        """Apply (or with ``sign=-1`` reverse) balances for many transactions
+
+        Changes are summed per (user, currency), per user pair and per group
+        first, so a batch costs one bulk write on each of balances, the pair
+        ledger and groups (or, for hot groups, their counter shards).
+        """
+        balance_deltas: Dict[Tuple[str, Currency], int] = defaultdict(int)
+        pair_deltas: Dict[Tuple[str, str, Currency], int] = defaultdict(int)
+        group_members: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        group_expenses: Dict[str, int] = defaultdict(int)
+
+        for doc in transaction_docs:
+            effects = transaction_effects(doc)
+            for user_id, delta in effects.items():
+                balance_deltas[(user_id, doc["currency"])] += sign * delta
+            for (user_a, user_b), delta in transaction_pair_effects(doc).items():
+                pair_deltas[(user_a, user_b, doc["currency"])] += sign * delta
+
+            group_id = doc.get("group_id")
+            if group_id and ObjectId.is_valid(group_id):
+                for user_id, delta in effects.items():
+                    group_members[group_id][user_id] += sign * delta
+                if effects and doc["type"] == TransactionType.SPLIT:
+                    group_expenses[group_id] += sign * doc["amount"]
+
+        await BalanceService(self.database).apply_balance_deltas(
+            balance_deltas,
+            source="transaction" if sign > 0 else "reversal",
+            refs=[str(doc["_id"]) for doc in transaction_docs if "_id" in doc],
+        )
+        await LedgerService(self.database).apply_pair_deltas(pair_deltas)
+
+        if group_members:
+            await GroupCounterService(self.database).apply_group_deltas(
+                group_members, group_expenses
+            )
+            GroupService.forget_balance_summaries(group_members)
+
+    async def _record_activities(self, transaction_docs: List[Dict[str, Any]]) -> None:
+        group_ids = {
+            doc["group_id"]
+            for doc in transaction_docs
+            if doc.get("group_id") and ObjectId.is_valid(doc["group_id"])
+        }
+        group_names = {}
+        if group_ids:
+            async for group_doc in self.database.groups.find(
+                {"_id": {"$in": [ObjectId(g) for g in group_ids]}}, {"name": 1}
+            ):
+                group_names[str(group_doc["_id"])] = group_doc["name"]
+
+        activities = []
+        for doc in transaction_docs:
+            transaction = Transaction.model_validate(
+                decode_amounts(dict(doc), "transactions")
+            )
+            activities.append(
+                ActivityItem(
+                    type=transaction.type,
+                    title=transaction.title,
+                    description=transaction.description or "",
+                    amount=transaction.amount,
+                    currency=transaction.currency,
+                    group_id=transaction.group_id,
+                    group_name=group_names.get(transaction.group_id),
+                    participants=list(transaction.participants),
+                    created_by=transaction.user_id,
+                    status=transaction.status,
+                    timestamp=transaction.created_at,
+                )
+            )
+        await ActivityService(self.database).create_activities(activities)
+
+    async def _find(
+        self,
+        filter_dict: Dict[str, Any],
+        skip: int,
+        limit: int,
+        fieldset: Optional[FieldSet] = None,
+    ) -> List[Transaction]:
+        projection = fieldset.projection if fieldset else None
+        # Pending transactions are never archived
+        if filter_dict.get("status") == TransactionStatus.PENDING:
+            cursor = (
+                self.collection.find(filter_dict, projection)
+                .sort("created_at", -1)
+                .skip(skip)
+                .limit(limit)
+            )
+            transaction_docs = await cursor.to_list(length=limit)
+        else:
+            transaction_docs = await find_with_archive(
+                self.database,
+                "transactions",
+                filter_dict,
+                "created_at",
+                skip,
+                limit,
+                projection=projection,
+            )
+        adapter = fieldset.adapter if fieldset else _transaction_list
+        with profile_section("model"):
+            return adapter.validate_python(
+                [decode_amounts(doc, "transactions") for doc in transaction_docs]
+            )
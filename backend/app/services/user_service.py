@@ -3,7 +3,9 @@ from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
 
+from app.core.profiling import profile_section
 from app.models import User, UserCreate, UserUpdate, UserPreferences
+from app.services.propagation_service import profile_propagator
 
 
 class UserService:
@@ -26,8 +28,8 @@ class UserService:
             raise ValueError("Username already taken")
 
         # Create user document
-        user_dict = user_data.dict()
-        user_dict["preferences"] = UserPreferences().dict()
+        user_dict = user_data.model_dump()
+        user_dict["preferences"] = UserPreferences().model_dump()
         user_dict["is_active"] = True
         user_dict["created_at"] = datetime.utcnow()
         user_dict["updated_at"] = datetime.utcnow()
@@ -35,15 +37,14 @@ class UserService:
         result = await self.collection.insert_one(user_dict)
         user_dict["_id"] = result.inserted_id
 
-        return User(**user_dict)
+        return User.model_validate(user_dict)
 
     async def get_users(self, skip: int = 0, limit: int = 100) -> List[User]:
         """Get all users with pagination"""
         cursor = self.collection.find({"is_active": True}).skip(skip).limit(limit)
-        users = []
-        async for user_doc in cursor:
-            users.append(User(**user_doc))
-        return users
+        user_docs = await cursor.to_list(length=None)
+        with profile_section("model"):
+            return [User.model_validate(user_doc) for user_doc in user_docs]
 
     async def get_user_by_id(self, user_id: str) -> Optional[User]:
         """Get a user by ID"""
@@ -52,7 +53,7 @@ class UserService:
                 {"_id": ObjectId(user_id), "is_active": True}
             )
             if user_doc:
-                return User(**user_doc)
+                return User.model_validate(user_doc)
         except Exception:
             pass
         return None
@@ -61,7 +62,7 @@ class UserService:
         """Get a user by email"""
         user_doc = await self.collection.find_one({"email": email, "is_active": True})
         if user_doc:
-            return User(**user_doc)
+            return User.model_validate(user_doc)
         return None
 
     async def get_user_by_username(self, username: str) -> Optional[User]:
@@ -70,14 +71,16 @@ class UserService:
             {"username": username, "is_active": True}
         )
         if user_doc:
-            return User(**user_doc)
+            return User.model_validate(user_doc)
         return None
 
     async def update_user(self, user_id: str, user_data: UserUpdate) -> Optional[User]:
         """Update a user"""
         try:
             # Prepare update data
-            update_dict = {k: v for k, v in user_data.dict().items() if v is not None}
+            update_dict = {
+                k: v for k, v in user_data.model_dump().items() if v is not None
+            }
             if not update_dict:
                 # If no fields to update, just return the current user
                 return await self.get_user_by_id(user_id)
@@ -100,6 +103,8 @@ class UserService:
             )
 
             if result.modified_count:
+                if "full_name" in update_dict or "avatar" in update_dict:
+                    profile_propagator.user_changed(self.database, user_id)
                 return await self.get_user_by_id(user_id)
         except Exception:
             pass
@@ -131,7 +136,6 @@ class UserService:
         }
 
         cursor = self.collection.find(search_filter).limit(limit)
-        users = []
-        async for user_doc in cursor:
-            users.append(User(**user_doc))
-        return users
+        user_docs = await cursor.to_list(length=None)
+        with profile_section("model"):
+            return [User.model_validate(user_doc) for user_doc in user_docs]
@@ -0,0 +1,74 @@
+"""
+Benchmark the offline categorizer at backfill batch sizes
+
+Generates transaction titles shaped like real ones (a merchant or keyword,
+filler words, order numbers) and reports rows per second for title keys
+plus one batched prediction, as a cold backfill batch sees it, and for a
+warm batch where every key is already in the title cache.
+
+Run from ``backend/`` with ``python -m benchmarks.bench_categorizer``.
+"""
+
+import argparse
+import random
+import time
+from typing import List
+
+from app.core.analytics import UNCATEGORIZED
+from app.core.categorizer import CATEGORY_KEYWORDS, get_categorizer, title_key
+
+FILLERS = ["with", "team", "friends", "weekend", "office", "for", "the", "at"]
+UNKNOWN = ["settlement", "misc", "returned", "contribution", "farewell", "stuff"]
+
+
+def make_pool(rng: random.Random, distinct: int) -> List[str]:
+    keywords = [word for words in CATEGORY_KEYWORDS.values() for word in words]
+    pool = []
+    for _ in range(distinct):
+        words = rng.sample(FILLERS, 2) + [rng.choice(keywords + UNKNOWN)]
+        rng.shuffle(words)
+        pool.append(" ".join(words).title())
+    return pool
+
+
+def make_titles(rng: random.Random, pool: List[str], count: int) -> List[str]:
+    # Order numbers differ per row but normalize away
+    return [f"{rng.choice(pool)} #{rng.randint(1000, 99999)}" for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=5000)
+    parser.add_argument("--batches", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    categorizer = get_categorizer()
+    pool = make_pool(rng, args.distinct)
+    batches = [make_titles(rng, pool, args.batch_size) for _ in range(args.batches)]
+
+    start = time.perf_counter()
+    results = []
+    for titles in batches:
+        results.extend(categorizer.predict([title_key(t) for t in titles]))
+    cold = time.perf_counter() - start
+
+    cache = {}
+    start = time.perf_counter()
+    for titles in batches:
+        keys = [title_key(t) for t in titles]
+        unseen = [k for k in dict.fromkeys(keys) if k not in cache]
+        cache.update(zip(unseen, categorizer.predict(unseen)))
+        [cache[k] for k in keys]
+    cached = time.perf_counter() - start
+
+    rows = args.batch_size * args.batches
+    share = 1 - results.count(UNCATEGORIZED) / len(results)
+    print(f"rows: {rows:,}  categorized: {share:.0%}")
+    print(f"uncached: {rows / cold:>12,.0f} rows/s")
+    print(f"cached:   {rows / cached:>12,.0f} rows/s  ({len(cache):,} keys)")
+
+
+if __name__ == "__main__":
+    main()
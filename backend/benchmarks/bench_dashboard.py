@@ -0,0 +1,101 @@
+"""
+Benchmark the dashboard endpoint against the sequential client pattern
+
+Against a running API, repeatedly loads a user's home screen two ways and
+reports latency percentiles and bytes transferred:
+
+- sequential: the five calls the app makes today, one after another
+- dashboard: a single ``GET /api/v1/dashboard/{user_id}``
+
+``--rtt-ms`` adds a fixed delay before every request to model a phone's
+network round trip, which is what the single call mostly saves.
+
+Run from ``backend/`` with
+``python -m benchmarks.bench_dashboard --user-id <id> --token <token> [--base-url URL]``;
+``python -m app.jobs.issue_token <id>`` prints a token.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List, Tuple
+
+import httpx
+
+SEQUENTIAL_PATHS = [
+    "/api/v1/balances/user/{user_id}",
+    "/api/v1/balances/user/{user_id}/total",
+    "/api/v1/groups/user/{user_id}",
+    "/api/v1/activities/user/{user_id}/recent",
+    "/api/v1/transactions/user/{user_id}/summary",
+]
+DASHBOARD_PATH = "/api/v1/dashboard/{user_id}"
+
+
+async def _get(client: httpx.AsyncClient, path: str, rtt: float) -> int:
+    if rtt:
+        await asyncio.sleep(rtt)
+    response = await client.get(path)
+    response.raise_for_status()
+    return len(response.content)
+
+
+async def load_sequential(
+    client: httpx.AsyncClient, user_id: str, rtt: float
+) -> Tuple[float, int]:
+    start = time.perf_counter()
+    size = 0
+    for path in SEQUENTIAL_PATHS:
+        size += await _get(client, path.format(user_id=user_id), rtt)
+    return time.perf_counter() - start, size
+
+
+async def load_dashboard(
+    client: httpx.AsyncClient, user_id: str, rtt: float
+) -> Tuple[float, int]:
+    start = time.perf_counter()
+    size = await _get(client, DASHBOARD_PATH.format(user_id=user_id), rtt)
+    return time.perf_counter() - start, size
+
+
+def _report(name: str, timings: List[float], size: int) -> None:
+    ms = sorted(t * 1000 for t in timings)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    print(
+        f"{name:<12} p50 {statistics.median(ms):>8.1f} ms   p95 {p95:>8.1f} ms"
+        f"   {size:>8,} bytes"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--rtt-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    rtt = args.rtt_ms / 1000
+
+    headers = {"Authorization": f"Bearer {args.token}"}
+    async with httpx.AsyncClient(
+        base_url=args.base_url, headers=headers, timeout=30
+    ) as client:
+        # Warm up routers, connections and caches for both patterns
+        await load_sequential(client, args.user_id, 0)
+        await load_dashboard(client, args.user_id, 0)
+
+        for name, load in (
+            ("sequential", load_sequential),
+            ("dashboard", load_dashboard),
+        ):
+            timings, size = [], 0
+            for _ in range(args.iterations):
+                elapsed, size = await load(client, args.user_id, rtt)
+                timings.append(elapsed)
+            _report(name, timings, size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""
+Benchmark sparse fieldsets and response compression for list pages
+
+Builds a page of Mongo-shaped documents per list endpoint and, for the full
+model and a typical mobile fieldset, reports the time to validate and
+serialize the page and its size as identity, gzip and brotli at the levels
+``CompressionMiddleware`` uses. The fieldset rows only see the projected
+fields, as Mongo would return them.
+
+Run from ``backend/`` with ``python -m benchmarks.bench_fieldsets``.
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core.compression import brotli, compress
+from app.core.fieldsets import FieldSet
+from app.models import ActivityItem, Group, Transaction
+from benchmarks.bench_models import make_activity, make_group, make_transaction
+
+CASES = {
+    "transactions": (Transaction, make_transaction, "title,amount,type,created_at"),
+    "activities": (ActivityItem, make_activity, "title,amount,type,timestamp"),
+    "groups": (Group, make_group, "name,avatar,total_expenses"),
+}
+
+
+def best_ms(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def full_page(model: type, docs: List[Dict[str, Any]]) -> bytes:
+    # What FastAPI does with a response_model: validate, encode, json.dumps
+    items = TypeAdapter(List[model]).validate_python(docs)
+    content = jsonable_encoder(items, by_alias=True)
+    return json.dumps(content, separators=(",", ":")).encode()
+
+
+def sparse_page(fieldset: FieldSet, docs: List[Dict[str, Any]]) -> bytes:
+    items = fieldset.adapter.validate_python(docs)
+    return fieldset.adapter.dump_json(items, by_alias=True)
+
+
+def project(doc: Dict[str, Any], projection: Dict[str, int]) -> Dict[str, Any]:
+    return {key: value for key, value in doc.items() if key in projection}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    print(
+        f"{'endpoint':<14}{'shape':<8}{'ms':>8}{'identity':>10}"
+        + "".join(f"{e:>10}" for e in encodings)
+    )
+    for name, (model, make, fields) in CASES.items():
+        docs = [make(rng) for _ in range(args.page_size)]
+        fieldset = FieldSet.parse(model, fields)
+        projected = [project(doc, fieldset.projection) for doc in docs]
+        for shape, render in (
+            ("full", lambda: full_page(model, docs)),
+            ("sparse", lambda: sparse_page(fieldset, projected)),
+        ):
+            body = render()
+            sizes = [len(compress(body, e)) for e in encodings]
+            print(
+                f"{name:<14}{shape:<8}{best_ms(render, args.repeat):>8.2f}"
+                f"{len(body):>10,}" + "".join(f"{s:>10,}" for s in sizes)
+            )
+
+
+if __name__ == "__main__":
+    main()
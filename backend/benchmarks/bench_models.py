@@ -0,0 +1,180 @@
+"""
+Benchmark model validation and serialization throughput
+
+Builds Mongo-shaped documents (real ObjectIds and datetimes) for the models
+list endpoints return most, then measures documents per second for:
+
+- validate: ``Model(**doc)`` per document, ``Model.model_validate`` per
+  document and one ``TypeAdapter(List[Model]).validate_python`` call
+- dump: ``model_dump()``, ``model_dump(mode="json")`` and a single
+  ``TypeAdapter(List[Model]).dump_json`` of the whole page
+
+Run from ``backend/`` with ``python -m benchmarks.bench_models``.
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from bson import ObjectId
+from pydantic import BaseModel, TypeAdapter
+
+from app.models import ActivityItem, Balance, Group, Transaction
+
+CURRENCIES = ["INR", "USD", "EUR", "GBP"]
+
+
+def _user_ids(rng: random.Random, count: int) -> List[str]:
+    return [str(ObjectId()) for _ in range(rng.randint(1, count))]
+
+
+def make_balance(rng: random.Random) -> Dict[str, Any]:
+    now = datetime.utcnow()
+    return {
+        "_id": ObjectId(),
+        "user_id": str(ObjectId()),
+        "name": "Priya Sharma",
+        "avatar": "https://example.com/avatar.png",
+        "amount": round(rng.uniform(-5000, 5000), 2),
+        "currency": rng.choice(CURRENCIES),
+        "last_activity": now,
+        "created_at": now - timedelta(days=30),
+        "updated_at": now,
+    }
+
+
+def make_transaction(rng: random.Random) -> Dict[str, Any]:
+    now = datetime.utcnow()
+    return {
+        "_id": ObjectId(),
+        "user_id": str(ObjectId()),
+        "title": "Dinner at Toit",
+        "amount": round(rng.uniform(1, 20000), 2),
+        "currency": rng.choice(CURRENCIES),
+        "type": rng.choice(["split", "payment", "loan"]),
+        "status": rng.choice(["pending", "settled"]),
+        "group_id": str(ObjectId()),
+        "participants": _user_ids(rng, 6),
+        "description": "Shared evenly",
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def make_group(rng: random.Random) -> Dict[str, Any]:
+    now = datetime.utcnow()
+    return {
+        "_id": ObjectId(),
+        "name": "Goa Trip",
+        "description": "Flights, stay and food",
+        "avatar": "https://example.com/group.png",
+        "members": [
+            {
+                "user_id": user_id,
+                "name": "Member",
+                "avatar": "",
+                "balance": round(rng.uniform(-2000, 2000), 2),
+                "currency": "INR",
+            }
+            for user_id in _user_ids(rng, 8)
+        ],
+        "total_expenses": round(rng.uniform(0, 100000), 2),
+        "currency": "INR",
+        "created_by": str(ObjectId()),
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def make_activity(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "_id": ObjectId(),
+        "type": rng.choice(["split", "payment", "loan", "refund"]),
+        "title": "Cab to airport",
+        "description": "Split between 3 people",
+        "amount": round(rng.uniform(1, 5000), 2),
+        "currency": rng.choice(CURRENCIES),
+        "group_id": str(ObjectId()),
+        "group_name": "Goa Trip",
+        "participants": _user_ids(rng, 6),
+        "created_by": str(ObjectId()),
+        "status": "pending",
+        "timestamp": datetime.utcnow(),
+    }
+
+
+MODELS = {
+    Balance: make_balance,
+    Transaction: make_transaction,
+    Group: make_group,
+    ActivityItem: make_activity,
+}
+
+
+def docs_per_second(fn: Callable[[], Any], count: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+def bench_model(
+    model: type, docs: List[Dict[str, Any]], repeat: int
+) -> Dict[str, float]:
+    adapter = TypeAdapter(List[model])
+    instances: List[BaseModel] = adapter.validate_python(docs)
+    count = len(docs)
+    return {
+        "Model(**doc)": docs_per_second(
+            lambda: [model(**doc) for doc in docs], count, repeat
+        ),
+        "model_validate": docs_per_second(
+            lambda: [model.model_validate(doc) for doc in docs], count, repeat
+        ),
+        "adapter.validate": docs_per_second(
+            lambda: adapter.validate_python(docs), count, repeat
+        ),
+        "model_dump": docs_per_second(
+            lambda: [m.model_dump() for m in instances], count, repeat
+        ),
+        "model_dump(json)": docs_per_second(
+            lambda: [m.model_dump(mode="json", by_alias=True) for m in instances],
+            count,
+            repeat,
+        ),
+        "adapter.dump_json": docs_per_second(
+            lambda: adapter.dump_json(instances, by_alias=True), count, repeat
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    columns = None
+    for model, make in MODELS.items():
+        for size in args.sizes:
+            docs = [make(rng) for _ in range(size)]
+            results = bench_model(model, docs, args.repeat)
+            if columns is None:
+                columns = list(results)
+                print(
+                    f"{'model':<14}{'batch':>6}" + "".join(f"{c:>19}" for c in columns)
+                )
+            print(
+                f"{model.__name__:<14}{size:>6}"
+                + "".join(f"{results[c]:>19,.0f}" for c in columns)
+            )
+    print("(documents per second, best of --repeat runs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Benchmark yearly spending reports: per-document Python loop vs NumPy engine
+
+Generates a synthetic year of split expenses with the fields the spending
+aggregation projects and times both implementations on it. No database is
+needed.
+
+Run from ``backend/`` with ``python -m benchmarks.bench_spending_reports``.
+"""
+
+import argparse
+import random
+import statistics
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from app.core.analytics import (
+    UNCATEGORIZED,
+    SpendingColumns,
+    category_color,
+    compute_year_reports,
+)
+
+CURRENCIES = ["INR", "USD", "EUR", "GBP", "CAD", "AUD"]
+CATEGORIES = ["Food", "Transport", "Shopping", "Bills", "Entertainment", UNCATEGORIZED]
+RATES = {"USD": 83.0, "EUR": 89.0, "GBP": 104.0, "CAD": 61.0, "AUD": 54.0, "INR": 1.0}
+SCALES = {currency: 100 for currency in CURRENCIES}
+
+
+def make_documents(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    docs = []
+    for _ in range(count):
+        legacy = rng.random() < 0.05
+        major = round(rng.lognormvariate(6, 1), 2)
+        docs.append(
+            {
+                "amount": major if legacy else int(major * 100),
+                "legacy": legacy,
+                "parties": rng.randint(1, 6),
+                "currency": rng.choice(CURRENCIES),
+                "month": rng.randint(0, 12),
+                "category": rng.choice(CATEGORIES),
+            }
+        )
+    return docs
+
+
+def _percentile(values: List[float], q: float) -> float:
+    # Linear interpolation, matching numpy's default
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def naive_year_reports(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The straightforward version: one Python pass per document, per month"""
+    totals = defaultdict(float)
+    by_category = defaultdict(lambda: defaultdict(float))
+    amounts = defaultdict(list)
+    for doc in docs:
+        major = (
+            doc["amount"] if doc["legacy"] else doc["amount"] / SCALES[doc["currency"]]
+        )
+        share = major / max(doc["parties"], 1) * RATES[doc["currency"]]
+        totals[doc["month"]] += share
+        if doc["month"]:
+            by_category[doc["month"]][doc["category"]] += share
+            amounts[doc["month"]].append(share)
+
+    year_total = sum(totals[m] for m in range(1, 13))
+    reports = []
+    for month in range(1, 13):
+        total, previous = totals[month], totals[month - 1]
+        values = sorted(amounts[month])
+        categories = [
+            {
+                "name": name,
+                "amount": round(amount, 2),
+                "percentage": round(amount / total * 100, 2),
+                "color": category_color(name),
+            }
+            for name, amount in sorted(
+                by_category[month].items(), key=lambda item: -item[1]
+            )
+        ]
+        reports.append(
+            {
+                "month": month,
+                "total_spent": round(total, 2),
+                "categories": categories,
+                "trends": {
+                    "transaction_count": len(values),
+                    "previous_month_total": round(previous, 2),
+                    "month_over_month_change": (
+                        round((total - previous) / previous * 100, 2)
+                        if previous
+                        else None
+                    ),
+                    "average_transaction": (
+                        round(total / len(values), 2) if values else 0.0
+                    ),
+                    "median_transaction": (
+                        round(statistics.median(values), 2) if values else 0.0
+                    ),
+                    "p90_transaction": (
+                        round(_percentile(values, 90), 2) if values else 0.0
+                    ),
+                    "p99_transaction": (
+                        round(_percentile(values, 99), 2) if values else 0.0
+                    ),
+                    "share_of_year": (
+                        round(total / year_total * 100, 2) if year_total else 0.0
+                    ),
+                    "top_category": categories[0]["name"] if categories else None,
+                },
+            }
+        )
+    return reports
+
+
+def to_groups(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per-(category, currency) parallel lists, as the service's ``$group``
+    stage returns them"""
+    groups: Dict[tuple, Dict[str, Any]] = {}
+    for doc in docs:
+        key = (doc["category"], doc["currency"])
+        if key not in groups:
+            groups[key] = {
+                "category": doc["category"],
+                "currency": doc["currency"],
+                "amounts": [],
+                "legacy": [],
+                "parties": [],
+                "months": [],
+            }
+        group = groups[key]
+        group["amounts"].append(doc["amount"])
+        group["legacy"].append(doc["legacy"])
+        group["parties"].append(doc["parties"])
+        group["months"].append(doc["month"])
+    return list(groups.values())
+
+
+def vectorized_year_reports(groups: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    spending = SpendingColumns.from_groups(
+        groups, rates=RATES, scales=SCALES, report_currency="INR"
+    )
+    return compute_year_reports(spending)
+
+
+def best_of(repeat: int, fn, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 500_000]
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Each side starts from what its query returns: a list of documents for
+    # the naive loop, a few documents of parallel arrays for the engine
+    print(
+        f"{'transactions':>12} {'naive ms':>10} {'numpy ms':>10} {'speedup':>8}"
+        f" {'pivot ms':>10}"
+    )
+    for size in args.sizes:
+        docs = make_documents(size)
+        groups = to_groups(docs)
+
+        naive, vectorized = naive_year_reports(docs), vectorized_year_reports(groups)
+        for a, b in zip(naive, vectorized):
+            assert abs(a["total_spent"] - b["total_spent"]) < 0.02, (a, b)
+            assert (
+                abs(a["trends"]["p90_transaction"] - b["trends"]["p90_transaction"])
+                < 0.02
+            ), (a, b)
+            assert a["trends"]["top_category"] == b["trends"]["top_category"]
+
+        naive_time = best_of(args.repeat, naive_year_reports, docs)
+        vectorized_time = best_of(args.repeat, vectorized_year_reports, groups)
+        # Client-side pivot, for reference: what the engine would cost on top
+        # if it were fed plain find() results instead of the aggregation
+        pivot_time = best_of(args.repeat, to_groups, docs)
+        print(
+            f"{size:>12} {naive_time * 1000:>10.1f} {vectorized_time * 1000:>10.1f}"
+            f" {naive_time / vectorized_time:>7.1f}x {pivot_time * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,42 @@
 """
 PaisaSplit Backend Server
 FastAPI server for PaisaSplit expense tracking application
+
+Usage:
+    python run.py                 # development server with auto-reload
+    python run.py --production    # multi-worker server (or SERVER_MODE=production)
 """
 
+import argparse
+
 import uvicorn
-from app.main import app
+
+from app.core.config import DEFAULT_SECRET_KEY, settings
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app", host="0.0.0.0", port=8000, reload=True, log_level="info"
+    parser = argparse.ArgumentParser(description="Run the PaisaSplit API")
+    parser.add_argument(
+        "--production",
+        action="store_true",
+        default=settings.server_mode == "production",
+        help="run multiple workers with uvloop/httptools and graceful shutdown",
     )
+    parser.add_argument("--host", default=settings.server_host)
+    parser.add_argument("--port", type=int, default=settings.server_port)
+    args = parser.parse_args()
+
+    if args.production:
+        if settings.auth_enabled and settings.secret_key == DEFAULT_SECRET_KEY:
+            parser.error("SECRET_KEY must be changed from the default in production")
+
+        from app.core.server import run_production
+
+        run_production(args.host, args.port)
+    else:
+        uvicorn.run(
+            "app.main:app",
+            host=args.host,
+            port=args.port,
+            reload=True,
+            log_level="info",
+        )
@@ -0,0 +1,129 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.core.analytics import (
+    UNCATEGORIZED,
+    SpendingColumns,
+    category_color,
+    compute_year_reports,
+)
+
+RATES = {"INR": 1.0, "USD": 80.0}
+SCALES = {"INR": 100, "USD": 100}
+
+
+def columns(amounts, months, categories, names):
+    return SpendingColumns(
+        amounts=np.array(amounts, dtype=np.float64),
+        months=np.array(months, dtype=np.int64),
+        categories=np.array(categories, dtype=np.int64),
+        category_names=names,
+    )
+
+
+def test_from_groups_converts_splits_and_legacy_amounts():
+    groups = [
+        {
+            "category": "Food",
+            "currency": "USD",
+            "amounts": [1000, 25.0],
+            "legacy": [False, True],
+            "parties": [2, 1],
+            "months": [1, 2],
+        },
+        {
+            "category": "Bills",
+            "currency": "INR",
+            "amounts": [50000],
+            "legacy": [False],
+            "parties": [0],
+            "months": [1],
+        },
+    ]
+    result = SpendingColumns.from_groups(groups, RATES, SCALES, "INR")
+    # $10 split two ways, a legacy $25, and ₹500 with no parties recorded
+    assert result.amounts.tolist() == [400.0, 2000.0, 500.0]
+    assert result.months.tolist() == [1, 2, 1]
+    assert result.categories.tolist() == [0, 0, 1]
+    assert result.category_names == ["Food", "Bills"]
+
+
+def test_from_groups_handles_no_spending():
+    result = SpendingColumns.from_groups([], RATES, SCALES, "INR")
+    assert compute_year_reports(result)[0]["total_spent"] == 0.0
+
+
+def test_month_report():
+    reports = compute_year_reports(
+        columns(
+            [100.0, 50.0, 30.0, 20.0],
+            [0, 1, 1, 1],
+            [0, 0, 1, 0],
+            ["Food", "Bills"],
+        )
+    )
+    assert len(reports) == 12
+    january = reports[0]
+    assert january["month"] == 1
+    assert january["total_spent"] == 100.0
+    assert january["categories"] == [
+        {"name": "Food", "amount": 70.0, "percentage": 70.0, "color": "#FF6B6B"},
+        {"name": "Bills", "amount": 30.0, "percentage": 30.0, "color": "#96CEB4"},
+    ]
+    trends = january["trends"]
+    assert trends["transaction_count"] == 3
+    assert trends["previous_month_total"] == 100.0
+    assert trends["month_over_month_change"] == 0.0
+    assert trends["median_transaction"] == 30.0
+    assert trends["share_of_year"] == 100.0
+    assert trends["top_category"] == "Food"
+
+    february = reports[1]
+    assert february["total_spent"] == 0.0
+    assert february["categories"] == []
+    assert february["trends"]["month_over_month_change"] == -100.0
+    assert february["trends"]["median_transaction"] == 0.0
+    assert reports[2]["trends"]["month_over_month_change"] is None
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_reports_match_a_per_month_computation(seed):
+    rng = random.Random(seed)
+    names = ["Food", "Travel", UNCATEGORIZED]
+    count = rng.randrange(1, 200)
+    amounts = [round(rng.uniform(1, 500), 2) for _ in range(count)]
+    months = [rng.randrange(0, 13) for _ in range(count)]
+    categories = [rng.randrange(len(names)) for _ in range(count)]
+    reports = compute_year_reports(columns(amounts, months, categories, names))
+
+    for report in reports:
+        month = report["month"]
+        spent = [a for a, m in zip(amounts, months) if m == month]
+        previous = sum(a for a, m in zip(amounts, months) if m == month - 1)
+        assert report["total_spent"] == pytest.approx(sum(spent), abs=0.01)
+        assert report["trends"]["transaction_count"] == len(spent)
+        assert report["trends"]["previous_month_total"] == pytest.approx(
+            previous, abs=0.01
+        )
+        if spent:
+            for key, q in [("median", 50), ("p90", 90), ("p99", 99)]:
+                assert report["trends"][f"{key}_transaction"] == pytest.approx(
+                    np.percentile(spent, q), abs=0.01
+                )
+        by_category = {}
+        for a, m, c in zip(amounts, months, categories):
+            if m == month:
+                by_category[names[c]] = by_category.get(names[c], 0) + a
+        assert {c["name"]: c["amount"] for c in report["categories"]} == pytest.approx(
+            by_category, abs=0.01
+        )
+        assert [c["amount"] for c in report["categories"]] == sorted(
+            (c["amount"] for c in report["categories"]), reverse=True
+        )
+
+
+def test_category_color_is_stable():
+    assert category_color("Food") == "#FF6B6B"
+    assert category_color("Pets") == category_color("Pets")
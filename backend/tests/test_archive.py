@@ -0,0 +1,153 @@
+import asyncio
+import itertools
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core import archive
+from app.core.archive import find_one_with_archive, find_with_archive
+
+CUTOFF = datetime(2025, 1, 1)
+_ids = itertools.count()
+
+
+def _matches(doc, filter_dict):
+    for field, condition in filter_dict.items():
+        if field == "$and":
+            if not all(_matches(doc, part) for part in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = doc.get(field)
+            if "$gte" in condition and not value >= condition["$gte"]:
+                return False
+            if "$lt" in condition and not value < condition["$lt"]:
+                return False
+        elif doc.get(field) != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs = sorted(self.docs, key=lambda d: d[field], reverse=direction < 0)
+        return self
+
+    def skip(self, count):
+        self.docs = self.docs[count:]
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+
+    def find(self, filter_dict, projection=None):
+        return FakeCursor([d for d in self.docs if _matches(d, filter_dict)])
+
+    async def find_one(self, filter_dict):
+        return next((d for d in self.docs if _matches(d, filter_dict)), None)
+
+    async def count_documents(self, filter_dict):
+        return sum(1 for d in self.docs if _matches(d, filter_dict))
+
+
+class FakeDatabase(dict):
+    def __getattr__(self, name):
+        return self[name]
+
+
+def make_database(hot, archived, cutoff=CUTOFF):
+    archive._cutoff_cache.delete("transactions")
+    state = [{"_id": "transactions", "cutoff": cutoff}] if cutoff else []
+    return FakeDatabase(
+        transactions=FakeCollection(hot),
+        transactions_archive=FakeCollection(archived),
+        archive_state=FakeCollection(state),
+    )
+
+
+def make_docs(rng, count, newest, oldest):
+    span = int((newest - oldest).total_seconds())
+    return [
+        {
+            "_id": next(_ids),
+            "user_id": rng.choice(["a", "b"]),
+            "created_at": oldest + timedelta(seconds=rng.randrange(span)),
+        }
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_pages_follow_one_order_across_hot_and_archive(seed):
+    rng = random.Random(seed)
+    above = make_docs(rng, 30, datetime(2026, 1, 1), CUTOFF)
+    # Old documents the archive job hasn't moved yet
+    stragglers = make_docs(rng, 8, CUTOFF, datetime(2024, 1, 1))
+    archived = make_docs(rng, 25, CUTOFF, datetime(2023, 1, 1))
+    database = make_database(above + stragglers, archived)
+    expected = sorted(
+        (d for d in above + stragglers + archived if d["user_id"] == "a"),
+        key=lambda d: d["created_at"],
+        reverse=True,
+    )
+
+    for limit in (1, 5, 7, 50):
+        for skip in range(0, len(expected) + 3):
+            page = asyncio.run(
+                find_with_archive(
+                    database,
+                    "transactions",
+                    {"user_id": "a"},
+                    "created_at",
+                    skip,
+                    limit,
+                )
+            )
+            assert page == expected[skip : skip + limit], (skip, limit)
+
+
+def test_without_a_cutoff_only_the_hot_collection_is_read():
+    rng = random.Random(0)
+    hot = make_docs(rng, 5, datetime(2026, 1, 1), CUTOFF)
+    database = make_database(hot, make_docs(rng, 5, CUTOFF, datetime(2024, 1, 1)), None)
+    page = asyncio.run(
+        find_with_archive(database, "transactions", {}, "created_at", 0, 20)
+    )
+    assert len(page) == 5
+
+
+def test_a_range_above_the_cutoff_skips_the_archive():
+    rng = random.Random(0)
+    archived = make_docs(rng, 5, CUTOFF, datetime(2024, 1, 1))
+    database = make_database([], archived)
+    page = asyncio.run(
+        find_with_archive(
+            database,
+            "transactions",
+            {},
+            "created_at",
+            0,
+            20,
+            since_date=CUTOFF + timedelta(days=1),
+        )
+    )
+    assert page == []
+
+
+def test_find_one_falls_back_to_the_archive():
+    doc = {"_id": 1, "created_at": datetime(2024, 6, 1)}
+    database = make_database([], [doc])
+    found = asyncio.run(find_one_with_archive(database, "transactions", {"_id": 1}))
+    assert found == doc
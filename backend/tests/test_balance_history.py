@@ -0,0 +1,90 @@
+import asyncio
+
+from bson.int64 import Int64
+from fastapi.testclient import TestClient
+
+from app.core.security import create_access_token
+from app.main import app
+from app.services.balance_history_service import BalanceHistoryService
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return list(self.docs)
+
+
+class FakeCollection:
+    def __init__(self, *docs):
+        self.docs = list(docs)
+
+    def find(self, filter_dict, projection=None):
+        return FakeCursor(
+            d
+            for d in self.docs
+            if all(d.get(field) == value for field, value in filter_dict.items())
+        )
+
+    async def insert_many(self, docs, ordered=True):
+        self.docs.extend(docs)
+
+
+class FakeDatabase:
+    def __init__(self, *balances):
+        self.balances = FakeCollection(*balances)
+        self.balance_events = FakeCollection()
+        self.balance_snapshots = FakeCollection()
+
+
+def make_service(database, replayed):
+    service = BalanceHistoryService(database)
+
+    async def get_balances_as_of(user_id, as_of=None):
+        return dict(replayed)
+
+    service.get_balances_as_of = get_balances_as_of
+    return service
+
+
+def test_reconcile_records_the_gap_without_touching_balances():
+    database = FakeDatabase(
+        {"user_id": "alice", "currency": "INR", "amount": Int64(15000)},
+        # A balance from before amounts moved to minor units
+        {"user_id": "alice", "currency": "USD", "amount": 12.5},
+    )
+    service = make_service(database, {"INR": 10000, "USD": 1250, "EUR": 300})
+
+    corrections = asyncio.run(service.reconcile_history("alice"))
+
+    assert corrections == {"INR": 5000, "EUR": -300}
+    assert database.balances.docs[0]["amount"] == 15000
+    assert sorted(
+        (e["currency"], e["delta"], e["source"]) for e in database.balance_events.docs
+    ) == [("EUR", -300, "reconcile"), ("INR", 5000, "reconcile")]
+
+
+def test_reconcile_gives_up_while_balances_keep_changing():
+    database = FakeDatabase({"user_id": "alice", "currency": "INR", "amount": 100})
+    service = make_service(database, {"INR": 0})
+    find = database.balances.find
+
+    def find_and_change(filter_dict, projection=None):
+        database.balances.docs[0]["amount"] += 1
+        return find(filter_dict, projection)
+
+    database.balances.find = find_and_change
+
+    assert asyncio.run(service.reconcile_history("alice")) is None
+    assert database.balance_events.docs == []
+
+
+def test_reconcile_route_needs_an_admin(monkeypatch):
+    monkeypatch.setattr("app.core.security.settings.admin_user_ids", ["root"])
+    token = create_access_token("alice")
+    response = TestClient(app).post(
+        "/api/v1/balances/user/alice/history/reconcile",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 403
@@ -0,0 +1,57 @@
+import pytest
+
+from app.core.analytics import UNCATEGORIZED
+from app.core.categorizer import (
+    MIN_SCORE,
+    PREFIX_WEIGHT,
+    get_categorizer,
+    title_key,
+)
+
+
+def categorize(*titles):
+    return get_categorizer().predict([title_key(title) for title in titles])
+
+
+def test_title_key_drops_digits_and_case():
+    assert title_key("Uber 4821") == title_key("uber #1377") == "uber"
+
+
+def test_a_prefix_alone_never_categorizes():
+    assert PREFIX_WEIGHT < MIN_SCORE
+
+
+@pytest.mark.parametrize(
+    "title, category",
+    [
+        ("Uber 4821", "Transport"),
+        ("Dinner with team", "Food"),
+        ("Electricity bill", "Bills"),
+        ("Netflix", "Entertainment"),
+        ("Apollo pharmacy", "Health"),
+        ("Goa flights", "Travel"),
+        ("Myntra order", "Shopping"),
+        ("BigBasket 22", "Groceries"),
+        # A prefix counts once the rest of the title agrees
+        ("pizzas and beer", "Food"),
+        # A two-word seed outweighs either word's own category
+        ("Swiggy Instamart", "Groceries"),
+        ("Uber Eats", "Food"),
+        ("Amazon Prime", "Entertainment"),
+    ],
+)
+def test_predicts_category(title, category):
+    assert categorize(title) == [category]
+
+
+@pytest.mark.parametrize(
+    "title",
+    ["showroom visit", "billiards", "rental car", "autograph book", "farewell", ""],
+)
+def test_unrelated_titles_stay_uncategorized(title):
+    assert categorize(title) == [UNCATEGORIZED]
+
+
+def test_batch_matches_one_by_one():
+    titles = ["", "Uber", "billiards", "", "Swiggy Instamart", "pizzas and beer"]
+    assert categorize(*titles) == [categorize(title)[0] for title in titles]
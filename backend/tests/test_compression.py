@@ -0,0 +1,21 @@
+from app.core.compression import accepted_encodings, choose_encoding
+
+
+def test_brotli_wins_ties():
+    assert choose_encoding("gzip, deflate, br") == "br"
+
+
+def test_q_values_are_honoured():
+    assert choose_encoding("br;q=0.5, gzip;q=0.9") == "gzip"
+    assert choose_encoding("gzip;q=0.4, br") == "br"
+
+
+def test_refused_and_unknown_codings():
+    assert choose_encoding("br;q=0, gzip") == "gzip"
+    assert choose_encoding("deflate") is None
+    assert choose_encoding("identity, gzip;q=0.5") is None
+
+
+def test_wildcard_covers_unlisted_codings():
+    assert choose_encoding("*;q=0.3, br;q=0") == "gzip"
+    assert accepted_encodings("gzip;q=0, br") == {"br"}
@@ -0,0 +1,40 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.deadline import DeadlineMiddleware
+
+app = FastAPI()
+app.add_middleware(DeadlineMiddleware)
+
+
+@app.get("/slow")
+async def slow():
+    await asyncio.sleep(0.2)
+    return {"ok": True}
+
+
+@app.get("/stream")
+async def stream():
+    async def chunks():
+        for _ in range(3):
+            await asyncio.sleep(0.1)
+            yield b"x" * 10
+
+    return StreamingResponse(chunks(), media_type="application/octet-stream")
+
+
+client = TestClient(app)
+
+
+def test_overrun_before_the_response_is_a_504():
+    response = client.get("/slow", headers={"X-Request-Timeout": "0.05"})
+    assert response.status_code == 504
+
+
+def test_streamed_body_outlives_the_deadline():
+    response = client.get("/stream", headers={"X-Request-Timeout": "0.05"})
+    assert response.status_code == 200
+    assert response.content == b"x" * 30
@@ -0,0 +1,85 @@
+import asyncio
+
+from bson import ObjectId
+
+from app.services.group_counter_service import GroupCounterService
+
+GROUP_ID = ObjectId()
+OLD_FOLD = ObjectId()
+NEW_FOLD = ObjectId()
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = list(docs)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self, *docs):
+        self.docs = [dict(doc) for doc in docs]
+        self.reads = 0
+
+    def find(self, filter_dict, projection=None):
+        self.reads += 1
+        return FakeCursor(self.docs)
+
+
+class FakeDatabase:
+    def __init__(self, groups, shards):
+        self.groups = groups
+        self.group_counter_shards = shards
+
+
+def group_doc(total, balance, folds):
+    return {
+        "_id": GROUP_ID,
+        "counter_shards": 8,
+        "counter_folds": folds,
+        "total_expenses": total,
+        "members": [{"user_id": "alice", "balance": balance}],
+    }
+
+
+def test_fold_between_group_and_shard_reads_is_not_lost():
+    # The caller read the group before a fold of 500 reached it...
+    stale = group_doc(1000, 200, [OLD_FOLD])
+    # ...and by the shard read the fold had finished and cleared pending
+    shards = FakeCollection(
+        {"group_id": str(GROUP_ID), "shard": 0, "total_expenses": 30, "balances": {}}
+    )
+    groups = FakeCollection(group_doc(1500, 450, [OLD_FOLD, NEW_FOLD]))
+    service = GroupCounterService(FakeDatabase(groups, shards))
+
+    asyncio.run(service.merge_shards([stale], cached=False))
+
+    assert stale["total_expenses"] == 1530
+    assert stale["members"][0]["balance"] == 450
+    assert shards.reads == 2
+
+
+def test_pending_fold_not_yet_on_the_group_is_counted():
+    doc = group_doc(1000, 200, [OLD_FOLD])
+    pending = {"fold_id": NEW_FOLD, "total_expenses": 500, "balances": {"alice": 250}}
+    shards = FakeCollection(
+        {
+            "group_id": str(GROUP_ID),
+            "shard": 0,
+            "total_expenses": 30,
+            "pending": pending,
+        }
+    )
+    groups = FakeCollection(group_doc(1000, 200, [OLD_FOLD]))
+    service = GroupCounterService(FakeDatabase(groups, shards))
+
+    asyncio.run(service.merge_shards([doc], cached=False))
+
+    assert doc["total_expenses"] == 1530
+    assert doc["members"][0]["balance"] == 450
+    assert shards.reads == 1
@@ -0,0 +1,140 @@
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from app.core import database
+from app.core.security import create_access_token
+from app.main import app
+from app.services import membership_service
+
+ALICE = str(ObjectId())
+BOB = str(ObjectId())
+
+
+class FakeInsertResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+def _matches(doc, filter_dict):
+    for field, condition in filter_dict.items():
+        if field == "members.user_id":
+            user_ids = [m["user_id"] for m in doc.get("members", [])]
+            if condition["$ne"] in user_ids:
+                return False
+        elif doc.get(field) != condition:
+            return False
+    return True
+
+
+class FakeCollection:
+    def __init__(self, *docs):
+        self.docs = [dict(doc) for doc in docs]
+
+    async def find_one(self, filter_dict, projection=None):
+        return next((d for d in self.docs if _matches(d, filter_dict)), None)
+
+    async def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        self.docs.append(dict(doc))
+        return FakeInsertResult(doc["_id"])
+
+    async def find_one_and_update(self, filter_dict, update, return_document=None):
+        doc = await self.find_one(filter_dict)
+        if doc is not None:
+            for field, value in update.get("$push", {}).items():
+                doc.setdefault(field, []).append(value)
+            doc.update(update.get("$set", {}))
+        return doc
+
+    async def bulk_write(self, operations, ordered=True):
+        # Only membership upserts with $addToSet reach here
+        for operation in operations:
+            doc = await self.find_one(operation._filter)
+            if doc is None:
+                doc = dict(operation._filter)
+                self.docs.append(doc)
+            for field, value in operation._doc["$addToSet"].items():
+                if value not in doc.setdefault(field, []):
+                    doc[field].append(value)
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.users = FakeCollection(
+            {"_id": ObjectId(ALICE), "full_name": "Alice", "is_active": True},
+            {"_id": ObjectId(BOB), "full_name": "Bob", "is_active": True},
+        )
+        self.groups = FakeCollection()
+        self.group_memberships = FakeCollection()
+        self.group_counter_shards = FakeCollection()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(database.db, "database", FakeDatabase())
+    membership_service._membership_cache.clear()
+    return TestClient(app)
+
+
+def as_user(user_id):
+    return {"Authorization": f"Bearer {create_access_token(user_id)}"}
+
+
+def create_group(client, created_by=ALICE):
+    return client.post(
+        "/api/v1/groups/",
+        json={"name": "Flat", "avatar": "", "created_by": created_by},
+        headers=as_user(ALICE),
+    )
+
+
+def test_creator_can_use_a_new_group(client):
+    response = create_group(client)
+    assert response.status_code == 201
+    group = response.json()
+    assert group["members"] == [
+        {
+            "user_id": ALICE,
+            "name": "Alice",
+            "avatar": "",
+            "balance": 0.0,
+            "currency": "INR",
+        }
+    ]
+
+    url = f"/api/v1/groups/{group['_id']}"
+    assert client.get(url, headers=as_user(ALICE)).status_code == 200
+    assert client.get(url, headers=as_user(BOB)).status_code == 403
+
+    response = client.post(
+        f"{url}/members",
+        json={"user_id": BOB, "name": "Mallory", "balance": -5000},
+        headers=as_user(ALICE),
+    )
+    assert response.status_code == 200
+    bob = response.json()["members"][1]
+    # Only the user id is taken from the client
+    assert (bob["user_id"], bob["name"], bob["balance"]) == (BOB, "Bob", 0.0)
+    assert client.get(url, headers=as_user(BOB)).status_code == 200
+
+
+def test_group_needs_an_existing_creator(client):
+    assert create_group(client, created_by=BOB).status_code == 403
+    missing = str(ObjectId())
+    response = client.post(
+        "/api/v1/groups/",
+        json={"name": "Flat", "avatar": "", "created_by": missing},
+        headers=as_user(missing),
+    )
+    assert response.status_code == 400
+
+
+def test_adding_an_unknown_user_is_not_found(client):
+    group = create_group(client).json()
+    response = client.post(
+        f"/api/v1/groups/{group['_id']}/members",
+        json={"user_id": str(ObjectId())},
+        headers=as_user(ALICE),
+    )
+    assert response.status_code == 404
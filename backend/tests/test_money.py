@@ -0,0 +1,119 @@
+import pytest
+from bson.int64 import Int64
+
+from app.core.money import (
+    decode_amounts,
+    encode_amounts,
+    minor_units,
+    split_minor,
+    to_major,
+    to_minor,
+)
+from app.models import Currency
+
+
+@pytest.mark.parametrize(
+    "amount, minor",
+    [
+        (0.1, 10),
+        (19.99, 1999),
+        ("1000.005", 100000),  # half-even rounds the tie down to even
+        ("1000.015", 100002),
+        (-2.5, -250),
+        (7, 700),
+    ],
+)
+def test_to_minor(amount, minor):
+    result = to_minor(amount, Currency.INR)
+    assert isinstance(result, Int64)
+    assert result == minor
+
+
+def test_to_major_round_trips():
+    for amount in (0.01, 0.1, 0.3, 19.99, 123456.78):
+        assert to_major(to_minor(amount, Currency.USD), Currency.USD) == amount
+
+
+@pytest.mark.parametrize("total", [0, 1, 99, 100, 1001, 999999])
+@pytest.mark.parametrize("parts", [1, 2, 3, 7])
+def test_split_minor_sums_exactly(total, parts):
+    shares = split_minor(total, parts)
+    assert len(shares) == parts
+    assert sum(shares) == total
+    assert max(shares) - min(shares) <= 1
+    assert shares == sorted(shares, reverse=True)
+
+
+def test_split_minor_gives_the_remainder_to_the_first_shares():
+    assert split_minor(1000, 3) == [334, 333, 333]
+    assert split_minor(1001, 3) == [334, 334, 333]
+
+
+def test_encode_and_decode_amounts():
+    doc = {
+        "total_expenses": 12.5,
+        "currency": "USD",
+        "members": [{"user_id": "a", "balance": -3.33}, {"user_id": "b"}],
+    }
+    encode_amounts(doc, "groups")
+    assert doc["total_expenses"] == 1250
+    assert doc["members"][0]["balance"] == -333
+    assert "balance" not in doc["members"][1]
+
+    # Encoding minor units again leaves them alone
+    encode_amounts(doc, "groups")
+    assert doc["total_expenses"] == 1250
+
+    decode_amounts(doc, "groups")
+    assert doc["total_expenses"] == 12.5
+    assert doc["members"][0]["balance"] == -3.33
+
+
+def test_decode_passes_legacy_doubles_through():
+    doc = {"amount": 42.5}
+    assert decode_amounts(doc, "transactions") == {"amount": 42.5}
+
+
+def _evaluate(expr, doc):
+    """Just enough of Mongo's expression language for ``minor_units``"""
+    if isinstance(expr, str) and expr.startswith("$"):
+        return doc.get(expr[1:])
+    if not isinstance(expr, dict):
+        return expr
+    ((op, args),) = expr.items()
+    if op == "$switch":
+        for branch in args["branches"]:
+            if _evaluate(branch["case"], doc):
+                return branch["then"]
+        return args["default"]
+    if not isinstance(args, list):
+        args = [args]
+    values = [_evaluate(arg, doc) for arg in args]
+    if op == "$toLong":
+        return Int64(values[0])
+    if op == "$cond":
+        return values[1] if values[0] else values[2]
+    if op == "$eq":
+        return values[0] == values[1]
+    if op == "$type":
+        return "double" if isinstance(values[0], float) else "long"
+    if op == "$multiply":
+        return values[0] * values[1]
+    if op == "$round":
+        return round(values[0], values[1])
+    raise NotImplementedError(op)
+
+
+@pytest.mark.parametrize(
+    "doc, minor",
+    [
+        ({"amount": Int64(1250), "currency": "USD"}, 1250),
+        ({"amount": 12.5, "currency": "USD"}, 1250),
+        ({"amount": 0.29, "currency": "INR"}, 29),
+        ({"amount": -3.33}, -333),
+    ],
+)
+def test_minor_units_normalises_legacy_doubles(doc, minor):
+    value = _evaluate(minor_units(), doc)
+    assert value == minor
+    assert isinstance(value, int)
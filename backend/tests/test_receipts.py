@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from app.core.security import create_access_token
+from app.main import app
+from app.routers.receipts import get_receipt_service
+from app.services.receipt_service import ReceiptForbidden, ReceiptService
+
+
+class FakeCollection:
+    def __init__(self, *docs):
+        self.docs = {doc["_id"]: dict(doc) for doc in docs}
+
+    async def find_one(self, filter_dict, projection=None):
+        return self.docs.get(filter_dict["_id"])
+
+    async def find_one_and_update(self, filter_dict, update, return_document=None):
+        doc = self.docs.get(filter_dict["_id"])
+        if doc is not None:
+            for field, value in update.get("$addToSet", {}).items():
+                if value not in doc.setdefault(field, []):
+                    doc[field].append(value)
+        return doc
+
+    async def update_one(self, filter_dict, update):
+        doc = self.docs.get(filter_dict["_id"])
+        if doc is not None:
+            doc.update(update["$set"])
+
+
+class FakeDatabase:
+    def __init__(self, receipts, transactions):
+        self.receipts = receipts
+        self.transactions = transactions
+
+
+def make_service(receipts, transactions) -> ReceiptService:
+    service = ReceiptService.__new__(ReceiptService)
+    service.database = FakeDatabase(receipts, transactions)
+    service.collection = receipts
+    return service
+
+
+RECEIPT_ID = ObjectId()
+TRANSACTION_ID = ObjectId()
+
+
+def receipt(uploaded_by="alice"):
+    return {
+        "_id": RECEIPT_ID,
+        "uploaded_by": uploaded_by,
+        "status": "pending",
+        "transaction_ids": [],
+    }
+
+
+def test_attach_unknown_receipt_returns_none():
+    service = make_service(
+        FakeCollection(), FakeCollection({"_id": TRANSACTION_ID, "user_id": "alice"})
+    )
+    result = asyncio.run(
+        service.attach_to_transaction(RECEIPT_ID, str(TRANSACTION_ID), "alice")
+    )
+    assert result is None
+
+
+def test_attach_unknown_transaction_returns_none():
+    service = make_service(FakeCollection(receipt()), FakeCollection())
+    result = asyncio.run(
+        service.attach_to_transaction(RECEIPT_ID, str(TRANSACTION_ID), "alice")
+    )
+    assert result is None
+
+
+def test_attach_to_another_users_transaction_is_forbidden():
+    transactions = FakeCollection({"_id": TRANSACTION_ID, "user_id": "bob"})
+    service = make_service(FakeCollection(receipt()), transactions)
+    with pytest.raises(ReceiptForbidden):
+        asyncio.run(
+            service.attach_to_transaction(RECEIPT_ID, str(TRANSACTION_ID), "alice")
+        )
+    assert "receipt" not in transactions.docs[TRANSACTION_ID]
+
+
+def test_attach_another_users_receipt_is_forbidden():
+    service = make_service(
+        FakeCollection(receipt(uploaded_by="bob")),
+        FakeCollection({"_id": TRANSACTION_ID, "user_id": "alice"}),
+    )
+    with pytest.raises(ReceiptForbidden):
+        asyncio.run(
+            service.attach_to_transaction(RECEIPT_ID, str(TRANSACTION_ID), "alice")
+        )
+
+
+def test_attach_own_receipt_links_both():
+    receipts = FakeCollection(receipt())
+    transactions = FakeCollection({"_id": TRANSACTION_ID, "user_id": "alice"})
+    service = make_service(receipts, transactions)
+    result = asyncio.run(
+        service.attach_to_transaction(RECEIPT_ID, str(TRANSACTION_ID), "alice")
+    )
+    assert result["transaction_ids"] == [str(TRANSACTION_ID)]
+    assert transactions.docs[TRANSACTION_ID]["receipt"]["receipt_id"] == str(RECEIPT_ID)
+
+
+def test_malformed_content_length_is_a_bad_request():
+    app.dependency_overrides[get_receipt_service] = lambda: None
+    try:
+        client = TestClient(app)
+        response = client.post(
+            "/api/v1/receipts/",
+            content=b"\xff\xd8",
+            headers={
+                "Authorization": f"Bearer {create_access_token('alice')}",
+                "Content-Type": "image/jpeg",
+                "Content-Length": "abc",
+            },
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 400
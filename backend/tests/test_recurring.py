@@ -0,0 +1,214 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from app.models import RecurrenceFrequency, RecurringTransactionCreate
+from app.services.recurring_service import (
+    RecurringScheduler,
+    RecurringService,
+    next_occurrence,
+    recurring_scheduler,
+    resume_at,
+)
+
+
+class FakeInsertResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+
+    async def insert_one(self, doc):
+        doc = dict(doc, _id=ObjectId())
+        self.docs.append(doc)
+        return FakeInsertResult(doc["_id"])
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.recurring_transactions = FakeCollection()
+
+
+def monthly(start_at: datetime, **extra) -> dict:
+    return {"frequency": RecurrenceFrequency.MONTHLY, "start_at": start_at, **extra}
+
+
+def test_aware_start_at_is_stored_as_naive_utc():
+    data = RecurringTransactionCreate(
+        user_id="u1",
+        title="Rent",
+        amount=25000,
+        frequency=RecurrenceFrequency.MONTHLY,
+        start_at=datetime(2026, 1, 31, 10, 0, tzinfo=timezone(timedelta(hours=5.5))),
+    )
+    assert data.start_at == datetime(2026, 1, 31, 4, 30)
+    assert data.start_at.tzinfo is None
+
+
+def test_create_with_aware_start_at_notifies_a_running_scheduler():
+    async def scenario():
+        recurring_scheduler._task = asyncio.get_running_loop().create_future()
+        recurring_scheduler._next_due = datetime.utcnow() + timedelta(days=1)
+        try:
+            service = RecurringService(FakeDatabase())
+            start_at = datetime.now(timezone.utc) + timedelta(hours=1)
+            created = await service.create_recurring(
+                RecurringTransactionCreate(
+                    user_id="u1",
+                    title="Gym",
+                    amount=1500,
+                    frequency=RecurrenceFrequency.MONTHLY,
+                    start_at=start_at,
+                )
+            )
+            assert created.next_run_at == start_at.replace(tzinfo=None)
+            assert recurring_scheduler._wakeup.is_set()
+        finally:
+            recurring_scheduler._task = None
+            recurring_scheduler._next_due = None
+            recurring_scheduler._wakeup.clear()
+
+    asyncio.run(scenario())
+
+
+def test_monthly_occurrences_keep_the_start_day():
+    template = monthly(datetime(2026, 1, 31, 9, 0))
+    february = next_occurrence(template, template["start_at"])
+    assert february == datetime(2026, 2, 28, 9, 0)
+    assert next_occurrence(template, february) == datetime(2026, 3, 31, 9, 0)
+
+
+def test_weekly_interval():
+    template = {"frequency": RecurrenceFrequency.WEEKLY, "interval": 2}
+    assert next_occurrence(template, datetime(2026, 1, 1)) == datetime(2026, 1, 15)
+
+
+def test_resume_skips_the_paused_occurrences():
+    template = monthly(
+        datetime(2026, 1, 5), next_run_at=datetime(2026, 2, 5), is_active=False
+    )
+    assert resume_at(template, datetime(2026, 6, 10)) == datetime(2026, 7, 5)
+    # An occurrence due exactly now is kept
+    assert resume_at(template, datetime(2026, 6, 5)) == datetime(2026, 6, 5)
+
+
+def test_notify_wakes_only_for_sooner_templates():
+    scheduler = RecurringScheduler()
+    now = datetime(2026, 1, 1)
+    scheduler.notify(now)
+    assert not scheduler._wakeup.is_set()
+
+    scheduler._task = object()
+    scheduler._next_due = now + timedelta(hours=1)
+    scheduler.notify(now + timedelta(hours=2))
+    assert not scheduler._wakeup.is_set()
+    scheduler.notify(now + timedelta(minutes=5))
+    assert scheduler._wakeup.is_set()
+    assert scheduler._next_due == now + timedelta(minutes=5)
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs = sorted(self.docs, key=lambda d: d[field], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+class FakeTemplates:
+    def __init__(self, *docs):
+        self.docs = [dict(doc) for doc in docs]
+
+    def find(self, filter_dict):
+        due = filter_dict["next_run_at"]["$lte"]
+        return FakeCursor(
+            [d for d in self.docs if d["is_active"] and d["next_run_at"] <= due]
+        )
+
+    async def bulk_write(self, operations, ordered=True):
+        for operation in operations:
+            for doc in self.docs:
+                if all(doc.get(k) == v for k, v in operation._filter.items()):
+                    doc.update(operation._doc["$set"])
+                    doc["occurrences"] += operation._doc["$inc"]["occurrences"]
+
+
+class FakeTransactionService:
+    inserted = []
+
+    def __init__(self, database):
+        pass
+
+    async def insert_transactions(self, docs):
+        FakeTransactionService.inserted.extend(docs)
+        return docs
+
+
+def template(**fields):
+    return {
+        "_id": ObjectId(),
+        "user_id": "alice",
+        "title": "Rent",
+        "amount": 2500000,
+        "currency": "INR",
+        "type": "payment",
+        "frequency": RecurrenceFrequency.MONTHLY,
+        "start_at": datetime(2026, 1, 31),
+        "next_run_at": datetime(2026, 1, 31),
+        "is_active": True,
+        "occurrences": 0,
+        **fields,
+    }
+
+
+def materialize(monkeypatch, templates, now):
+    monkeypatch.setattr(
+        "app.services.recurring_service.TransactionService", FakeTransactionService
+    )
+    FakeTransactionService.inserted = []
+    service = RecurringService.__new__(RecurringService)
+    service.database = None
+    service.collection = templates
+    return asyncio.run(service.materialize_due(now))
+
+
+def test_materialize_catches_up_and_advances(monkeypatch):
+    templates = FakeTemplates(template())
+    created = materialize(monkeypatch, templates, datetime(2026, 4, 1))
+
+    assert created == 3
+    assert [t["created_at"] for t in FakeTransactionService.inserted] == [
+        datetime(2026, 1, 31),
+        datetime(2026, 2, 28),
+        datetime(2026, 3, 31),
+    ]
+    assert templates.docs[0]["next_run_at"] == datetime(2026, 4, 30)
+    assert templates.docs[0]["occurrences"] == 3
+
+
+def test_materialize_catch_up_is_bounded_per_pass(monkeypatch):
+    monkeypatch.setattr(
+        "app.services.recurring_service.settings.recurring_max_catchup", 2
+    )
+    templates = FakeTemplates(template())
+    # Later passes pick up where the bounded one stopped
+    assert materialize(monkeypatch, templates, datetime(2026, 6, 1)) == 5
+    assert templates.docs[0]["next_run_at"] == datetime(2026, 6, 30)
+
+
+def test_materialize_stops_at_end_at(monkeypatch):
+    templates = FakeTemplates(template(end_at=datetime(2026, 2, 28)))
+    assert materialize(monkeypatch, templates, datetime(2026, 6, 1)) == 2
+    assert templates.docs[0]["is_active"] is False
@@ -0,0 +1,175 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from app.core.config import DEFAULT_SECRET_KEY, Settings
+from app.core.security import (
+    Principal,
+    check_owner,
+    create_access_token,
+    require_admin,
+    require_self,
+    scope_to_caller,
+    verify_token,
+)
+from app.main import app
+from app.models import Transaction
+from app.routers.transactions import get_transaction_service
+
+ALICE = Principal(user_id="alice", expires_at=float("inf"))
+
+
+def test_token_round_trip():
+    assert verify_token(create_access_token("alice")).user_id == "alice"
+
+
+def test_tampered_token_is_rejected():
+    token = create_access_token("alice")
+    with pytest.raises(ValueError):
+        verify_token(token[:-2] + ("AA" if not token.endswith("AA") else "BB"))
+
+
+def test_require_self():
+    asyncio.run(require_self("alice", ALICE))
+    asyncio.run(require_self("bob", None))
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(require_self("bob", ALICE))
+    assert e.value.status_code == 403
+
+
+def test_scope_to_caller_pins_list_filters():
+    assert scope_to_caller(None, ALICE) == "alice"
+    assert scope_to_caller("alice", ALICE) == "alice"
+    assert scope_to_caller("bob", None) == "bob"
+    with pytest.raises(HTTPException) as e:
+        scope_to_caller("bob", ALICE)
+    assert e.value.status_code == 403
+
+
+def test_check_owner_accepts_any_listed_user():
+    check_owner(ALICE, "bob", "alice")
+    check_owner(None, "bob")
+    with pytest.raises(HTTPException):
+        check_owner(ALICE, "bob", None)
+
+
+def test_require_admin(monkeypatch):
+    monkeypatch.setattr("app.core.security.settings.admin_user_ids", ["root"])
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(require_admin(ALICE))
+    assert e.value.status_code == 403
+    asyncio.run(require_admin(Principal(user_id="root", expires_at=float("inf"))))
+
+
+def test_default_secret_is_refused_outside_development():
+    with pytest.raises(ValidationError):
+        Settings(_env_file=None, server_mode="production")
+    Settings(_env_file=None, server_mode="development")
+    Settings(_env_file=None, server_mode="production", auth_enabled=False)
+    Settings(_env_file=None, server_mode="production", secret_key="s3cret")
+    assert Settings(_env_file=None).secret_key == DEFAULT_SECRET_KEY
+
+
+class FakeTransactionService:
+    def __init__(self, *transactions):
+        self.transactions = {str(t.id): t for t in transactions}
+        self.calls = []
+
+    async def get_transaction_by_id(self, transaction_id):
+        return self.transactions.get(transaction_id)
+
+    async def get_transactions(self, **kwargs):
+        self.calls.append(kwargs)
+        return []
+
+    async def update_transaction(self, transaction_id, data):
+        self.calls.append(("update", transaction_id))
+        return self.transactions[transaction_id]
+
+
+def transaction(user_id, participants=()):
+    return Transaction(
+        user_id=user_id,
+        title="Dinner",
+        amount=100,
+        type="split",
+        participants=list(participants),
+    )
+
+
+@pytest.fixture
+def client():
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def as_user(user_id):
+    return {"Authorization": f"Bearer {create_access_token(user_id)}"}
+
+
+def test_transaction_list_is_scoped_to_the_caller(client):
+    service = FakeTransactionService()
+    app.dependency_overrides[get_transaction_service] = lambda: service
+
+    response = client.get("/api/v1/transactions/", headers=as_user("alice"))
+    assert response.status_code == 200
+    assert service.calls[-1]["user_id"] == "alice"
+
+    response = client.get(
+        "/api/v1/transactions/", params={"user_id": "bob"}, headers=as_user("alice")
+    )
+    assert response.status_code == 403
+
+
+def test_transaction_reads_and_writes_check_the_caller(client):
+    shared = transaction("bob", participants=["alice"])
+    service = FakeTransactionService(shared)
+    app.dependency_overrides[get_transaction_service] = lambda: service
+    url = f"/api/v1/transactions/{shared.id}"
+
+    assert client.get(url, headers=as_user("alice")).status_code == 200
+    assert client.get(url, headers=as_user("carol")).status_code == 403
+
+    response = client.put(url, json={"title": "Lunch"}, headers=as_user("alice"))
+    assert response.status_code == 403
+    response = client.put(url, json={"title": "Lunch"}, headers=as_user("bob"))
+    assert response.status_code == 200
+    assert service.calls == [("update", str(shared.id))]
+
+
+def test_transaction_cannot_be_created_for_another_user(client):
+    app.dependency_overrides[get_transaction_service] = lambda: FakeTransactionService()
+    response = client.post(
+        "/api/v1/transactions/",
+        json={"user_id": "bob", "title": "Dinner", "amount": 100, "type": "split"},
+        headers=as_user("alice"),
+    )
+    assert response.status_code == 403
+
+
+def test_faq_writes_need_an_admin(client, monkeypatch):
+    monkeypatch.setattr("app.core.security.settings.admin_user_ids", ["root"])
+    response = client.delete("/api/v1/support/faq/abc", headers=as_user("alice"))
+    assert response.status_code == 403
+
+
+def test_routes_need_a_valid_bearer_token(client):
+    app.dependency_overrides[get_transaction_service] = lambda: FakeTransactionService()
+    response = client.get("/api/v1/transactions/")
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+    response = client.get(
+        "/api/v1/transactions/", headers={"Authorization": "Bearer not-a-token"}
+    )
+    assert response.status_code == 401
+
+    expired = create_access_token("alice", expires_delta=timedelta(seconds=-1))
+    response = client.get(
+        "/api/v1/transactions/", headers={"Authorization": f"Bearer {expired}"}
+    )
+    assert response.status_code == 401
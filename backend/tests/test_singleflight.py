@@ -0,0 +1,62 @@
+import asyncio
+import contextvars
+
+from app.core import deadline
+from app.core.singleflight import SingleFlight
+
+caller = contextvars.ContextVar("caller", default=None)
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight = SingleFlight("test.shared")
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        results = await asyncio.gather(*(flight.do("k", load) for _ in range(5)))
+        return results, flight.stats
+
+    results, stats = asyncio.run(scenario())
+    assert results == [1] * 5
+    assert stats.executions == 1 and stats.coalesced == 4
+
+
+def test_execution_does_not_inherit_the_first_callers_context():
+    async def scenario():
+        flight = SingleFlight("test.context")
+
+        async def load():
+            return caller.get(), deadline.remaining()
+
+        caller.set("first")
+        return await flight.do("k", load)
+
+    seen, left = asyncio.run(scenario())
+    assert seen is None
+    # Bounded by its own budget instead
+    assert left is not None and left > 0
+
+
+def test_a_caller_timing_out_does_not_cancel_the_others():
+    async def scenario():
+        flight = SingleFlight("test.cancel")
+
+        async def load():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        impatient = asyncio.create_task(
+            asyncio.wait_for(flight.do("k", load), timeout=0.01)
+        )
+        patient = asyncio.create_task(flight.do("k", load))
+        results = await asyncio.gather(impatient, patient, return_exceptions=True)
+        return results
+
+    impatient, patient = asyncio.run(scenario())
+    assert isinstance(impatient, asyncio.TimeoutError)
+    assert patient == "done"
@@ -0,0 +1,54 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.security import create_access_token
+from app.main import app
+from app.routers.support import get_support_service
+
+
+class FakeSupportService:
+    def __init__(self):
+        self.calls = []
+
+    async def get_spending_report(self, user_id, year, month):
+        self.calls.append((user_id, year, month))
+        return None
+
+    async def generate_spending_report(self, user_id, year, month):
+        self.calls.append((user_id, year, month))
+        return {"user_id": user_id, "year": year, "month": month}
+
+
+@pytest.fixture
+def service():
+    service = FakeSupportService()
+    app.dependency_overrides[get_support_service] = lambda: service
+    yield service
+    app.dependency_overrides.clear()
+
+
+AS_ALICE = {"Authorization": f"Bearer {create_access_token('alice')}"}
+
+
+@pytest.mark.parametrize("year, month", [(2025, 0), (2025, 13), (1, 6), (99999, 6)])
+def test_spending_report_period_is_validated(service, year, month):
+    client = TestClient(app)
+    response = client.get(
+        f"/api/v1/support/spending-reports/alice/{year}/{month}", headers=AS_ALICE
+    )
+    assert response.status_code == 422
+    response = client.post(
+        "/api/v1/support/spending-reports",
+        params={"user_id": "alice", "year": year, "month": month},
+        headers=AS_ALICE,
+    )
+    assert response.status_code == 422
+    assert service.calls == []
+
+
+def test_spending_report_accepts_december(service):
+    response = TestClient(app).get(
+        "/api/v1/support/spending-reports/alice/2025/12", headers=AS_ALICE
+    )
+    assert response.status_code == 404
+    assert service.calls == [("alice", 2025, 12)]
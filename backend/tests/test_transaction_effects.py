@@ -0,0 +1,167 @@
+import math
+import random
+from collections import defaultdict
+
+import pytest
+
+from app.jobs.reconcile_balances import _effect_stages
+from app.models import TransactionStatus, TransactionType
+from app.services.transaction_service import (
+    transaction_debts,
+    transaction_effects,
+    transaction_pair_effects,
+)
+
+
+def transaction(amount, payer, participants, kind=TransactionType.SPLIT, **fields):
+    return {
+        "_id": random.random(),
+        "user_id": payer,
+        "amount": amount,
+        "type": kind.value,
+        "participants": participants,
+        "status": TransactionStatus.PENDING.value,
+        **fields,
+    }
+
+
+def test_split_charges_each_other_participant_their_share():
+    debts = transaction_debts(transaction(1000, "a", ["a", "b", "c"]))
+    # The payer's own share is the first, so it takes the extra paisa
+    assert debts == [("b", "a", 333), ("c", "a", 333)]
+
+
+def test_payment_moves_the_whole_amount():
+    debts = transaction_debts(
+        transaction(1001, "a", ["b", "c"], kind=TransactionType.PAYMENT)
+    )
+    assert debts == [("b", "a", 501), ("c", "a", 500)]
+
+
+def test_duplicates_and_the_payer_are_dropped_from_participants():
+    debts = transaction_debts(transaction(900, "a", ["b", "a", "b", "c"]))
+    assert debts == [("b", "a", 300), ("c", "a", 300)]
+
+
+def test_nothing_is_owed_without_others_or_once_cancelled():
+    assert transaction_debts(transaction(500, "a", ["a"])) == []
+    cancelled = transaction(500, "a", ["b"], status=TransactionStatus.CANCELLED.value)
+    assert transaction_debts(cancelled) == []
+    assert transaction_effects(cancelled) == {}
+
+
+def test_effects_and_pair_effects_balance():
+    doc = transaction(1000, "b", ["a", "b", "c"])
+    assert transaction_effects(doc) == {"b": 666, "a": -333, "c": -333}
+    assert sum(transaction_effects(doc).values()) == 0
+    # Positive means the second user of the pair owes the first
+    assert transaction_pair_effects(doc) == {("a", "b"): -333, ("b", "c"): 333}
+
+
+# A small evaluator for the aggregation operators the reconcile job uses, so
+# its pipeline can be checked against transaction_effects without a server
+
+
+def _evaluate(expr, doc, variables):
+    if isinstance(expr, str) and expr.startswith("$$"):
+        return variables[expr[2:]]
+    if isinstance(expr, str) and expr.startswith("$"):
+        return doc.get(expr[1:])
+    if isinstance(expr, list):
+        return [_evaluate(item, doc, variables) for item in expr]
+    if not isinstance(expr, dict):
+        return expr
+    if not next(iter(expr)).startswith("$"):
+        return {key: _evaluate(value, doc, variables) for key, value in expr.items()}
+    ((operator, args),) = expr.items()
+
+    def ev(expression, **extra):
+        return _evaluate(expression, doc, {**variables, **extra})
+
+    if operator == "$filter":
+        return [x for x in ev(args["input"]) if ev(args["cond"], this=x)]
+    if operator == "$map":
+        return [ev(args["in"], **{args["as"]: x}) for x in ev(args["input"])]
+    if operator == "$reduce":
+        value = ev(args["initialValue"])
+        for x in ev(args["input"]):
+            value = ev(args["in"], this=x, value=value)
+        return value
+    if operator == "$cond":
+        condition, then, otherwise = args
+        return ev(then) if ev(condition) else ev(otherwise)
+    if operator == "$ifNull":
+        value = ev(args[0])
+        return ev(args[1]) if value is None else value
+    values = ev(args) if isinstance(args, list) else [ev(args)]
+    operators = {
+        "$in": lambda x, array: x in array,
+        "$eq": lambda a, b: a == b,
+        "$ne": lambda a, b: a != b,
+        "$lt": lambda a, b: a < b,
+        "$add": lambda *xs: sum(xs),
+        "$subtract": lambda a, b: a - b,
+        "$divide": lambda a, b: a / b,
+        "$mod": lambda a, b: math.fmod(a, b),
+        "$floor": math.floor,
+        "$toLong": int,
+        "$size": len,
+        "$range": lambda start, end: list(range(start, end)),
+        "$arrayElemAt": lambda array, index: array[index],
+        "$concatArrays": lambda *arrays: [x for array in arrays for x in array],
+    }
+    return operators[operator](*values)
+
+
+def _run(stages, docs):
+    for stage in stages:
+        ((name, spec),) = stage.items()
+        if name == "$project":
+            docs = [
+                {
+                    "_id": doc["_id"],
+                    **{
+                        field: (
+                            doc.get(field) if value == 1 else _evaluate(value, doc, {})
+                        )
+                        for field, value in spec.items()
+                    },
+                }
+                for doc in docs
+            ]
+        elif name == "$set":
+            docs = [
+                {**doc, **{f: _evaluate(v, doc, {}) for f, v in spec.items()}}
+                for doc in docs
+            ]
+        elif name == "$match":
+            assert spec == {"others.0": {"$exists": True}}
+            docs = [doc for doc in docs if doc["others"]]
+        elif name == "$unwind":
+            field = spec[1:]
+            docs = [{**doc, field: item} for doc in docs for item in doc[field]]
+        else:
+            raise AssertionError(f"unsupported stage {name}")
+    return docs
+
+
+def pipeline_effects(doc):
+    effects = defaultdict(int)
+    for row in _run(_effect_stages(), [doc]):
+        effects[row["effects"]["user_id"]] += row["effects"]["delta"]
+    return {user_id: delta for user_id, delta in effects.items() if delta}
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_reconcile_pipeline_matches_transaction_effects(seed):
+    rng = random.Random(seed)
+    users = ["a", "b", "c", "d", "e"]
+    for _ in range(50):
+        doc = transaction(
+            rng.randrange(0, 100000),
+            rng.choice(users),
+            [rng.choice(users) for _ in range(rng.randrange(0, 7))],
+            kind=rng.choice(list(TransactionType)),
+        )
+        expected = {u: d for u, d in transaction_effects(doc).items() if d}
+        assert pipeline_effects(doc) == expected
@@ -0,0 +1,118 @@
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from app.core import database
+from app.core.security import verify_token
+from app.main import app
+
+
+class FakeInsertResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def skip(self, count):
+        self.docs = self.docs[count:]
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length):
+        return self.docs
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+
+    async def find_one(self, filter_dict, projection=None):
+        for doc in self.docs:
+            if all(doc.get(field) == value for field, value in filter_dict.items()):
+                return doc
+        return None
+
+    def find(self, filter_dict):
+        return FakeCursor([d for d in self.docs if d.get("is_active")])
+
+    async def insert_one(self, doc):
+        doc["_id"] = ObjectId()
+        self.docs.append(dict(doc))
+        return FakeInsertResult(doc["_id"])
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.users = FakeCollection()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(database.db, "database", FakeDatabase())
+    return TestClient(app)
+
+
+def sign_up(client, username):
+    return client.post(
+        "/api/v1/users/",
+        json={
+            "email": f"{username}@example.com",
+            "username": username,
+            "full_name": username.title(),
+            "phone": "+91 98765 43210",
+        },
+    )
+
+
+def test_sign_up_needs_no_token_and_returns_one(client):
+    response = sign_up(client, "alice")
+    assert response.status_code == 201
+    body = response.json()
+    assert body["token_type"] == "bearer"
+    assert verify_token(body["access_token"]).user_id == body["_id"]
+
+    response = client.get(
+        f"/api/v1/users/{body['_id']}",
+        headers={"Authorization": f"Bearer {body['access_token']}"},
+    )
+    assert response.status_code == 200
+    assert response.json()["email"] == "alice@example.com"
+
+
+def test_sign_up_rejects_a_taken_username(client):
+    assert sign_up(client, "alice").status_code == 201
+    assert sign_up(client, "alice").status_code == 400
+
+
+def test_other_user_routes_still_need_a_token(client):
+    assert client.get("/api/v1/users/").status_code == 401
+
+
+PUBLIC_FIELDS = {"_id", "username", "full_name", "avatar"}
+
+
+def test_other_users_see_only_public_profiles(client):
+    alice = sign_up(client, "alice").json()
+    bob = sign_up(client, "bob").json()
+    as_bob = {"Authorization": f"Bearer {bob['access_token']}"}
+
+    response = client.get(f"/api/v1/users/{alice['_id']}", headers=as_bob)
+    assert response.status_code == 200
+    assert set(response.json()) == PUBLIC_FIELDS
+
+    for url in (
+        "/api/v1/users/",
+        "/api/v1/users/email/alice@example.com",
+        "/api/v1/users/username/alice",
+    ):
+        response = client.get(url, headers=as_bob)
+        assert response.status_code == 200
+        body = response.json()
+        for profile in body if isinstance(body, list) else [body]:
+            assert set(profile) == PUBLIC_FIELDS